@@ -1,18 +1,89 @@
-import sounddevice as sd
+import importlib
+import inspect
+import os
 import numpy as np
 import threading
-from effects.reverb import ReverbEffect
-from effects.gate import GateEffect
-from effects.pitch_shift import PitchShiftEffect
 from components.recording import RecordingSession
 from components.loop_controls import LoopControls
+from components.effect_pool import EffectWorkerPool
+from components.command_ring import CommandRing, register_commands
+from components.meters import MeterBank
+from components.spectrum import TAPS, TapRing, SpectrumAnalyzer
+from components.transport import Transport, QUANTIZE_MODES
+from components.tempo import TempoDetector
+from components.time_stretch import LoopStretcher
+from components.undo import UndoHistory
+from components.loop_store import LoopStore
+from components.limiter import Limiter, soft_clip
+from components.latency import LatencyCalibrator
+from components.audio_backend import SoundDeviceBackend
+from components.automation import AutomationLane
+from effects.filter import FILTER_KINDS
+from effects.plugin import discover_plugins
+
+# Command address prefix -> attribute prefix used for routing/bypass state
+EFFECT_PREFIXES = {'reverb': 'reverb', 'gate': 'gate', 'pitch_shift': 'pitch',
+                   'convolution': 'convolution', 'filter': 'filter', 'delay': 'delay'}
+PITCH_QUALITIES = ['low', 'medium', 'high']
+
+# Commands that act on the selected loop
+RECORD_COMMANDS = ('record', 'overdub', 'record.toggle', 'overdub.toggle')
+
+# Input blocks the callback can hand over before the mixer takes them
+INPUT_QUEUE = 4
+
+# Effects are imported on first use so SciPy/Numba stay out of startup
+EFFECT_CLASSES = {
+    'reverb': ('effects.reverb', 'ReverbEffect'),
+    'gate': ('effects.gate', 'GateEffect'),
+    'pitch_shift': ('effects.pitch_shift', 'PitchShiftEffect'),
+    'convolution': ('effects.convolution', 'ConvolutionEffect'),
+    'filter': ('effects.filter', 'FilterEffect'),
+    'delay': ('effects.delay', 'DelayEffect'),
+}
+
+# Processing order of a loop's effects; installed plugins run after the built-ins
+EFFECT_CHAIN = ['gate', 'pitch_shift', 'reverb', 'convolution', 'filter', 'delay']
+
+# Effect plugins from other packages (see effects.plugin). Each gets the same
+# routing commands as a built-in effect, plus '<name>.param' whose target is
+# the index of the parameter in its class's `parameters`.
+PLUGIN_EFFECTS = []
+for _name, _entry in discover_plugins().items():
+    if _name in EFFECT_CLASSES or '.' in _name:
+        print(f"Ignoring effect plugin {_name}: name already in use")
+        continue
+    EFFECT_CLASSES[_name] = _entry
+    EFFECT_PREFIXES[_name] = _name
+    EFFECT_CHAIN.append(_name)
+    PLUGIN_EFFECTS.append(_name)
+    register_commands(f"{_name}.{param}" for param in ('bypass', 'overdub', 'input', 'output', 'param'))
+
+
+def effect_class(name):
+    """The class of effect `name`; importing it is cheap, SciPy loads in prepare()"""
+    module_name, class_name = EFFECT_CLASSES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def effect_defaults(name):
+    """{setting: default} for an effect that isn't loaded, from its parameters and constructor"""
+    cls = effect_class(name)
+    defaults = {key: argument.default for key, argument in inspect.signature(cls).parameters.items()
+                if argument.default is not inspect.Parameter.empty}
+    defaults.update((parameter.name, parameter.default) for parameter in cls.parameters)
+    return defaults
 
 
 class AudioLooper:
-    def __init__(self, rate=44100, chunk=1024, format='float32', initial_loop_lengths=[2.0, 4.0, 8.0]):
+    def __init__(self, rate=44100, chunk=1024, format='float32', initial_loop_lengths=[2.0, 4.0, 8.0],
+                 input_channels=1, effect_workers=0, effect_deadline=None,
+                 loop_allocator=None, commands=None, meters=None, taps=None,
+                 undo_budget=64 * 2**20, loop_compression='zlib', backend=None):
         self.rate = rate
         self.chunk = chunk
         self.format = format
+        self.input_channels = input_channels
 
     
         self.loops = {}
@@ -31,36 +102,119 @@ class AudioLooper:
 
         self.current_loop_id = min(self.loops.keys()) if self.loops else None
 
-        self.input_device = sd.default.device[0]
-        self.output_device = sd.default.device[1]
+        # Audio streams come from the backend (components.audio_backend); a
+        # FakeBackend runs the engine without a sound card
+        self.backend = backend if backend is not None else SoundDeviceBackend()
+        self.input_device, self.output_device = self.backend.default_devices()
 
         # Initialize components
         self.recording_session = RecordingSession(rate)
         self.is_session_recording = False
-        self.loop_controls = LoopControls(rate, chunk, format, initial_loop_lengths)
+        # Tempo clock; loop lengths snap to its bars while quantizing
+        self.transport = Transport(rate)
+        self.tempo = TempoDetector(rate)
+        # Undo pages for record/overdub/clear, bounded by undo_budget bytes
+        self.history = UndoHistory(chunk, undo_budget, format)
+        # Pitch-preserving resizes, computed off the audio thread
+        self.stretcher = LoopStretcher(self._copy_loop_audio)
+        self.loop_controls = LoopControls(rate, chunk, format, initial_loop_lengths, input_channels,
+                                          allocator=loop_allocator,
+                                          length_to_samples=self.transport.loop_samples,
+                                          history=self.history)
+        # Control changes from the GUI (or another process) applied at block boundaries
+        self.commands = commands if commands is not None else CommandRing()
+        # The ring has one producer; this serializes the GUI and any remote
+        # control thread (the audio thread never takes it)
+        self._post_lock = threading.Lock()
+        self._reserved_loop_id = self.loop_controls.next_id
+        # Levels and play positions for the GUI, written once per block
+        self.meters = meters if meters is not None else MeterBank()
+        # Mixes and meters each loop in one pass; compiled (with Numba) here
+        # rather than on the first block
+        from effects import kernels
+        self._mix_meter = kernels.mix_meter
+        self._mix_meter(np.zeros(1, dtype=format), np.zeros(1, dtype=format), True)
+        # Master/effect output taps for the spectrum analyzer. A ring passed
+        # in is analyzed by whoever owns it (e.g. the GUI process).
+        self.taps = taps if taps is not None else TapRing(chunk)
+        self.spectrum = SpectrumAnalyzer(self.taps, rate) if taps is None else None
+        # Mixing runs with float headroom; only the master bus is limited to full scale
+        self.limiter = Limiter(rate, chunk, dtype=format)
+        # Scratch rows for multi-channel recording (one row per input channel)
+        self._record_block = np.zeros((input_channels, chunk), dtype=format)
+        # Input blocks handed from the input callback to the mixer, oldest
+        # first; a late callback can deliver two blocks before one mix
+        self._input_blocks = np.zeros((INPUT_QUEUE, chunk, input_channels), dtype=format)
+        self._input_head = 0  # Next block for the mixer
+        self._input_tail = 0  # Next slot for the callback
+        self._input_skew = None  # Mix blocks minus input blocks, once lined up
+        self._mixed_blocks = 0
+        # Muted/silent loops are compressed in the background (None keeps all
+        # loops dense). 'zlib' is lossless; 'int16'/'float16' are smaller but lossy.
+        self.loop_store = LoopStore(self, loop_compression) if loop_compression else None
+        self._deferred_commands = []
+
+        # Round-trip latency (samples) by which recorded input trails what was
+        # played; record writes are moved back by it. Measured by 'calibrate'.
+        self.record_latency = 0
+        self.calibrator = None
+        # Backend clock time at which the current block was mixed, and how much
+        # later it is heard; maps timestamped input (MIDI clock) to samples
+        self._block_time = 0.0
+        self.output_latency = 0.0
+        # Effect parameter automation: while `automation_loop` is set, effect
+        # parameter moves are recorded into lanes on that loop's cycle
+        self.automation_loop = None
+        self._automation_touched = {}  # Lane -> value held this pass; these don't play back
+        self._automation_blocks = {}  # (loop_id, lane) -> ramp block for ramped parameters
+        self._automation_value = np.empty(1)
+        self._ramped = set()  # (effect, parameter) holding a ramp block since the last block
 
 
         
-        # Effects
-        self.reverb = ReverbEffect(rate)
+        # Effects (instances are created lazily, see _effect)
+        self._effects = {}
+        self._preloaded = set()  # Effects whose heavy dependencies are loaded (see preload_effect)
+        self._effects_lock = threading.RLock()  # Serializes loading effects (never taken by the mixer)
         self.reverb_input_id = None  # Will be set when loops exist
         self.reverb_output_id = None
         self.reverb_bypass = True
         self.reverb_overdub = False
 
-        self.gate = GateEffect(rate)
         self.gate_input_id = None
         self.gate_output_id = None
         self.gate_bypass = True
         self.gate_overdub = False
 
-        self.pitch_shift = PitchShiftEffect(rate)
         self.pitch_input_id = None
         self.pitch_output_id = None
         self.pitch_bypass = True
         self.pitch_overdub = False
         self.pitch_feedback = 0.0  # 0.0-1.0 range, start with 0 for no feedback
 
+        self.convolution_input_id = None
+        self.convolution_output_id = None
+        self.convolution_bypass = True
+        self.convolution_overdub = False
+
+        self.filter_input_id = None
+        self.filter_output_id = None
+        self.filter_bypass = True
+        self.filter_overdub = False
+
+        self.delay_input_id = None
+        self.delay_output_id = None
+        self.delay_bypass = True
+        self.delay_overdub = False
+
+        for name in PLUGIN_EFFECTS:
+            setattr(self, f"{name}_input_id", None)
+            setattr(self, f"{name}_output_id", None)
+            setattr(self, f"{name}_bypass", True)
+            setattr(self, f"{name}_overdub", False)
+        # Preallocated output block per effect, passed to EffectPlugin.process
+        self._effect_outputs = {}
+
         if initial_loop_lengths:
             self.pitch_input_id = next(iter(self.loop_controls.loops.keys()), None)
             self.pitch_output_id = next(iter(self.loop_controls.loops.keys()), None)
@@ -71,6 +225,15 @@ class AudioLooper:
         self.is_running = True
         self.lock = threading.Lock()
 
+        # Optional worker pool for per-loop effect chains. By default a late
+        # chain may use up to half a block before its previous output is reused.
+        self.effect_pool = None
+        if effect_workers > 0:
+            if effect_deadline is None:
+                effect_deadline = 0.5 * chunk / rate
+            self.effect_pool = EffectWorkerPool(
+                self._run_effect_chain, effect_workers, chunk, format, effect_deadline)
+
         
         if initial_loop_lengths:
             first_loop = next(iter(self.loop_controls.loops.keys()), None)
@@ -80,10 +243,86 @@ class AudioLooper:
             self.reverb_output_id = first_loop
             self.gate_input_id = first_loop
             self.gate_output_id = first_loop
+            self.convolution_input_id = first_loop
+            self.convolution_output_id = first_loop
+            self.filter_input_id = first_loop
+            self.filter_output_id = first_loop
+            self.delay_input_id = first_loop
+            self.delay_output_id = first_loop
+            for name in PLUGIN_EFFECTS:
+                setattr(self, f"{name}_input_id", first_loop)
+                setattr(self, f"{name}_output_id", first_loop)
 
     def __del__(self):
         self.stop()
 
+    @property
+    def reverb(self):
+        return self._effect('reverb')
+
+    @property
+    def gate(self):
+        return self._effect('gate')
+
+    @property
+    def pitch_shift(self):
+        return self._effect('pitch_shift')
+
+    @property
+    def convolution(self):
+        return self._effect('convolution')
+
+    @property
+    def filter(self):
+        return self._effect('filter')
+
+    @property
+    def delay(self):
+        return self._effect('delay')
+
+    def _effect(self, name):
+        """Effect instance, imported and built on first use.
+
+        The audio thread reads `_effects` and `_effect_outputs` without a
+        lock, so a new effect goes into fresh copies of both, swapped in
+        output first; builders are serialized by `_effects_lock`.
+        """
+        effect = self._effects.get(name)
+        if effect is not None:
+            return effect
+        with self._effects_lock:
+            effect = self._effects.get(name)
+            if effect is None:
+                effect = effect_class(name)(self.rate)
+                effect.prepare(self.rate, self.chunk)
+                if hasattr(effect, 'transport'):
+                    effect.transport = self.transport  # Tempo-synced effects follow the transport
+                self._effect_outputs = {**self._effect_outputs,
+                                        name: np.zeros(self.chunk, dtype=self.format)}
+                self._effects = {**self._effects, name: effect}
+        return effect
+
+    def effect_setting(self, name, attr):
+        """An effect's current setting, or its default while it isn't loaded"""
+        effect = self._effects.get(name)
+        if effect is not None:
+            return getattr(effect, attr)
+        return effect_defaults(name)[attr]
+
+    def preload_effect(self, name):
+        """Load an effect and its heavy dependencies before the audio thread needs them"""
+        with self._effects_lock:
+            effect = self._effect(name)
+            if name in self._preloaded:
+                return
+            if not self._preloaded:
+                # The effects' compiled kernels, so none compiles on an audio block
+                from effects import kernels
+                kernels.warmup(self.format)
+            self._preloaded.add(name)
+            if hasattr(effect, 'preload'):
+                effect.preload()
+
     def start_recording_session(self):
         """Start recording the full mix to session"""
         self.recording_session.start()
@@ -99,12 +338,23 @@ class AudioLooper:
         else:
             print("No active session to stop")
 
+    def load_impulse_response(self, filename):
+        """Load an IR WAV into the convolution effect.
+
+        The partitions are prepared on the calling thread and swapped in
+        whole, so the audio thread only ever sees a complete IR.
+        """
+        self.convolution.load(filename, self.chunk)
+        return self.convolution.seconds
+
     def save_recording(self, filename):
         """Save the session recording to file"""
         try:
             if not self.recording_session.is_active and len(self.recording_session.recorded_data) > 0:
                 self.recording_session.save(filename)
                 print(f"Session saved to {filename}")
+                # Automation goes alongside, e.g. take.wav -> take.automation.npz
+                self.save_automation(os.path.splitext(filename)[0] + '.automation.npz')
                 return True
             else:
                 print("No recording data to save")
@@ -115,35 +365,25 @@ class AudioLooper:
 
     def start(self):
         try:
-            # Reset PortAudio to clean state
-            sd._terminate()
-            sd._initialize()
-            
-            # Configure with higher latency for stability
-            self.output_stream = sd.OutputStream(
-                device=self.output_device,
-                samplerate=self.rate,
-                channels=1,
-                dtype=self.format,
-                blocksize=self.chunk,
-                latency='high'
-            )
+            self.output_stream = self.backend.open_output(
+                self.output_device, self.rate, 1, self.format, self.chunk)
             self.output_stream.start()
+            self.output_latency = getattr(self.output_stream, 'latency', 0.0)
 
-            self.input_stream = sd.InputStream(
-                device=self.input_device,
-                samplerate=self.rate,
-                channels=1,
-                dtype=self.format,
-                blocksize=self.chunk,
-                latency='high',
-                callback=self.callback
-            )
+            self.input_stream = self.backend.open_input(
+                self.input_device, self.rate, self.input_channels, self.format, self.chunk,
+                self.callback)
             self.input_stream.start()
 
             self.playback_thread = threading.Thread(target=self.playback, daemon=True)
             self.playback_thread.start()
 
+            if self.spectrum is not None:
+                self.spectrum.start()
+
+            if self.loop_store is not None:
+                self.loop_store.start()
+
         except Exception as e:
             print(f"Audio initialization error: {e}")
             self.stop()
@@ -155,6 +395,15 @@ class AudioLooper:
         # Stop playback thread first
         if hasattr(self, 'playback_thread'):
             self.playback_thread.join(timeout=0.5)
+
+        if getattr(self, 'effect_pool', None) is not None:
+            self.effect_pool.shutdown()
+
+        if getattr(self, 'spectrum', None) is not None:
+            self.spectrum.stop()
+
+        if getattr(self, 'loop_store', None) is not None:
+            self.loop_store.stop()
         
         # Stop and close streams in correct order
         if hasattr(self, 'input_stream'):
@@ -172,22 +421,6 @@ class AudioLooper:
                 del self.output_stream
             except Exception as e:
                 print(f"Error closing output stream: {e}")
-        
-        # Add slight delay to ensure resources are released
-        import time
-        time.sleep(0.1)
-        
-        # Force PortAudio cleanup
-        try:
-            sd._terminate()
-        except:
-            pass
-        
-        # Reinitialize for future use
-        try:
-            sd._initialize()
-        except:
-            pass
 
     def playback(self):
         while self.is_running:
@@ -207,155 +440,681 @@ class AudioLooper:
     def callback(self, indata, frames, time, status):
         if status:
             print(f"Input stream status: {status}")
+        # Only hand the block over; the mixer writes it into loops on the
+        # transport clock, so scheduled record toggles land on the right sample
         with self.lock:
-            current_loop_id = self.loop_controls.current_loop_id
-            if (self.loop_controls.is_recording and 
-                current_loop_id is not None and
-                current_loop_id in self.loop_controls.loops):
-                
-                current_pos = self.loop_controls.loop_positions[current_loop_id]
-                loop_size = self.loop_controls.loop_sizes[current_loop_id]
-                
-                if current_pos < loop_size:
-                    if self.loop_controls.is_overdubbing:
-                        self.loop_controls.loops[current_loop_id][current_pos] = np.clip(
-                            self.loop_controls.loops[current_loop_id][current_pos] + indata[:, 0],
-                            -1.0, 1.0
-                        )
-                    else:
-                        self.loop_controls.loops[current_loop_id][current_pos] = indata[:, 0]
+            if status:
+                self._input_skew = None  # Blocks may have been lost; line up again
+            tail = self._input_tail
+            if tail - self._input_head == len(self._input_blocks):
+                self._input_head += 1  # The mixer is a whole queue behind; drop the oldest
+            self._input_blocks[tail % len(self._input_blocks), :frames] = indata[:frames]
+            self._input_tail = tail + 1
+
+    def _take_input(self):
+        """[(age, block)] for the input handed over since the last mix, oldest first.
+
+        Input blocks are numbered as they arrive and lined up with the mix
+        blocks when the first one is taken; `age` is how many blocks late
+        a block came in since then (0 for the block that belongs to this
+        one), so a callback that jitters past a block boundary doesn't move
+        its audio.
+        """
+        head, tail = self._input_head, self._input_tail
+        self._input_head = tail
+        self._mixed_blocks += 1
+        if head == tail:
+            return []
+        if self._input_skew is None:
+            self._input_skew = self._mixed_blocks - tail
+        due = self._mixed_blocks - self._input_skew
+        return [(due - 1 - index, self._input_blocks[index % len(self._input_blocks)])
+                for index in range(head, tail)]
+
+    def _record_segments(self, events):
+        """Apply this block's scheduled commands at their offsets.
+
+        Returns [(start, end, loop_id, overdub)] for the parts of the block
+        during which input is being recorded.
+        """
+        controls = self.loop_controls
+        segments = []
+        start = 0
+        for offset, name, target, value in events + [(self.chunk, None, -1, 0.0)]:
+            if offset > start and controls.is_recording and controls.current_loop_id in controls.loops:
+                segments.append((start, offset, controls.current_loop_id, controls.is_overdubbing))
+            if name is not None:
+                try:
+                    self._apply_command(name, target, value)
+                except Exception as e:
+                    print(f"Error applying command {name}: {e}")
+            start = offset
+        return segments
+
+    def _track_take(self, segments):
+        """A recording pass (record or overdub) is one undoable take"""
+        current = self.history.current
+        if segments and current is None:
+            self.history.begin('record')
+        elif not segments and current is not None and current.label == 'record':
+            self.history.end()
+
+    def _write_input(self, segments, inputs):
+        """Write the input blocks taken this block into the loops being recorded.
+
+        Input arrives `record_latency` samples after the playback it was
+        played against, so it is written that far behind the play position,
+        and a block further back for each block it came in late.
+        """
+        arms = self.loop_controls.input_arms
+        channels = np.flatnonzero(arms >= 0)
+        for age, block in inputs:
+            lag = self.record_latency + age * self.chunk
+            for start, end, loop_id, overdub in segments:
+                indata = block[start:end]
+                if channels.size:
+                    self._record_armed_inputs(indata, channels, arms[channels], start - lag, overdub)
+                else:
+                    self.loop_controls.write_block(
+                        loop_id, self.loop_controls.loop_offsets[loop_id] + start - lag,
+                        indata[:, 0], overdub)
+
+    def start_calibration(self):
+        """Measure the round-trip latency with a test chirp over the next second or two"""
+        self.calibrator = LatencyCalibrator(self.rate, self.chunk)
+        print("Latency calibration: playing test chirp")
+
+    def _finish_calibration(self, calibrator):
+        self.calibrator = None
+        if calibrator.latency is None:
+            print(f"Latency calibration failed: chirp not found in the input "
+                  f"(confidence {calibrator.confidence:.2f}); keeping {self.record_latency} samples")
+            return
+        self.record_latency = calibrator.latency
+        print(f"Round-trip latency: {calibrator.latency} samples "
+              f"({1000 * calibrator.latency / self.rate:.1f} ms)")
+
+    def latency_status(self):
+        """(record latency in samples, True while calibrating)"""
+        return self.record_latency, self.calibrator is not None
+
+    def _record_armed_inputs(self, indata, channels, loop_ids, start=0, overdub=False):
+        """Write every armed input channel into its loop at the block offset `start`"""
+        controls = self.loop_controls
+        targets = [(row, int(lid)) for row, lid in enumerate(loop_ids) if int(lid) in controls.loops]
+        if not targets:
+            return
+
+        block = self._record_block[:len(channels), :len(indata)]
+        if overdub:
+            # Gather current audio, then one add and one clip over all armed channels
+            for row, lid in targets:
+                controls.read_block(lid, controls.loop_offsets[lid] + start, block[row])
+            np.add(block, indata[:, channels].T, out=block)
+            soft_clip(block)
+        else:
+            block[:] = indata[:, channels].T
+
+        for row, lid in targets:
+            controls.write_block(lid, controls.loop_offsets[lid] + start, block[row])
 
 
     def mix_loops(self):
         output = np.zeros(self.chunk, dtype=self.format)
+        controls = self.loop_controls
         
         with self.lock:
-            # Process live input (if recording)
-            if self.loop_controls.is_recording and self.loop_controls.current_loop_id is not None:
-                current_loop_id = self.loop_controls.current_loop_id
-                pos = self.loop_controls.loop_positions[current_loop_id]
-                audio_data = self.loop_controls.loops[current_loop_id][pos].copy()
+            if self.loop_store is not None:
+                self._install_stored_loops()
+            self._block_time = self.backend.clock()
+            self._drain_commands()
+            for loop_id, audio in self.stretcher.take_finished():
+                if loop_id in controls.loops:
+                    controls.install_loop(loop_id, audio)
+            if controls.automation or self._ramped:
+                self._play_automation()
+            self.meters.begin()
+
+            # Scheduled record/overdub changes split the block at their offsets
+            segments = self._record_segments(self.transport.take_block(self.chunk))
+            self._track_take(segments)
+            inputs = self._take_input()
+            calibrator = self.calibrator
+            if calibrator is not None and calibrator.measured:
+                # Analyzed off the audio thread since the chirp's last block
+                self._finish_calibration(calibrator)
+            if calibrator is None or calibrator.done:
+                calibrator = None
+            else:
+                # The test chirp replaces the mix; input is measured, not recorded
+                chirp_block = calibrator.process([(age, block[:, 0]) for age, block in inputs],
+                                                 np.empty(self.chunk, dtype=self.format))
+                segments = []
+            if calibrator is None and inputs:
+                self._write_input(segments, inputs)
+
+            # Process loops being recorded: run effects on the block and write
+            # the result back over the recorded parts
+            recorded = {}
+            if not (controls.input_arms >= 0).any():
+                # With channels armed, input went to their loops and the
+                # selected loop just plays
+                for start, end, loop_id, overdub in segments:
+                    recorded.setdefault(loop_id, []).append((start, end, overdub))
+            for loop_id, parts in recorded.items():
+                offset = controls.loop_offsets[loop_id]
+                audio_data = controls.read_block(loop_id, offset, np.empty(self.chunk, dtype=self.format))
                 
-                processed = self.process_effects(current_loop_id, audio_data)
-                output += processed
-
-                # Update loop buffer
-                if self.loop_controls.is_overdubbing:
-                    self.loop_controls.loops[current_loop_id][pos] = np.clip(
-                        self.loop_controls.loops[current_loop_id][pos] + processed,
-                        -1.0, 1.0
-                    )
+                chain = list(self._active_effects(loop_id))
+                if self.effect_pool is not None and self.effect_pool.is_busy(loop_id, chain):
+                    processed = audio_data  # A late worker still runs these effects; stay dry
                 else:
-                    self.loop_controls.loops[current_loop_id][pos] = processed
+                    processed = self.process_effects(loop_id, audio_data, chain)
+                self._meter_loop(loop_id, processed, offset, output)
+
+                # Update loop buffer (clipped if an effect changed the audio)
+                for start, end, overdub in parts:
+                    controls.write_block(loop_id, offset + start, processed[start:end], overdub,
+                                         clip=processed is not audio_data)
                 
-                self.loop_controls.loop_positions[current_loop_id] = (pos + 1) % self.loop_controls.loop_sizes[current_loop_id]
+                # Loops being recorded run at rate 1 so input lands where it was played
+                controls.advance(loop_id, self.chunk, rate=1.0)
             
             # Process all other loops
-            for loop_id in self.loop_controls.loops:
-                if self.loop_controls.is_recording and loop_id == self.loop_controls.current_loop_id:
+            pending = []
+            for loop_id in controls.loops:
+                if loop_id in recorded:
                     continue
                     
-                pos = self.loop_controls.loop_positions[loop_id]
-                audio_data = self.loop_controls.loops[loop_id][pos].copy()
+                offset = controls.loop_offsets[loop_id]
                 
                 # Skip muted/soloed loops
-                if ((self.loop_controls.muted_loops.get(loop_id, False) and 
-                    not any(self.loop_controls.soloed_loops.values())) or
-                    (any(self.loop_controls.soloed_loops.values()) and 
-                    not self.loop_controls.soloed_loops.get(loop_id, False))):
+                if ((controls.muted_loops.get(loop_id, False) and 
+                    not any(controls.soloed_loops.values())) or
+                    (any(controls.soloed_loops.values()) and 
+                    not controls.soloed_loops.get(loop_id, False))):
+                    self._meter_loop(loop_id, None, offset)
+                    controls.advance(loop_id, self.chunk)  # Stay on the clock while muted
+                    continue
+
+                audio_data = controls.play_block(loop_id, np.empty(self.chunk, dtype=self.format))
+
+                # Loops with effect chains go to the worker pool when enabled
+                chain = list(self._active_effects(loop_id))
+                if self.effect_pool is not None and chain:
+                    pending.append((loop_id, audio_data, chain, self._pitch_feedback_block(loop_id, chain)))
                     continue
                 
-                processed = self.process_effects(loop_id, audio_data)
-                
-                if not self._is_effect_input_routed(loop_id):
-                    output += processed
+                processed = self.process_effects(loop_id, audio_data, chain)
+                self._meter_loop(loop_id, processed, offset,
+                                 None if self._is_effect_input_routed(loop_id) else output)
                 
-                self.loop_controls.loop_positions[loop_id] = (pos + 1) % self.loop_controls.loop_sizes[loop_id]
+                controls.advance(loop_id, self.chunk)
+
+            if pending:
+                # Barrier: all chains are done (or reused) before summation
+                for loop_id, processed, routes, taps in self.effect_pool.run(pending):
+                    for tap, block in taps:
+                        self.taps.write(tap, block)
+                    self._apply_routes(routes)
+                    self._meter_loop(loop_id, processed, controls.loop_offsets[loop_id],
+                                     None if self._is_effect_input_routed(loop_id) else output)
+                    controls.advance(loop_id, self.chunk)
             
+            if calibrator is not None:
+                output[:] = chirp_block
+
+            # The master meter shows the mix before limiting, so overs stay visible
+            peak, sum_squares = self._mix_meter(output, output, False)
+            self.meters.end(peak, sum_squares, self.chunk)
+            self.limiter.process(output, peak)
+
             # Record the final mixed output (ONCE per buffer)
             if self.is_session_recording:
                 self.recording_session.add_data(output.copy())
+            self.taps.write('master', output)
         
-        return np.clip(output, -1.0, 1.0)
+        return output
 
-    def process_effects(self, loop_id, audio_data):
-        """Process audio through all active effects"""
-        processed = audio_data.copy()
-        
-        # Gate first
-        if not self.gate_bypass and loop_id == self.gate_input_id:
-            processed = self.gate.apply(processed)
-        
-        # Then pitch shift
-        if not self.pitch_bypass and loop_id == self.pitch_input_id:
-            processed = self.pitch_shift.apply(processed)
-            
-            # Handle feedback if routing to same loop
-            if (self.pitch_output_id == loop_id and 
-                hasattr(self, 'pitch_feedback') and 
-                self.pitch_feedback > 0):
-                
-                # Get previous buffer content
-                prev_audio = self.loop_controls.loops[loop_id][
-                    (self.loop_controls.loop_positions[loop_id] - 1) % 
-                    self.loop_controls.loop_sizes[loop_id]
-                ]
-                
-                # Mix with feedback
-                processed = np.clip(
-                    processed + (prev_audio * self.pitch_feedback),
-                    -1.0, 1.0
-                )
-        
-        # Then reverb
-        if not self.reverb_bypass and loop_id == self.reverb_input_id:
-            processed = self.reverb.apply(processed)
-        
-        return processed
+    def _meter_loop(self, loop_id, block, offset, output=None):
+        """Publish a loop's level from the block just mixed (None when silent/muted).
 
-    def route_effect_outputs(self, loop_id, processed_audio):
-        """Route processed audio to effect output loops based on settings"""
-        # Handle pitch shift routing
-        if (not self.pitch_bypass and 
-            loop_id == self.pitch_input_id and 
-            self.pitch_output_id in self.loop_controls.loops):
-            
-            out_pos = self.loop_controls.loop_positions[self.pitch_output_id]
-            if self.pitch_overdub:
-                self.loop_controls.loops[self.pitch_output_id][out_pos] = np.clip(
-                    self.loop_controls.loops[self.pitch_output_id][out_pos] + processed_audio,
-                    -1.0, 1.0
-                )
-            else:
-                self.loop_controls.loops[self.pitch_output_id][out_pos] = processed_audio
-        
-        # Handle reverb routing
-        if (not self.reverb_bypass and 
-            loop_id == self.reverb_input_id and 
-            self.reverb_output_id in self.loop_controls.loops):
-            
-            out_pos = self.loop_controls.loop_positions[self.reverb_output_id]
-            if self.reverb_overdub:
-                self.loop_controls.loops[self.reverb_output_id][out_pos] = np.clip(
-                    self.loop_controls.loops[self.reverb_output_id][out_pos] + processed_audio,
-                    -1.0, 1.0
-                )
-            else:
-                self.loop_controls.loops[self.reverb_output_id][out_pos] = processed_audio
-        
-        # Handle gate routing
-        if (not self.gate_bypass and 
-            loop_id == self.gate_input_id and 
-            self.gate_output_id in self.loop_controls.loops):
-            
-            out_pos = self.loop_controls.loop_positions[self.gate_output_id]
-            if self.gate_overdub:
-                self.loop_controls.loops[self.gate_output_id][out_pos] = np.clip(
-                    self.loop_controls.loops[self.gate_output_id][out_pos] + processed_audio,
-                    -1.0, 1.0
-                )
-            else:
-                self.loop_controls.loops[self.gate_output_id][out_pos] = processed_audio
+        With `output`, the block is also summed into it in the same pass.
+        """
+        position = offset / self.loop_controls.loop_lengths[loop_id]
+        if block is None:
+            self.meters.set_loop(loop_id, 0.0, 0.0, self.chunk, position)
+        else:
+            peak, sum_squares = self._mix_meter(block, block if output is None else output,
+                                                output is not None)
+            self.meters.set_loop(loop_id, peak, sum_squares, self.chunk, position)
+
+    def read_meters(self):
+        """Latest (master, {loop_id: (peak, rms, position)}) without locking, or None"""
+        return self.meters.snapshot()
+
+    def detect_tempo(self, loop_id):
+        """Estimate a loop's tempo in the background once recording has stopped.
+
+        The result appears in self.tempo.result as (loop_id, bpm, phase).
+        """
+        controls = self.loop_controls
+        return self.tempo.start(loop_id, lambda: self._copy_loop_audio(loop_id),
+                                ready=lambda: not controls.is_recording)
+
+    def _copy_loop_audio(self, loop_id):
+        with self.lock:
+            controls = self.loop_controls
+            if loop_id not in controls.loops:
+                return None
+            length = controls.loop_lengths[loop_id]
+            compressed = controls.compressed.get(loop_id)
+            if compressed is None:
+                return controls.loops[loop_id].reshape(-1)[:length].copy()
+        # Decompress a private copy without holding up the mixer
+        return compressed.decompress_into(np.zeros(compressed.shape, dtype=self.format)).reshape(-1)[:length]
+
+    def stretch_progress(self):
+        """{loop_id: fraction done} for loops being time-stretched"""
+        return dict(self.stretcher.progress)
+
+    def memory_stats(self):
+        """(bytes held by loop audio, bytes saved by compressing idle loops)"""
+        return self.loop_controls.memory_stats()
+
+    def loops_in_use(self):
+        """Loops that input, effects, selection or a stretch may touch; these stay dense"""
+        controls = self.loop_controls
+        busy = {controls.current_loop_id}
+        busy.update(int(loop_id) for loop_id in controls.input_arms if loop_id >= 0)
+        for prefix in EFFECT_PREFIXES.values():
+            busy.add(getattr(self, f"{prefix}_input_id"))
+            busy.add(getattr(self, f"{prefix}_output_id"))
+        busy.update(loop_id for loop_id, soloed in controls.soloed_loops.items() if soloed)
+        busy.update(self.stretcher.progress)
+        return busy
+
+    def _install_stored_loops(self):
+        """Swap in loops the store has compressed or expanded since the last block"""
+        controls = self.loop_controls
+        store = self.loop_store
+        busy = None
+        while store.compressed_ready:
+            loop_id, version, compressed = store.compressed_ready.popleft()
+            if busy is None:
+                busy = self.loops_in_use()
+            # Drop it if the loop changed or came back into use while it was compressed
+            if (controls.versions.get(loop_id) == version and loop_id not in busy
+                    and loop_id not in controls.compressed
+                    and (controls.muted_loops[loop_id] or compressed.is_silent)):
+                controls.compress(loop_id, compressed)
+        while store.expanded_ready:
+            loop_id, dense = store.expanded_ready.popleft()
+            if loop_id in controls.compressed:
+                controls.expand(loop_id, dense)
+            store.installed(loop_id)
+
+    def read_spectrum(self, tap='master'):
+        """Latest smoothed band levels (dB) for a tap in components.spectrum.TAPS, or None"""
+        return self.spectrum.read(tap)
+
+    def post_command(self, name, target=-1, value=0.0):
+        """Queue a control change for the audio thread.
+
+        Commands are applied at the start of the next block, so callers never
+        wait on the looper lock. Returns the target, which for 'add_loop' is
+        the id reserved for the new loop.
+        """
+        with self._post_lock:
+            if name == 'add_loop' and target < 0:
+                target = self._reserve_loop_id()
+            if name.split('.', 1)[0] in EFFECT_PREFIXES:
+                # First use: import/compile here rather than on the audio thread
+                self.preload_effect(name.split('.', 1)[0])
+            if not self.commands.push(name, target, value):
+                print(f"Command queue full, dropped {name}")
+        return target
+
+    def _reserve_loop_id(self):
+        loop_id = max(self._reserved_loop_id, self.loop_controls.next_id)
+        self._reserved_loop_id = loop_id + 1
+        return loop_id
+
+    def _drain_commands(self):
+        commands = self.commands.pop_all()
+        if self._deferred_commands:
+            commands = self._deferred_commands + commands
+            self._deferred_commands = []
+        barrier = False  # An undo/redo is waiting; it may touch any loop, so all else waits too
+        held = set()  # Loops and effects with a command waiting; later ones on them wait behind it
+        for name, target, value in commands:
+            keys = self._command_keys(name, target)
+            if barrier or not held.isdisjoint(keys) or self._must_wait(name, target, value):
+                barrier = barrier or name in ('undo', 'redo')
+                held.update(keys)
+                self._deferred_commands.append((name, target, value))
+                continue
+            if name in RECORD_COMMANDS and self.transport.quantize != 'off':
+                # Lands on the exact sample of the next beat/bar
+                self.transport.schedule(self.transport.next_boundary(), name, target, value)
+                continue
+            try:
+                self._apply_command(name, target, value)
+            except Exception as e:
+                print(f"Error applying command {name}: {e}")
+
+    def _command_keys(self, name, target):
+        """The loops and effect a command acts on; None stands for the selected loop"""
+        effect, _, param = name.partition('.')
+        if effect in EFFECT_PREFIXES:
+            return (effect, target) if param in ('input', 'output') else (effect,)
+        if name in RECORD_COMMANDS:
+            return (None,)
+        if name == 'select':
+            return (target, None)
+        return (target,) if target >= 0 else ()
+
+    def _must_wait(self, name, target, value):
+        """True for a command that can't be applied this block.
+
+        Commands wait for the compressed loops they touch to be expanded
+        off the audio thread, and for an effect that isn't loaded yet (the
+        poster loads it) or that a late worker is still running.
+        """
+        effect, _, param = name.partition('.')
+        if effect in EFFECT_PREFIXES:
+            if effect not in self._effects or self._effect_busy(effect):
+                return True
+            if param not in ('input', 'output'):
+                return False  # The target is a parameter index, not a loop
+        return self._needs_expanding(name, target, value)
+
+    def _effect_busy(self, name):
+        return self.effect_pool is not None and self.effect_pool.effect_busy(name)
+
+    def _needs_expanding(self, name, target, value):
+        """Request expansion of the compressed loops a command touches; True if there are any"""
+        compressed = self.loop_controls.compressed
+        if not compressed or name == 'delete_loop' or (name == 'mute' and value):
+            return False
+        if name in ('undo', 'redo'):
+            loop_ids = list(compressed)  # Any of them may have rows in the take
+        elif target in compressed:
+            loop_ids = [target]
+        else:
+            return False
+        for loop_id in loop_ids:
+            self.loop_store.request_expand(loop_id)
+        return True
+
+    def _apply_command(self, name, target, value):
+        """Apply one control command to the engine state"""
+        controls = self.loop_controls
+        if name == 'record':
+            controls.is_recording = bool(value)
+        elif name == 'overdub':
+            controls.is_overdubbing = bool(value)
+        elif name == 'record.toggle':
+            # Resolved here, when it lands, so toggles from any controller agree
+            controls.is_recording = not controls.is_recording
+        elif name == 'overdub.toggle':
+            controls.is_overdubbing = not controls.is_overdubbing
+        elif name == 'select':
+            if target in controls.loops:
+                controls.current_loop_id = target
+        elif name == 'mute':
+            if target in controls.muted_loops:
+                controls.muted_loops[target] = bool(value)
+        elif name == 'solo':
+            if target in controls.soloed_loops:
+                if value:
+                    # Only one loop can be soloed at a time
+                    for lid in controls.soloed_loops:
+                        controls.soloed_loops[lid] = False
+                controls.soloed_loops[target] = bool(value)
+        elif name == 'clear':
+            self.history.begin('clear')
+            controls.clear_loop(target)
+            self.history.end()
+        elif name in ('undo', 'redo'):
+            if getattr(self.history, name)(controls.loops, controls.overviews):
+                for loop_id in controls.versions:
+                    controls.versions[loop_id] += 1
+        elif name == 'loop_length':
+            controls.update_loop_length(target, value)
+            self._align_to_bar(target)
+        elif name == 'add_loop':
+            controls._add_loop(value, target)
+            self._align_to_bar(target)
+        elif name == 'delete_loop':
+            if target in controls.loops and len(controls.loops) > 1:
+                controls.delete_loop(target)
+                if self.automation_loop == target:
+                    self._arm_automation(None)
+        elif name == 'loop_stretch':
+            # Same as loop_length, but the audio is time-stretched in the background
+            if target in controls.loops:
+                self.stretcher.request(target, controls.samples_for_length(value))
+        elif name == 'loop_rate':
+            controls.set_rate(target, value)
+        elif name == 'granular':
+            controls.set_granular(target, bool(value))
+        elif name.startswith('granular.'):
+            voice = controls.granular.get(target)
+            if voice is not None:
+                setattr(voice, name.split('.', 1)[1], value)
+        elif name == 'arm_input':
+            armed = controls.armed_channel(target)
+            if armed is not None:
+                controls.disarm_input(armed)
+            if value >= 0:
+                controls.arm_input(int(value), target)
+        elif name == 'calibrate':
+            self.start_calibration()
+        elif name == 'record_latency':
+            self.record_latency = max(0, int(value))
+        elif name == 'clock.tempo':
+            self.transport.sync(bpm=value)
+        elif name == 'clock.downbeat':
+            self.transport.sync(downbeat=self._clock_sample(value))
+        elif name == 'automation.record':
+            self._arm_automation(target if value else None)
+        elif name == 'automation.clear':
+            controls.automation.pop(target, None)
+            if target == self.automation_loop:
+                self._automation_touched.clear()
+        elif name == 'session.start':
+            self.start_recording_session()
+        elif name == 'session.stop':
+            self.stop_recording_session()
+        elif name == 'transport.quantize':
+            self.transport.quantize = QUANTIZE_MODES[int(value)]
+        elif name == 'transport.align':
+            if target in controls.loops:
+                self.transport.align(controls.loop_offsets[target], controls.loop_lengths[target],
+                                     int(value))
+        elif name.startswith('transport.'):
+            setattr(self.transport, name.split('.', 1)[1], value)
+        else:
+            if self.automation_loop is not None:
+                self._record_automation(name, target, value)
+            self._apply_effect_command(name, target, value)
+
+    def _clock_sample(self, timestamp):
+        """Transport sample heard at backend clock time `timestamp`"""
+        heard = self._block_time + self.output_latency
+        return self.transport.position + int(round((timestamp - heard) * self.rate))
+
+    def _align_to_bar(self, loop_id):
+        """Start a bar-length loop in phase with the transport's bar grid"""
+        if self.transport.quantize != 'off' and loop_id in self.loop_controls.loops:
+            length = self.loop_controls.loop_lengths[loop_id]
+            self.loop_controls.set_offset(loop_id, self.transport.phase(length))
+
+    def _apply_effect_command(self, name, target, value):
+        effect, param = name.split('.', 1)
+        prefix = EFFECT_PREFIXES[effect]
+        if param in ('bypass', 'overdub'):
+            if param == 'bypass' and not value and getattr(self, f"{prefix}_bypass"):
+                # Switched back in: don't replay the tail left from when it was last used
+                self._effect(effect).reset()
+            setattr(self, f"{prefix}_{param}", bool(value))
+        elif param in ('input', 'output'):
+            setattr(self, f"{prefix}_{param}_id", target)
+        elif name == 'pitch_shift.feedback':
+            self.pitch_feedback = value
+        elif name == 'pitch_shift.quality':
+            self.pitch_shift.set_quality(PITCH_QUALITIES[int(value)])
+        elif name == 'filter.kind':
+            self.filter.kind = FILTER_KINDS[int(value)]
+        elif name == 'pitch_shift.semitones':
+            self.pitch_shift.semitones = int(value)
+        elif param == 'param':
+            plugin = self._effect(effect)
+            if 0 <= target < len(plugin.parameters):
+                parameter = plugin.parameters[target]
+                setattr(plugin, parameter.name, parameter.clamp(value))
+        else:
+            plugin = self._effect(effect)
+            for parameter in plugin.parameters:
+                if parameter.name == param:
+                    value = parameter.clamp(value)
+                    break
+            setattr(plugin, param, value)
+
+    def _arm_automation(self, loop_id):
+        """Record effect parameter moves against a loop's cycle (None stops recording)"""
+        for lane in self.loop_controls.automation.get(self.automation_loop, {}).values():
+            lane.end_pass()
+        self._automation_touched.clear()
+        self.automation_loop = loop_id if loop_id in self.loop_controls.loops else None
+
+    def _record_automation(self, name, target, value):
+        """Latch an effect parameter change into the armed loop's lane for it.
+
+        From its first change in a pass, the lane is written every block
+        (see _play_automation), so held values stay held. A new lane starts
+        with the value the parameter had before.
+        """
+        controls = self.loop_controls
+        loop_id = self.automation_loop
+        if loop_id not in controls.loops:
+            self.automation_loop = None
+            return
+        effect_name, param = name.split('.', 1)
+        effect = self._effect(effect_name)
+        if param == 'param':
+            if not 0 <= target < len(effect.parameters):
+                return
+            value = effect.parameters[target].clamp(value)
+            param = effect.parameters[target].name
+        elif not any(parameter.name == param for parameter in effect.parameters):
+            return  # Routing, bypass and choices aren't automated
+        lanes = controls.automation.setdefault(loop_id, {})
+        lane_name = f"{effect_name}.{param}"
+        if lane_name not in lanes:
+            lane = lanes[lane_name] = AutomationLane(controls.loop_lengths[loop_id])
+            previous = getattr(effect, param)
+            previous = float(previous[-1] if isinstance(previous, np.ndarray) else previous)
+            position = int(controls.loop_offsets[loop_id])
+            reverse = controls.loop_rates[loop_id] < 0
+            # Held up to the sample before the knob moved, in the direction of play
+            for time in (0, position + 1 if reverse else max(0, position - 1)):
+                lane.write(time, previous, reverse)
+        self._automation_touched[lane_name] = value
+
+    def _play_automation(self):
+        """Set automated effect parameters for this block from each loop's lanes.
+
+        Ramped parameters get one value per sample of the block; others are
+        set to the value at the block start when it differs.
+        """
+        controls = self.loop_controls
+        if self._automation_touched:
+            loop_id = self.automation_loop
+            lanes = controls.automation[loop_id]
+            position = controls.loop_offsets[loop_id]
+            reverse = controls.loop_rates[loop_id] < 0
+            for lane_name, value in self._automation_touched.items():
+                lane = lanes[lane_name]
+                lane.write(position * lane.length / controls.loop_lengths[loop_id], value, reverse)
+        ramped = set()
+        for loop_id, lanes in controls.automation.items():
+            offset = controls.loop_offsets[loop_id]
+            rate = controls.loop_rates[loop_id]
+            length = controls.loop_lengths[loop_id]
+            for lane_name, lane in lanes.items():
+                if loop_id == self.automation_loop and lane_name in self._automation_touched:
+                    continue  # The knob being recorded wins until the pass ends
+                effect_name, param = lane_name.split('.', 1)
+                effect = self._effects.get(effect_name)
+                if effect is None or self._effect_busy(effect_name):
+                    continue  # Not loaded yet, or held by a late worker; a later block catches up
+                if any(parameter.ramped and parameter.name == param for parameter in effect.parameters):
+                    block = self._automation_blocks.get((loop_id, lane_name))
+                    if block is None:
+                        block = self._automation_blocks[(loop_id, lane_name)] = np.empty(
+                            self.chunk, dtype=self.format)
+                    setattr(effect, param, lane.ramp(offset, rate, block, length))
+                    ramped.add((effect_name, param))
+                else:
+                    value = float(lane.ramp(offset, rate, self._automation_value, length)[0])
+                    if getattr(effect, param) != value:
+                        self._apply_effect_command(lane_name, -1, value)
+        for effect_name, param in self._ramped - ramped:
+            if self._effect_busy(effect_name):
+                ramped.add((effect_name, param))  # Still ramping on the late worker
+                continue
+            # No longer automated: hold the last value
+            effect = self._effects[effect_name]
+            value = getattr(effect, param)
+            if isinstance(value, np.ndarray):
+                setattr(effect, param, float(value[-1]))
+        self._ramped = ramped
+
+    def save_automation(self, filename):
+        """Write every loop's automation lanes to an .npz file; False if there are none"""
+        arrays = {}
+        with self.lock:
+            for loop_id, lanes in self.loop_controls.automation.items():
+                for lane_name, lane in lanes.items():
+                    arrays[f"{loop_id}:{lane_name}:times"] = lane.times
+                    arrays[f"{loop_id}:{lane_name}:values"] = lane.values
+                    arrays[f"{loop_id}:{lane_name}:length"] = np.array(lane.length)
+        if not arrays:
+            return False
+        np.savez_compressed(filename, **arrays)
+        print(f"Automation saved to {filename}")
+        return True
+
+    def load_automation(self, filename):
+        """Replace the lanes of the loops in an .npz written by save_automation"""
+        loaded = {}
+        with np.load(filename) as data:
+            for key in data.files:
+                loop_id, lane_name, field = key.split(':')
+                loaded.setdefault(int(loop_id), {}).setdefault(lane_name, {})[field] = data[key]
+        for name in {lane_name.split('.', 1)[0] for lanes in loaded.values() for lane_name in lanes}:
+            if name in EFFECT_PREFIXES:
+                self.preload_effect(name)
+        with self.lock:
+            automation = self.loop_controls.automation
+            for loop_id, lanes in loaded.items():
+                if loop_id not in self.loop_controls.loops:
+                    print(f"Automation for loop {loop_id} skipped: no such loop")
+                    continue
+                automation[loop_id] = {name: AutomationLane(int(f['length']), f['times'], f['values'])
+                                       for name, f in lanes.items() if len(f['times'])}
+        return sorted(loaded)
+
+    def loop_overview(self, loop_id):
+        """Peak overview of a loop, brought up to date with rows written since the last call"""
+        overview = self.loop_controls.overviews.get(loop_id)
+        loop = self.loop_controls.loops.get(loop_id)
+        if overview is None or loop is None or len(loop) != overview.rows:
+            return None
+        overview.refresh(loop)
+        return overview
 
     def update_loop_length(self, loop_id, length):
         with self.lock:
@@ -388,45 +1147,89 @@ class AudioLooper:
         if self.current_loop_id == loop_id:
             self.current_loop_id = min(self.loops.keys()) if self.loops else None
 
+    def _active_effects(self, loop_id):
+        """(name, prefix) of the unbypassed effects taking this loop as input, in chain order"""
+        for name in EFFECT_CHAIN:
+            prefix = EFFECT_PREFIXES[name]
+            if (not getattr(self, f"{prefix}_bypass") and loop_id == getattr(self, f"{prefix}_input_id")
+                    and name in self._effects):
+                yield name, prefix
+
     def _is_effect_input_routed(self, loop_id):
         """Check if this loop is an effect input being routed to a different output"""
-        return ((not self.gate_bypass and loop_id == self.gate_input_id and self.gate_output_id != loop_id) or
-                (not self.pitch_bypass and loop_id == self.pitch_input_id and self.pitch_output_id != loop_id) or
-                (not self.reverb_bypass and loop_id == self.reverb_input_id and self.reverb_output_id != loop_id))
+        return any(getattr(self, f"{prefix}_output_id") != loop_id
+                   for name, prefix in self._active_effects(loop_id))
 
-    def process_effects(self, loop_id, audio_data):
+    def process_effects(self, loop_id, audio_data, chain=None):
         """Process audio through all active effects and handle routing"""
-        processed = audio_data.copy()
-        
-        # Gate processing
-        if not self.gate_bypass and loop_id == self.gate_input_id:
-            processed = self.gate.apply(processed)
-            if self.gate_output_id in self.loop_controls.loops:
-                self._route_effect_output(loop_id, processed, self.gate_output_id, self.gate_overdub)
-        
-        # Pitch processing
-        if not self.pitch_bypass and loop_id == self.pitch_input_id:
-            processed = self.pitch_shift.apply(processed)
-            if self.pitch_output_id in self.loop_controls.loops:
-                self._route_effect_output(loop_id, processed, self.pitch_output_id, self.pitch_overdub)
-        
-        # Reverb processing
-        if not self.reverb_bypass and loop_id == self.reverb_input_id:
-            processed = self.reverb.apply(processed)
-            if self.reverb_output_id in self.loop_controls.loops:
-                self._route_effect_output(loop_id, processed, self.reverb_output_id, self.reverb_overdub)
-        
+        if chain is None:
+            chain = list(self._active_effects(loop_id))
+        processed, routes = self._run_effect_chain(
+            loop_id, audio_data, chain, self._pitch_feedback_block(loop_id, chain))
+        self._apply_routes(routes)
         return processed
 
-    def _route_effect_output(self, src_loop_id, processed_audio, dest_loop_id, overdub):
-        """Route processed audio to another loop"""
-        dest_pos = self.loop_controls.loop_positions[dest_loop_id]
-        if overdub:
-            self.loop_controls.loops[dest_loop_id][dest_pos] = np.clip(
-                self.loop_controls.loops[dest_loop_id][dest_pos] + processed_audio,
-                -1.0, 1.0
-            )
-        else:
-            self.loop_controls.loops[dest_loop_id][dest_pos] = processed_audio
+    def _pitch_feedback_block(self, loop_id, chain):
+        """Previous block of a loop the pitch shifter feeds back into, or None"""
+        if (self.pitch_output_id != loop_id or self.pitch_feedback <= 0
+                or not any(name == 'pitch_shift' for name, _ in chain)):
+            return None
+        return self.loop_controls.read_block(
+            loop_id, self.loop_controls.loop_offsets[loop_id] - self.chunk,
+            np.empty(self.chunk, dtype=self.format))
+
+    def _run_effect_chain(self, loop_id, audio_data, chain, feedback=None, scratch=None):
+        """Run the (name, prefix) effects of `chain` for one loop.
+
+        Returns the processed audio and the (dest_loop_id, audio, overdub,
+        latency) routes to write; writing is left to the caller so the chain
+        itself never touches loop buffers and can run on a worker thread.
+        Each effect writes into its own preallocated output block, and
+        `latency` is the chain's total reported latency up to that effect.
+        `feedback` is the block mixed into the pitch shifter's output when
+        it feeds back into the same loop. On a worker, a ChainScratch takes
+        the output blocks and tap writes in place of the engine's own.
+        """
+        processed = audio_data
+        routes = []
+        latency = 0
+        for name, prefix in chain:
+            effect = self._effects[name]
+            output = self._effect_outputs[name] if scratch is None else scratch.output(name)
+            effect.process(processed, output)
+            processed = output
+            latency += effect.latency_samples
+
+            # Feed back the previous block when routing pitch to the same loop
+            if name == 'pitch_shift' and feedback is not None:
+                from effects import kernels
+                kernels.feedback_mix(processed, feedback, float(self.pitch_feedback), processed)
+
+            if prefix in TAPS:
+                if scratch is None:
+                    self.taps.write(prefix, processed)
+                else:
+                    scratch.taps.append((prefix, processed))
+            output_id = getattr(self, f"{prefix}_output_id")
+            if output_id in self.loop_controls.loops:
+                routes.append((output_id, processed, getattr(self, f"{prefix}_overdub"), latency))
+
+        return processed, routes
+
+    def _apply_routes(self, routes):
+        for dest_loop_id, audio, overdub, latency in routes:
+            if dest_loop_id in self.loop_controls.loops:
+                self._route_effect_output(None, audio, dest_loop_id, overdub, latency)
+
+    def _route_effect_output(self, src_loop_id, processed_audio, dest_loop_id, overdub, latency=0):
+        """Route processed audio to another loop.
+
+        The audio is written `latency` samples behind the play position, so
+        output that lags its input (plugin delay compensation) lands on the
+        part of the loop it was made from.
+        """
+        self.loop_controls.write_block(
+            dest_loop_id, self.loop_controls.loop_offsets[dest_loop_id] - latency, processed_audio, overdub,
+            clip=True)
         
         
\ No newline at end of file
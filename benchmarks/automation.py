@@ -0,0 +1,110 @@
+"""Automation lanes: per-block record and lookup cost against loop length, and record/replay in the engine.
+
+Run from the repository root:  python benchmarks/automation.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.automation import AutomationLane
+
+RATE = 44100
+CHUNK = 1024
+
+
+def reference(lane, positions):
+    """Cyclic interpolation over the whole lane"""
+    return np.interp(positions % lane.length, lane.times, lane.values, period=lane.length)
+
+
+def lookup_cost():
+    rng = np.random.default_rng(0)
+    block = np.empty(CHUNK, dtype=np.float32)
+    print(f"Per-block write and ramp ({CHUNK} samples) against loop length:")
+    for seconds in (1, 8, 60, 600):
+        length = seconds * RATE
+        lane = AutomationLane(length)
+        lane.write(0, 0.0)
+        position = [0]
+
+        def write():
+            # One latched write per block, as while recording a pass
+            position[0] += CHUNK
+            lane.write(position[0], rng.random())
+
+        written = min(timeit.repeat(write, number=200, repeat=3)) / 200
+        start = float(rng.integers(length))
+        cost = min(timeit.repeat(lambda: lane.ramp(start, 1.0, block), number=200, repeat=3)) / 200
+        full = min(timeit.repeat(lambda: reference(lane, start + np.arange(CHUNK)), number=20, repeat=3)) / 20
+        print(f"  {seconds:4d} s ({len(lane):7d} points): write {written * 1e6:5.1f} us, "
+              f"ramp {cost * 1e6:5.1f} us (whole-lane np.interp {full * 1e6:8.1f} us)")
+
+    # Across the wrap, reversed, and on a resized loop
+    length = 8 * RATE
+    lane = AutomationLane(length, np.sort(rng.choice(length, 50, replace=False)), rng.random(50))
+    error = 0.0
+    for start, step in ((length - 300.0, 1.0), (200.0, -1.0), (1234.5, 0.75), (length - 10.0, 2.0)):
+        got = lane.ramp(start, step, np.empty(CHUNK))
+        error = max(error, np.abs(got - reference(lane, start + step * np.arange(CHUNK))).max())
+    half = lane.ramp(1000.0, 1.0, np.empty(CHUNK), length=length // 2)
+    error = max(error, np.abs(half - reference(lane, 2 * (1000.0 + np.arange(CHUNK)))).max())
+    print(f"  Max error against whole-lane interpolation (wrap, reverse, varispeed, resized): {error:.2e}")
+
+
+def record_and_replay():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                         backend=FakeBackend())
+    controls = looper.loop_controls
+    loop_id = next(iter(controls.loops))
+    length = controls.loop_lengths[loop_id]
+    blocks = -(-length // CHUNK)
+    looper.post_command('reverb.bypass', value=0)
+    looper.post_command('automation.record', loop_id, 1)
+    # One pass: a wet sweep, and a pitch step halfway
+    for block in range(blocks):
+        looper.post_command('reverb.wet', value=block / blocks)
+        if block == blocks // 2:
+            touched = controls.loop_offsets[loop_id]
+            looper.post_command('pitch_shift.semitones', value=7)
+        looper.mix_loops()
+    looper.post_command('automation.record', loop_id, 0)
+    lanes = controls.automation[loop_id]
+    print("Recorded lanes: " + ", ".join(f"{name} ({len(lane)} points)" for name, lane in lanes.items()))
+
+    # Replay: the wet ramp is per sample, the pitch step lands on its block
+    errors, misplaced = [], 0
+    for block in range(2 * blocks):
+        offset = controls.loop_offsets[loop_id]
+        looper.mix_loops()
+        wet = looper.reverb.wet
+        expected = reference(lanes['reverb.wet'], offset + np.arange(CHUNK))
+        errors.append(np.abs(wet - expected).max())
+        misplaced += looper.pitch_shift.semitones != (7 if offset >= touched else 0)
+    print(f"  Replayed wet ramp vs lane: max error {max(errors):.2e}; pitch step (recorded at "
+          f"sample {touched}) on the wrong side in {misplaced} of {2 * blocks} blocks")
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'take.automation.npz')
+        looper.save_automation(filename)
+        other = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                            backend=FakeBackend())
+        other.load_automation(filename)
+        same = all(np.array_equal(lane.times, other.loop_controls.automation[loop_id][name].times)
+                   and np.array_equal(lane.values, other.loop_controls.automation[loop_id][name].values)
+                   for name, lane in lanes.items())
+        print(f"  Saved and reloaded ({os.path.getsize(filename)} bytes): {'identical' if same else 'DIFFERENT'}")
+
+
+def main():
+    lookup_cost()
+    record_and_replay()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Granular playback cost against the block budget.
+
+Run from the repository root:  python benchmarks/granular.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.granular import GranularVoice
+
+RATE = 44100
+CHUNK = 1024
+REPEATS = 50
+SIZE_MS = 500.0
+
+
+def steady_voice(grains, loop):
+    """A voice spawning enough grains per second to hold `grains` active"""
+    voice = GranularVoice(RATE, CHUNK, position=0.3, size_ms=SIZE_MS, pitch=7,
+                          density=grains * 1000 / SIZE_MS, spray=0.2, max_grains=2 * grains, seed=0)
+    out = np.empty(CHUNK, dtype=np.float32)
+    for _ in range(int(SIZE_MS / 1000 * RATE / CHUNK) + 2):
+        voice.render(loop, len(loop), out)
+    return voice, out
+
+
+def main():
+    loop = np.random.default_rng(0).uniform(-0.5, 0.5, 8 * RATE).astype(np.float32)
+    budget = CHUNK / RATE * 1e3
+    print(f"Per {CHUNK}-sample block (budget {budget:.1f} ms), milliseconds:")
+    for grains in (100, 300, 500):
+        voice, out = steady_voice(grains, loop)
+        timer = timeit.Timer(lambda: voice.render(loop, len(loop), out))
+        cost = min(timer.repeat(5, REPEATS)) / REPEATS * 1e3
+        print(f"  {len(voice.ages):4d} grains  {cost:6.2f} ms  ({100 * cost / budget:4.1f}% of budget)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Master-bus cost: the old hard clip against the limiter and soft clip.
+
+Run from the repository root:  python benchmarks/limiter.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.limiter import Limiter, soft_clip
+
+RATE = 44100
+CHUNK = 1024
+REPEATS = 2000
+
+
+def per_block_us(statement, setup, names):
+    """Best-of-5 microseconds per call"""
+    timer = timeit.Timer(statement, setup=setup, globals=names)
+    return min(timer.repeat(5, REPEATS)) / REPEATS * 1e6
+
+
+def main():
+    rng = np.random.default_rng(0)
+    blocks = {
+        'quiet (peak 0.5)': (0.5 * rng.uniform(-1, 1, CHUNK)).astype(np.float32),
+        'hot (peak 1.6)': (1.6 * rng.uniform(-1, 1, CHUNK)).astype(np.float32),
+    }
+    print(f"Per {CHUNK}-sample block, microseconds:")
+    for label, block in blocks.items():
+        names = {'block': block, 'np': np, 'Limiter': Limiter, 'soft_clip': soft_clip,
+                 'RATE': RATE, 'CHUNK': CHUNK}
+        setup = "out = block.copy(); limiter = Limiter(RATE, CHUNK)"
+        clip = per_block_us("np.clip(out, -1.0, 1.0)", setup, names)
+        limit = per_block_us("out[:] = block; limiter.process(out)", setup, names)
+        copy = per_block_us("out[:] = block", setup, names)
+        soft = per_block_us("out[:] = block; soft_clip(out)", setup, names)
+        print(f"  {label:18s} np.clip {clip:6.1f}   limiter {limit - copy:6.1f}   "
+              f"soft_clip {soft - copy:6.1f}")
+
+    # Steady tone pushed 6 dB over full scale: the output must stay under it
+    limiter = Limiter(RATE, CHUNK)
+    tone = (2.0 * np.sin(2 * np.pi * 220 * np.arange(CHUNK * 100) / RATE)).astype(np.float32)
+    peak = max(np.abs(limiter.process(block)).max() for block in tone.reshape(-1, CHUNK))
+    print(f"Limited peak of a +6 dBFS tone: {peak:.4f} (gain settled at {limiter.gain:.3f})")
+
+
+if __name__ == '__main__':
+    main()
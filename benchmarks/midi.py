@@ -0,0 +1,109 @@
+"""MIDI clock sync and control mapping against a scripted message stream.
+
+A jittery master clock is injected as raw MIDI bytes on the fake backend's
+virtual clock, so no MIDI hardware (or mido) is needed. Reports how far
+the fitted tempo and the transport's bar grid are from the master's, and
+checks that mapped notes reach the engine through the controller thread.
+
+Run from the repository root:  python benchmarks/midi.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.midi import PPQN, ClockFilter, MidiController
+
+RATE = 44100
+CHUNK = 1024
+
+
+def clock_times(bpm, seconds, jitter, start=0.0, seed=0):
+    """Tick times of a master clock, each off by up to `jitter` seconds"""
+    rng = np.random.default_rng(seed)
+    period = 60.0 / (bpm * PPQN)
+    exact = start + period * np.arange(int(seconds / period))
+    return exact, exact + rng.uniform(-jitter, jitter, len(exact))
+
+
+def filter_accuracy(bpm=123.4, jitter=0.002):
+    exact, stamped = clock_times(bpm, 20.0, jitter)
+    clock = ClockFilter()
+    errors = []
+    for number, timestamp in enumerate(stamped):
+        clock.tick(timestamp)
+        if number >= 2 * PPQN:
+            errors.append(clock.time_of(number) - exact[number])
+    errors = np.abs(errors) * RATE
+    raw = 60.0 / (PPQN * np.diff(stamped))  # Tempo from single tick intervals
+    print(f"Clock at {bpm} BPM, +/-{jitter * 1e3:.0f} ms jitter: fitted {clock.bpm:.3f} BPM "
+          f"(per-tick estimates range {raw.min():.1f}-{raw.max():.1f})")
+    print(f"  Fitted tick time vs master: mean {errors.mean():.1f}, max {errors.max():.1f} samples "
+          f"(raw jitter up to {jitter * RATE:.0f})")
+
+    # Tempo change: the fit restarts on the first tick that misses
+    _, stamped = clock_times(140.0, 5.0, jitter, start=stamped[-1] + 60.0 / (140.0 * PPQN), seed=1)
+    for number, timestamp in enumerate(stamped):
+        clock.tick(timestamp)
+        if clock.bpm is not None and abs(clock.bpm - 140.0) < 0.1:
+            print(f"  Jump to 140 BPM: within 0.1 BPM after {number + 1} ticks")
+            break
+
+
+def grid_sync(bpm=97.0, jitter=0.001, start=0.37):
+    """Slave the transport to the master and compare its bar grid with the master's"""
+    backend = FakeBackend()
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None, backend=backend)
+    output = backend.open_output(None, RATE, 1, looper.format, CHUNK)
+    output.start()
+    looper.post_command('transport.quantize', value=2)  # Bars
+    midi = MidiController(looper, port=[])
+    exact, stamped = clock_times(bpm, 12.0, jitter, start=start)
+    events = [(start - 0.001, [0xFA])] + [(t, [0xF8]) for t in stamped]
+    for block in range(int(12.0 * RATE / CHUNK)):
+        # Messages that arrived before this block is mixed
+        block_time = block * CHUNK / RATE
+        while events and events[0][0] < block_time:
+            timestamp, data = events.pop(0)
+            midi.feed(data, timestamp)
+        output.write(looper.mix_loops())
+
+    transport = looper.transport
+    bar = 60.0 / bpm * transport.beats_per_bar
+    master_bar = start + bar * np.ceil((transport.position / RATE - start) / bar)
+    print(f"Transport slaved to {bpm} BPM (+/-{jitter * 1e3:.0f} ms jitter): {transport.bpm:.3f} BPM, "
+          f"next bar at sample {transport.next_boundary('bar')} vs master {master_bar * RATE:.0f}")
+    print(f"  4-bar loop: {transport.loop_samples(4 * bar)} samples vs master {4 * bar * RATE:.0f}")
+
+
+def mapped_controls():
+    """Notes through the controller thread, as from a port"""
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 2.0, 4.0], loop_compression=None,
+                         backend=FakeBackend())
+    midi = MidiController(looper, port=[[0x90, 42, 100], [0x90, 36, 100], [0xB0, 22, 127]])
+    midi.start()
+    midi._thread.join(timeout=1.0)
+    looper.mix_loops()
+    controls = looper.loop_controls
+    loop_ids = sorted(controls.loops)
+    checks = {
+        f'loop {loop_ids[2]} selected': controls.current_loop_id == loop_ids[2],
+        'recording': controls.is_recording,
+        'reverb enabled': not looper.reverb_bypass,
+    }
+    for name, ok in checks.items():
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+
+
+def main():
+    filter_accuracy()
+    grid_sync()
+    print("Mapped notes and CCs:")
+    mapped_controls()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""OSC remote control over localhost UDP.
+
+Starts an OscServer on a free port in front of a headless engine, sends
+fader sweeps and a bundle from a plain UDP socket, and checks that the
+engine state follows while the bursts are coalesced to one command per
+setting per block.
+
+Run from the repository root:  python benchmarks/osc.py
+"""
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.osc_server import OscServer, encode_bundle, encode_message
+
+RATE = 44100
+CHUNK = 1024
+
+
+def main():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 2.0, 4.0], loop_compression=None,
+                         backend=FakeBackend())
+    looper.preload_effect('reverb')
+    server = OscServer(looper, port=0)
+    port = server.start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    address = ('127.0.0.1', port)
+    loop_ids = sorted(looper.loop_controls.loops)
+
+    # A fader sweep far faster than the block rate, then the bundle
+    sweep = 2000
+    started = time.perf_counter()
+    for i in range(sweep):
+        sender.sendto(encode_message('/reverb/decay', (i + 1) / sweep), address)
+        if i % 100 == 99:
+            time.sleep(0.005)  # Bursts of 100, as from a controller's fader
+    sender.sendto(encode_bundle(
+        encode_message(f'/loop/{loop_ids[1]}/mute', 1),
+        encode_message('/looper/reverb/input', loop_ids[2]),
+        encode_message('/reverb/bypass', 0),
+        encode_message('/select', loop_ids[2]),
+        encode_message('/undo'),
+        encode_message('/undo'),
+        encode_message('/no/such/address', 1.0),
+    ), address)
+    sent = time.perf_counter() - started
+
+    # Let the server catch up and flush, then apply what it posted
+    deadline = time.time() + 5.0
+    while server.received < sweep + 7 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(3 * server.interval)
+    looper.mix_loops()
+    server.stop()
+
+    controls = looper.loop_controls
+    print(f"Sent {sweep + 7} messages in {sent * 1e3:.1f} ms; server received {server.received} "
+          f"(UDP may drop some), posted {server.posted} commands")
+    checks = {
+        'reverb.decay == 1.0': abs(looper.reverb.decay - 1.0) < 1e-6,
+        f'loop {loop_ids[1]} muted': controls.muted_loops[loop_ids[1]],
+        f'reverb input is loop {loop_ids[2]}': looper.reverb_input_id == loop_ids[2],
+        'reverb enabled': not looper.reverb_bypass,
+        f'loop {loop_ids[2]} selected': controls.current_loop_id == loop_ids[2],
+    }
+    for name, ok in checks.items():
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+
+
+if __name__ == '__main__':
+    main()
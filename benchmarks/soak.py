@@ -0,0 +1,81 @@
+"""Headless load/soak test: the engine on a fake sound card with jitter and xruns.
+
+The playback thread runs as fast as it can on the fake backend's virtual
+clock while this thread keeps posting commands, so locking and command
+handling are exercised at full load. Reports the per-block mix time
+against the real-time budget.
+
+Run from the repository root:  python benchmarks/soak.py [virtual seconds]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+
+RATE = 44100
+CHUNK = 1024
+
+
+def main(seconds=60.0):
+    rng = np.random.default_rng(1)
+    noise = (0.2 * rng.standard_normal(RATE)).astype(np.float32)
+    backend = FakeBackend(input_signal=lambda start, frames: np.resize(np.roll(noise, -start % RATE), frames),
+                          jitter=0.5 * CHUNK / RATE, xrun_rate=0.002,
+                          max_blocks=int(seconds * RATE / CHUNK), seed=1)
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 2.0, 3.0, 4.0, 6.0, 8.0],
+                         backend=backend)
+    for name in ('reverb', 'gate', 'filter', 'delay'):
+        looper.preload_effect(name)
+        looper.post_command(f'{name}.bypass', value=0)
+
+    # Time every block the playback thread mixes
+    timings = []
+    mix = looper.mix_loops
+
+    def timed_mix():
+        start = time.perf_counter()
+        output = mix()
+        timings.append(time.perf_counter() - start)
+        return output
+    looper.mix_loops = timed_mix
+
+    started = time.perf_counter()
+    looper.start()
+    commands = 0
+    loop_ids = list(looper.loop_controls.loops)
+    while looper.playback_thread.is_alive():
+        loop_id = int(rng.choice(loop_ids))
+        choice = rng.integers(5)
+        if choice == 0:
+            looper.post_command('select', loop_id)
+            looper.post_command('record', value=1)
+        elif choice == 1:
+            looper.post_command('record', value=0)
+        elif choice == 2:
+            looper.post_command('mute', loop_id, bool(rng.integers(2)))
+        elif choice == 3:
+            looper.post_command('filter.frequency', value=float(rng.uniform(100, 8000)))
+        else:
+            looper.post_command('loop_rate', loop_id, float(rng.choice([1.0, 0.5, 2.0, -1.0])))
+        commands += 1
+        time.sleep(0.002)
+    wall = time.perf_counter() - started
+    looper.stop()
+
+    timings = np.array(timings) * 1e3
+    budget = CHUNK / RATE * 1e3
+    print(f"{backend.seconds:.0f} s of audio in {wall:.1f} s wall ({backend.seconds / wall:.1f}x real time), "
+          f"{commands} commands posted")
+    print(f"Input blocks delivered {backend.input_blocks}, xruns {backend.xruns}")
+    print(f"Mix per block (budget {budget:.1f} ms): median {np.median(timings):.2f} ms, "
+          f"p99 {np.percentile(timings, 99):.2f} ms, max {timings.max():.2f} ms, "
+          f"over budget {int((timings > budget).sum())} of {len(timings)}")
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 60.0)
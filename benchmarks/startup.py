@@ -0,0 +1,61 @@
+"""Cold-start benchmark: -X importtime report and time to the first audio block.
+
+Run from the repository root:  python benchmarks/startup.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET_SECONDS = 1.0
+
+# Builds the engine and mixes one block, which is what the output stream
+# needs before the first audio can be heard
+FIRST_BLOCK = (
+    "from audiolooper import AudioLooper\n"
+    "looper = AudioLooper()\n"
+    "looper.mix_loops()\n"
+)
+
+
+def import_times(module, top=15):
+    """Slowest imports (cumulative microseconds) when importing `module`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <module>"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def cold_start(runs=5):
+    """Wall time of a fresh interpreter reaching its first mixed block"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', FIRST_BLOCK], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    print("Slowest imports for audiolooper (cumulative / self, ms):")
+    for cumulative, self_time, name in import_times('audiolooper'):
+        print(f"  {cumulative / 1000:8.1f} {self_time / 1000:8.1f}  {name}")
+
+    timings = cold_start()
+    best = min(timings)
+    status = "OK" if best < TARGET_SECONDS else "SLOW"
+    print(f"Cold start to first block: best {best:.3f} s, "
+          f"median {sorted(timings)[len(timings) // 2]:.3f} s "
+          f"(target < {TARGET_SECONDS:.1f} s) {status}")
+
+
+if __name__ == '__main__':
+    main()
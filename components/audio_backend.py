@@ -0,0 +1,203 @@
+import time
+import numpy as np
+
+
+class SoundDeviceBackend:
+    """Audio streams from PortAudio through `sounddevice`.
+
+    sounddevice is imported (and PortAudio initialized) when the backend is
+    created, once per process.
+    """
+    def __init__(self, latency='high'):
+        import sounddevice
+        self.sd = sounddevice
+        self.latency = latency
+
+    def clock(self):
+        """Seconds on the clock MIDI and other timed input is stamped with"""
+        return time.perf_counter()
+
+    def default_devices(self):
+        """(input device, output device)"""
+        return self.sd.default.device[0], self.sd.default.device[1]
+
+    def open_output(self, device, rate, channels, dtype, blocksize):
+        return self.sd.OutputStream(device=device, samplerate=rate, channels=channels, dtype=dtype,
+                                    blocksize=blocksize, latency=self.latency)
+
+    def open_input(self, device, rate, channels, dtype, blocksize, callback):
+        return self.sd.InputStream(device=device, samplerate=rate, channels=channels, dtype=dtype,
+                                   blocksize=blocksize, latency=self.latency, callback=callback)
+
+
+class FakeBackend:
+    """Deterministic stand-in for a sound card, driven by a virtual clock.
+
+    Each block written to the output stream advances the clock by one block
+    and delivers, on the writing thread, every input block that has come
+    due, so one engine block at a time is reproducible. Input comes from
+    `input_signal` (an array of frames, or a callable(start_frame, frames)
+    returning a block), or from the output itself `loopback_latency`
+    samples later, and is silent otherwise.
+
+    Timing faults are scripted from `seed`: `jitter` (seconds) moves each
+    input callback earlier or later, so some blocks get none and others
+    two, and `xrun_rate` is the chance per block of an xrun that drops
+    that block's input and reports an overflow. `speed` runs the clock
+    against the wall clock (1.0 is real time); None runs as fast as the
+    engine can mix. The output stream stops by itself after `max_blocks`.
+    `clock()` reads the virtual clock, so timed input can be scripted on it.
+    """
+    def __init__(self, input_signal=None, loopback_latency=None, jitter=0.0, xrun_rate=0.0,
+                 speed=None, max_blocks=None, capture=False, seed=0):
+        self.input_signal = input_signal
+        self.loopback_latency = loopback_latency
+        self.jitter = jitter
+        self.xrun_rate = xrun_rate
+        self.speed = speed
+        self.max_blocks = max_blocks
+        self.capture = capture
+        self.rng = np.random.default_rng(seed)
+        self.output_stream = None
+        self.input_stream = None
+        self.captured = []  # Output blocks, when capturing
+        self.blocks_written = 0
+        self.input_blocks = 0
+        self.xruns = 0
+
+    def clock(self):
+        return self.seconds
+
+    def default_devices(self):
+        return 'fake input', 'fake output'
+
+    def open_output(self, device, rate, channels, dtype, blocksize):
+        self.output_stream = FakeOutputStream(self, rate, channels, dtype, blocksize)
+        return self.output_stream
+
+    def open_input(self, device, rate, channels, dtype, blocksize, callback):
+        self.input_stream = FakeInputStream(self, rate, channels, dtype, blocksize, callback)
+        return self.input_stream
+
+    @property
+    def seconds(self):
+        """Virtual time elapsed on the output clock"""
+        stream = self.output_stream
+        return 0.0 if stream is None else self.blocks_written * stream.blocksize / stream.rate
+
+    def _written(self, block):
+        """Advance the clock by one output block and run the input callbacks that are due"""
+        output = self.output_stream
+        self.blocks_written += 1
+        if self.capture:
+            self.captured.append(np.array(block, copy=True).reshape(-1))
+        stream = self.input_stream
+        if stream is not None:
+            if self.loopback_latency is not None:
+                stream.loopback(block)
+            stream.deliver(self.blocks_written * output.blocksize / output.rate)
+        if self.max_blocks is not None and self.blocks_written >= self.max_blocks:
+            output.active = False
+        if self.speed:
+            output.pace(self.speed)
+
+
+class FakeOutputStream:
+    def __init__(self, backend, rate, channels, dtype, blocksize):
+        self.backend = backend
+        self.rate = rate
+        self.channels = channels
+        self.dtype = dtype
+        self.blocksize = blocksize
+        self.active = False
+        self._started = None
+
+    def start(self):
+        self.active = True
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+    def write(self, data):
+        if self.active:
+            self.backend._written(data)
+
+    def pace(self, speed):
+        due = self._started + self.backend.seconds / speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeInputStream:
+    def __init__(self, backend, rate, channels, dtype, blocksize, callback):
+        self.backend = backend
+        self.rate = rate
+        self.channels = channels
+        self.dtype = dtype
+        self.blocksize = blocksize
+        self.callback = callback
+        self.active = False
+        self._next = 0  # Index of the next input block
+        self._due = self._arrival(0)
+        self._block = np.zeros((blocksize, channels), dtype=dtype)
+        self._loop = None  # Output waiting to come back in, when looped back
+        self._lost = False  # An xrun dropped the previous block
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+    def _arrival(self, index):
+        """Virtual time the input block `index` is handed over (one block after its last sample)"""
+        jitter = self.backend.jitter
+        offset = self.backend.rng.uniform(-jitter, jitter) if jitter else 0.0
+        return (index + 1) * self.blocksize / self.rate + offset
+
+    def loopback(self, block):
+        if self._loop is None:
+            self._loop = np.zeros(self.backend.loopback_latency, dtype=np.float32)
+        self._loop = np.concatenate((self._loop, np.asarray(block, dtype=np.float32).reshape(-1)))
+
+    def _fill(self, start):
+        backend = self.backend
+        frames = self.blocksize
+        block = self._block
+        block.fill(0)
+        if backend.loopback_latency is not None:
+            count = min(frames, len(self._loop))
+            block[:count] = self._loop[:count, None]
+            self._loop = self._loop[count:]
+        elif callable(backend.input_signal):
+            block[:] = np.reshape(backend.input_signal(start, frames), (frames, -1))
+        elif backend.input_signal is not None:
+            source = np.asarray(backend.input_signal)
+            source = source.reshape(len(source), -1)
+            part = source[start:start + frames]
+            block[:len(part)] = part
+        return block
+
+    def deliver(self, now):
+        """Call back with every input block due by virtual time `now`"""
+        while self.active and self._due <= now:
+            index = self._next
+            block = self._fill(index * self.blocksize)
+            self._next += 1
+            self._due = max(self._due, self._arrival(self._next))
+            if self.backend.xrun_rate and self.backend.rng.random() < self.backend.xrun_rate:
+                self.backend.xruns += 1  # The block is lost; the next one reports it
+                self._lost = True
+                continue
+            status = 'input overflow' if self._lost else None
+            self._lost = False
+            self.backend.input_blocks += 1
+            self.callback(block, self.blocksize, None, status)
@@ -0,0 +1,136 @@
+import math
+import numpy as np
+
+# Breakpoints a new lane has room for; the storage doubles when it fills
+CAPACITY = 256
+
+
+class AutomationLane:
+    """One parameter's moves over a loop cycle, replayed every time the loop wraps.
+
+    Breakpoints are kept as two sorted arrays, sample times within the
+    cycle (`length` samples long) and values, linearly interpolated in
+    between and around the wrap. A block's values are found with two
+    binary searches and one np.interp over the breakpoints inside it, so
+    a block costs O(log n + block) however dense the lane is. The arrays
+    have spare room at the end: a write replaces the breakpoints it passed
+    in place and only reallocates (to twice the size) when they run out.
+    """
+    def __init__(self, length, times=None, values=None, capacity=CAPACITY):
+        self.length = int(length)
+        count = 0 if times is None else len(times)
+        size = max(int(capacity), 2 * count)
+        self._times = np.zeros(size, dtype=np.int64)
+        self._values = np.zeros(size, dtype=np.float64)
+        if count:
+            self._times[:count] = times
+            self._values[:count] = values
+        self.count = count
+        self.last_written = None  # Time of the previous write in this pass
+
+    @property
+    def times(self):
+        return self._times[:self.count]
+
+    @property
+    def values(self):
+        return self._values[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def write(self, time, value, reverse=False):
+        """Record `value` at `time`, replacing what was there since the previous write.
+
+        Writes in one pass (see `end_pass`) overwrite the breakpoints
+        between them, so a knob moved over old automation replaces it
+        rather than mixing with it. `reverse` is set while the loop plays
+        backwards: the pass then runs down the cycle, and what it replaces
+        lies above each write rather than below it.
+        """
+        time = int(time) % self.length
+        previous = self.last_written
+        self.last_written = time
+        times = self.times
+        if previous is None or previous == time:
+            self._replace(int(np.searchsorted(times, time, 'left')),
+                          int(np.searchsorted(times, time, 'right')), time, value)
+        elif not reverse and previous < time:
+            # Passed (previous, time]
+            self._replace(int(np.searchsorted(times, previous, 'right')),
+                          int(np.searchsorted(times, time, 'right')), time, value)
+        elif reverse and time < previous:
+            # Passed [time, previous)
+            self._replace(int(np.searchsorted(times, time, 'left')),
+                          int(np.searchsorted(times, previous, 'left')), time, value)
+        elif not reverse:
+            # Wrapped past the end: only (time, previous] is kept, after the new point
+            self._keep(int(np.searchsorted(times, time, 'right')),
+                       int(np.searchsorted(times, previous, 'right')), time, value, first=True)
+        else:
+            # Wrapped past the start: only [previous, time) is kept, before the new point
+            self._keep(int(np.searchsorted(times, previous, 'left')),
+                       int(np.searchsorted(times, time, 'left')), time, value, first=False)
+
+    def _reserve(self, count):
+        if count > len(self._times):
+            size = max(2 * len(self._times), count)
+            for name in ('_times', '_values'):
+                grown = np.zeros(size, dtype=getattr(self, name).dtype)
+                grown[:self.count] = getattr(self, name)[:self.count]
+                setattr(self, name, grown)
+
+    def _replace(self, begin, end, time, value):
+        """Put one breakpoint in place of those in [begin, end)"""
+        count = self.count + 1 - (end - begin)
+        self._reserve(count)
+        if end != begin + 1:
+            for array in (self._times, self._values):
+                array[begin + 1:count] = array[end:self.count]
+        self._times[begin] = time
+        self._values[begin] = value
+        self.count = count
+
+    def _keep(self, begin, end, time, value, first):
+        """Keep only the breakpoints in [begin, end), with the new one before (first) or after them"""
+        kept = end - begin
+        self._reserve(kept + 1)
+        target = 1 if first else 0
+        if begin != target:
+            for array in (self._times, self._values):
+                array[target:target + kept] = array[begin:end]
+        at = 0 if first else kept
+        self._times[at] = time
+        self._values[at] = value
+        self.count = kept + 1
+
+    def end_pass(self):
+        self.last_written = None
+
+    def ramp(self, start, step, out, length=None):
+        """Fill `out` with the values at cycle positions start, start + step, ...
+
+        `length` is the loop's current length; when it differs from the
+        lane's (the loop was resized or stretched), the lane is scaled to fit.
+        """
+        count = self.count
+        times, values = self.times, self.values
+        if count == 1:
+            out.fill(values[0])
+            return out
+        scale = 1.0 if length is None or length == self.length else self.length / length
+        first = start * scale
+        last = (start + step * (len(out) - 1)) * scale
+        low, high = min(first, last), max(first, last)
+        # Breakpoints from the one before the block to the one after, continued
+        # into the neighbouring cycles where the block wraps. Integer keys keep
+        # the searches from converting the whole lane to float.
+        low_cycle, low = divmod(low, self.length)
+        high_cycle, high = divmod(high, self.length)
+        begin = int(np.searchsorted(times, math.floor(low), 'right')) - 1 + count * int(low_cycle)
+        end = int(np.searchsorted(times, math.ceil(high), 'left')) + count * int(high_cycle)
+        index = np.arange(begin, end + 1)
+        cycle, index = np.divmod(index, count)
+        positions = np.linspace(first, last, len(out)) if len(out) > 1 else np.array([first])
+        out[:] = np.interp(positions, times[index] + cycle * self.length, values[index])
+        return out
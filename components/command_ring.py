@@ -0,0 +1,83 @@
+import numpy as np
+
+# Command addresses understood by AudioLooper._apply_command. The op code sent
+# through the ring is the index into this list, so only append to it.
+COMMANDS = [
+    'record', 'overdub', 'select', 'mute', 'solo', 'clear',
+    'loop_length', 'add_loop', 'delete_loop', 'arm_input',
+    'session.start', 'session.stop',
+    'reverb.bypass', 'reverb.overdub', 'reverb.input', 'reverb.output',
+    'reverb.decay', 'reverb.wet', 'reverb.delay_ms',
+    'gate.bypass', 'gate.overdub', 'gate.input', 'gate.output',
+    'gate.threshold', 'gate.attack_ms', 'gate.release_ms',
+    'pitch_shift.bypass', 'pitch_shift.overdub', 'pitch_shift.input', 'pitch_shift.output',
+    'pitch_shift.semitones', 'pitch_shift.feedback', 'pitch_shift.quality',
+    'transport.bpm', 'transport.beats_per_bar', 'transport.quantize',
+    'transport.align', 'loop_rate', 'loop_stretch', 'undo', 'redo',
+    'convolution.bypass', 'convolution.overdub', 'convolution.input', 'convolution.output',
+    'convolution.wet',
+    'filter.bypass', 'filter.overdub', 'filter.input', 'filter.output',
+    'filter.kind', 'filter.frequency', 'filter.q', 'filter.gain_db',
+    'delay.bypass', 'delay.overdub', 'delay.input', 'delay.output',
+    'delay.time_ms', 'delay.beats', 'delay.feedback', 'delay.wet',
+    'granular', 'granular.position', 'granular.size_ms', 'granular.pitch',
+    'granular.density', 'granular.spray',
+    'calibrate', 'record_latency',
+    'clock.tempo', 'clock.downbeat',
+    'automation.record', 'automation.clear',
+    'record.toggle', 'overdub.toggle',
+]
+COMMAND_CODES = {name: code for code, name in enumerate(COMMANDS)}
+
+
+def register_commands(names):
+    """Append commands for effects found at runtime (both ends must register the same names)"""
+    for name in names:
+        if name not in COMMAND_CODES:
+            COMMAND_CODES[name] = len(COMMANDS)
+            COMMANDS.append(name)
+
+COMMAND_DTYPE = np.dtype([('op', np.int32), ('target', np.int32), ('value', np.float64)])
+
+
+class CommandRing:
+    """Single-producer/single-consumer ring of fixed-size commands.
+
+    The producer only advances the head and the consumer only advances the
+    tail, so neither side ever takes a lock. The ring can live in private
+    memory or in any buffer (e.g. multiprocessing.shared_memory) so the same
+    class carries commands between threads or between processes.
+    """
+    def __init__(self, capacity=256, buffer=None):
+        self.capacity = capacity
+        if buffer is None:
+            buffer = bytearray(self.nbytes(capacity))
+        self.counters = np.frombuffer(buffer, dtype=np.int64, count=2)
+        self.records = np.frombuffer(buffer, dtype=COMMAND_DTYPE, count=capacity, offset=16)
+
+    @staticmethod
+    def nbytes(capacity):
+        return 16 + capacity * COMMAND_DTYPE.itemsize
+
+    def push(self, name, target=-1, value=0.0):
+        """Queue a command; returns False if the ring is full"""
+        head, tail = int(self.counters[0]), int(self.counters[1])
+        if head - tail >= self.capacity:
+            return False
+        self.records[head % self.capacity] = (COMMAND_CODES[name], target, value)
+        self.counters[0] = head + 1  # Publish only after the record is written
+        return True
+
+    def pending(self):
+        """Number of commands queued and not yet drained"""
+        return int(self.counters[0]) - int(self.counters[1])
+
+    def pop_all(self):
+        """Return every queued (name, target, value) in order"""
+        head, tail = int(self.counters[0]), int(self.counters[1])
+        commands = []
+        for index in range(tail, head):
+            op, target, value = self.records[index % self.capacity].tolist()
+            commands.append((COMMANDS[op], target, value))
+        self.counters[1] = head
+        return commands
@@ -0,0 +1,184 @@
+import queue
+import threading
+import numpy as np
+
+
+class ChainScratch:
+    """What the chains run by one worker write to.
+
+    Effect outputs and tap blocks land here rather than in the engine's
+    shared blocks and tap ring, so a chain that runs past its deadline
+    never writes anything the mixer is using. An effect is in at most one
+    chain per block, so outputs keyed by effect name are never shared by
+    two chains the worker runs in the same block. The pool hands the taps
+    to the mixer only for chains that finished in time.
+    """
+    def __init__(self, chunk, format):
+        self.chunk = chunk
+        self.format = format
+        self.outputs = {}  # Effect name -> output block
+        self.taps = []  # (tap, block) written by the chain this block
+
+    def output(self, name):
+        block = self.outputs.get(name)
+        if block is None:
+            block = self.outputs[name] = np.zeros(self.chunk, dtype=self.format)
+        return block
+
+
+class EffectWorkerPool:
+    """Runs independent per-loop effect chains on worker threads within one block.
+
+    Each effect instance only ever processes its own input loop, so chains for
+    different loops share no state and can run concurrently while NumPy/SciPy
+    release the GIL. `run` is the barrier before summation: it waits for the
+    block's chains until the deadline, and any chain that is still running has
+    its previous block's output reused instead of holding up the mixer. Jobs
+    go to one shared queue, so an idle worker takes the next chain whichever
+    slot it is in, and each worker writes to its own ChainScratch. A job
+    whose loop or effects are still held by a late chain is skipped (and its
+    output reused again) until that chain returns, so an effect never runs on
+    two threads at once; the mixer checks `is_busy` before running a chain
+    itself. Late chains write only to their worker's ChainScratch, and their
+    results are dropped.
+    """
+    def __init__(self, chain_fn, workers, chunk, format='float32', deadline=None):
+        self.chain_fn = chain_fn  # (loop_id, audio, chain, feedback, scratch) -> (processed, routes)
+        self.workers = workers
+        self.chunk = chunk
+        self.format = format
+        self.deadline = deadline  # seconds to wait per block, None waits forever
+
+        # Preallocated per-worker input scratch and per-slot outputs
+        self.scratch = np.zeros((workers, chunk), dtype=format)
+        self._chain_scratch = [ChainScratch(chunk, format) for _ in range(workers)]
+        self._outputs = []
+        self._routes = []
+        self._taps = []
+        self._finished = []
+        self._last_output = {}
+        self._busy = set()  # Loops whose chain is queued or running
+        self._busy_effects = set()  # Effects those chains use
+
+        self._generation = 0
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._jobs = queue.SimpleQueue()
+        self._threads = []
+        self.late_blocks = 0
+        self.is_running = True
+
+        for index in range(workers):
+            thread = threading.Thread(target=self._worker, args=(index,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _ensure_slots(self, count):
+        while len(self._outputs) < count:
+            self._outputs.append(np.zeros(self.chunk, dtype=self.format))
+            self._routes.append([])
+            self._taps.append([])
+            self._finished.append(False)
+
+    def is_busy(self, loop_id, chain):
+        """True while a late chain still holds the loop or one of `chain`'s effects"""
+        with self._cond:
+            return loop_id in self._busy or any(name in self._busy_effects for name, _ in chain)
+
+    def effect_busy(self, name):
+        """True while a late chain still runs the effect `name`"""
+        with self._cond:
+            return name in self._busy_effects
+
+    def run(self, jobs):
+        """Process [(loop_id, audio, chain, feedback)] and return [(loop_id, processed, routes, taps)].
+
+        `chain` is the (name, prefix) list of effects to run and `feedback`
+        the block the pitch shifter feeds back, or None; both are read by
+        the mixer so the worker never touches loop buffers. Routes and taps
+        are only returned for chains that finished in time; a late chain
+        contributes its previous output and writes nothing.
+        """
+        self._ensure_slots(len(jobs))
+        with self._cond:
+            self._generation += 1
+            generation = self._generation
+            dispatch = []
+            for slot, (loop_id, _, chain, _) in enumerate(jobs):
+                self._finished[slot] = False
+                if loop_id in self._busy or any(name in self._busy_effects for name, _ in chain):
+                    continue
+                dispatch.append(slot)
+                self._busy.add(loop_id)
+                self._busy_effects.update(name for name, _ in chain)
+            self._pending = len(dispatch)
+
+        for slot in dispatch:
+            self._jobs.put((generation, slot) + tuple(jobs[slot]))
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0, timeout=self.deadline)
+            # Late workers see a newer generation and discard their results
+            self._generation += 1
+            finished = list(self._finished[:len(jobs)])
+
+        results = []
+        for slot, (loop_id, _, _, _) in enumerate(jobs):
+            if finished[slot]:
+                output = self._last_output.setdefault(
+                    loop_id, np.zeros(self.chunk, dtype=self.format))
+                output[:] = self._outputs[slot]
+                results.append((loop_id, output, self._routes[slot], self._taps[slot]))
+            else:
+                self.late_blocks += 1
+                output = self._last_output.get(loop_id)
+                if output is None:
+                    output = np.zeros(self.chunk, dtype=self.format)
+                results.append((loop_id, output, [], []))
+        return results
+
+    def _release(self, loop_id, chain):
+        # Called with the condition held
+        self._busy.discard(loop_id)
+        self._busy_effects.difference_update(name for name, _ in chain)
+
+    def _worker(self, index):
+        scratch = self.scratch[index]
+        chain_scratch = self._chain_scratch[index]
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            generation, slot, loop_id, audio, chain, feedback = job
+            if generation != self._generation:
+                with self._cond:
+                    self._release(loop_id, chain)
+                continue  # Block already mixed without us; don't fall further behind
+            try:
+                scratch[:] = audio
+                chain_scratch.taps.clear()
+                processed, routes = self.chain_fn(loop_id, scratch, chain, feedback, chain_scratch)
+            except Exception as e:
+                print(f"Effect worker error: {e}")
+                processed, routes = scratch, []
+
+            with self._cond:
+                self._release(loop_id, chain)
+                if generation != self._generation:
+                    continue
+                self._outputs[slot][:] = processed
+                self._routes[slot] = routes
+                self._taps[slot][:] = chain_scratch.taps
+                self._finished[slot] = True
+                self._pending -= 1
+                if self._pending == 0:
+                    self._cond.notify_all()
+
+    def shutdown(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout=0.5)
@@ -0,0 +1,419 @@
+import os
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+from components.command_ring import CommandRing
+from components.waveform_cache import PeakPyramid
+from components.meters import MeterBank
+from components.spectrum import TapRing, SpectrumAnalyzer
+from components.audio_backend import FakeBackend
+
+MAX_LOOPS = 64
+# Status table rows: header [sequence, loop count, bytes of loop audio held,
+# bytes saved by compression, record latency in samples (-1 while
+# calibrating)], then one row per loop [loop_id, size in
+# chunks, buffer generation (-1 while compressed), play position, stretch
+# progress (-1 when not stretching)]. The sequence is odd while the table
+# is being written, so readers retry a torn copy as with MeterBank.
+STATUS_SHAPE = (MAX_LOOPS + 1, 5)
+STATUS_NBYTES = int(np.prod(STATUS_SHAPE)) * 8
+
+# Commands the client's shadow applies as well as the engine: they only
+# change state the GUI reads back. Calibration, session recording, clock
+# downbeats, undo and automation lanes run in the engine alone.
+SHADOW_COMMANDS = {'record', 'overdub', 'record.toggle', 'overdub.toggle', 'select', 'mute',
+                   'solo', 'loop_length', 'add_loop', 'delete_loop', 'arm_input', 'loop_rate',
+                   'granular', 'record_latency', 'transport.bpm', 'transport.beats_per_bar',
+                   'transport.quantize'}
+
+
+def _no_audio(loop_id, shape, dtype):
+    """Allocator for the GUI-side shadow looper, which tracks state but no audio"""
+    return np.zeros((0, shape[1]), dtype=dtype)
+
+
+class SharedLoopBuffers:
+    """Allocates loop audio in named shared-memory segments.
+
+    Each allocation for a loop gets a new generation, so another process can
+    attach to the current buffer by name after a resize. Replaced segments are
+    unlinked immediately and unmapped once the engine drops its last view.
+    The loop store allocates from its own thread, so calls are serialized.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.segments = {}
+        self.generations = {}
+        self._retired = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def segment_name(session, loop_id, generation):
+        return f"{session}_l{loop_id}_{generation}"
+
+    def __call__(self, loop_id, shape, dtype):
+        with self._lock:
+            return self._allocate(loop_id, shape, dtype)
+
+    def _allocate(self, loop_id, shape, dtype):
+        generation = self.generations.get(loop_id, -1) + 1
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        segment = shared_memory.SharedMemory(
+            name=self.segment_name(self.session, loop_id, generation), create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        array.fill(0)
+
+        if loop_id in self.segments:
+            self._retire(self.segments[loop_id])
+        self.segments[loop_id] = segment
+        self.generations[loop_id] = generation
+        return array
+
+    def _retire(self, segment):
+        segment.unlink()
+        self._retired.append(segment)
+
+    def collect(self, live_loop_ids):
+        """Release segments of deleted loops and unmap unused old buffers"""
+        with self._lock:
+            self._collect(live_loop_ids)
+
+    def _collect(self, live_loop_ids):
+        for loop_id in [lid for lid in self.segments if lid not in live_loop_ids]:
+            self._retire(self.segments.pop(loop_id))
+        still_mapped = []
+        for segment in self._retired:
+            try:
+                segment.close()
+            except BufferError:
+                still_mapped.append(segment)  # A loop array still points at it
+        self._retired = still_mapped
+
+    def close(self):
+        for segment in self.segments.values():
+            self._retire(segment)
+        self.segments = {}
+        self.collect(())
+
+
+def _publish_status(status, looper, buffers):
+    progress = looper.stretch_progress()
+    table = np.zeros(STATUS_SHAPE)
+    # Loops are added, removed, resized and compressed under the looper lock;
+    # a table of at most MAX_LOOPS rows is quick to fill
+    with looper.lock:
+        controls = looper.loop_controls
+        loop_ids = list(controls.loops)[:MAX_LOOPS]
+        for row, loop_id in enumerate(loop_ids, start=1):
+            generation = -1 if loop_id in controls.compressed else buffers.generations.get(loop_id, 0)
+            table[row] = (loop_id, controls.loop_sizes[loop_id], generation,
+                          controls.loop_positions[loop_id], progress.get(loop_id, -1.0))
+        held, saved = looper.memory_stats()
+    latency, calibrating = looper.latency_status()
+    table[0, 1:5] = (len(loop_ids), held, saved, -1 if calibrating else latency)
+    status[0, 0] += 1
+    status[:, 1:] = table[:, 1:]
+    status[1:, 0] = table[1:, 0]
+    status[0, 0] += 1
+
+
+def _engine_main(session, ring_name, capacity, status_name, meters_name, taps_name, requests,
+                 stop_event, looper_kwargs):
+    """Entry point of the engine process"""
+    from audiolooper import AudioLooper, EFFECT_CLASSES
+
+    ring_segment = shared_memory.SharedMemory(name=ring_name)
+    status_segment = shared_memory.SharedMemory(name=status_name)
+    meters_segment = shared_memory.SharedMemory(name=meters_name)
+    taps_segment = shared_memory.SharedMemory(name=taps_name)
+    status = np.ndarray(STATUS_SHAPE, dtype=np.float64, buffer=status_segment.buf)
+    buffers = SharedLoopBuffers(session)
+
+    looper = AudioLooper(loop_allocator=buffers,
+                         commands=CommandRing(capacity, ring_segment.buf),
+                         meters=MeterBank(MAX_LOOPS, meters_segment.buf),
+                         taps=TapRing(looper_kwargs.get('chunk', 1024), buffer=taps_segment.buf),
+                         **looper_kwargs)
+    looper.start()
+    # Load effects after the first audio so enabling one never imports on the audio thread
+    for name in EFFECT_CLASSES:
+        looper.preload_effect(name)
+    try:
+        while not stop_event.is_set():
+            _publish_status(status, looper, buffers)
+            while not requests.empty():
+                request, argument = requests.get_nowait()
+                if request == 'save':
+                    try:
+                        looper.save_recording(argument)
+                    except Exception as e:
+                        print(f"Engine save error: {e}")
+                elif request == 'impulse':
+                    try:
+                        looper.load_impulse_response(argument)
+                    except Exception as e:
+                        print(f"Engine impulse response error: {e}")
+                elif request == 'automation':
+                    try:
+                        looper.load_automation(argument)
+                    except Exception as e:
+                        print(f"Engine automation error: {e}")
+            with looper.lock:
+                # A compressed loop's shared buffer is released until it is expanded
+                controls = looper.loop_controls
+                expanding = looper.loop_store._expanding if looper.loop_store is not None else ()
+                buffers.collect([lid for lid in controls.loops
+                                 if lid not in controls.compressed or lid in expanding])
+            time.sleep(0.01)
+    finally:
+        looper.stop()
+        # Drop every view into shared memory before unmapping it
+        del status
+        looper.commands = None
+        looper.meters = None
+        looper.taps = None
+        looper.loop_controls.loops.clear()
+        buffers.close()
+        status_segment.close()
+        meters_segment.close()
+        taps_segment.close()
+        ring_segment.close()
+
+
+class EngineClient:
+    """GUI-side handle to an AudioLooper running in its own process.
+
+    Audio keeps running while the GUI is blocked because the engine owns its
+    interpreter. The client keeps a shadow AudioLooper that tracks settings
+    but holds no audio, applies each command to it immediately so the GUI can
+    read state back, and forwards the command through a shared-memory
+    CommandRing that the engine drains at block boundaries.
+    """
+    def __init__(self, capacity=1024, **looper_kwargs):
+        from audiolooper import AudioLooper
+
+        self.session = f"fl{os.getpid()}_{int(time.time())}"
+        self.ring_segment = shared_memory.SharedMemory(create=True, size=CommandRing.nbytes(capacity))
+        self.ring = CommandRing(capacity, self.ring_segment.buf)
+        self.ring.counters[:] = 0
+        self.status_segment = shared_memory.SharedMemory(create=True, size=STATUS_NBYTES)
+        self.status = np.ndarray(STATUS_SHAPE, dtype=np.float64, buffer=self.status_segment.buf)
+        self.status.fill(0)
+        self._status = self.status.copy()  # Last consistent copy (see _read_status)
+        self.meters_segment = shared_memory.SharedMemory(create=True, size=MeterBank.nbytes(MAX_LOOPS))
+        self.meters = MeterBank(MAX_LOOPS, self.meters_segment.buf)
+        self.meters.sequence[:] = 0
+        self.meters.values.fill(0)
+        # Effect/master taps written by the engine, analyzed on this side
+        chunk = looper_kwargs.get('chunk', 1024)
+        self.taps_segment = shared_memory.SharedMemory(create=True, size=TapRing.nbytes(chunk))
+        self.taps = TapRing(chunk, buffer=self.taps_segment.buf)
+        self.taps.counters[:] = 0
+        self.spectrum = SpectrumAnalyzer(self.taps, looper_kwargs.get('rate', 44100))
+
+        context = mp.get_context('spawn')
+        self.stop_event = context.Event()
+        self.requests = context.Queue()
+        self.process = context.Process(
+            target=_engine_main,
+            args=(self.session, self.ring_segment.name, capacity, self.status_segment.name,
+                  self.meters_segment.name, self.taps_segment.name, self.requests,
+                  self.stop_event, looper_kwargs),
+            daemon=True)
+
+        shadow_kwargs = {k: v for k, v in looper_kwargs.items()
+                         if k not in ('effect_workers', 'effect_deadline', 'undo_budget',
+                                      'loop_compression', 'backend')}
+        # Undo history and compressed loops live with the audio in the engine,
+        # and the shadow never opens streams, so it needs no sound card
+        self.shadow = AudioLooper(loop_allocator=_no_audio, undo_budget=0, loop_compression=None,
+                                  backend=FakeBackend(), **shadow_kwargs)
+        self._views = {}
+        self._overviews = {}  # loop_id -> (generation, PeakPyramid, last position)
+        self._started = False
+
+    def __getattr__(self, name):
+        # Only called for attributes the client doesn't define itself
+        if name == 'shadow':
+            raise AttributeError(name)
+        return getattr(self.shadow, name)
+
+    def start(self):
+        self.process.start()
+        self.spectrum.start()
+        self._started = True
+
+    def stop(self):
+        if not self._started:
+            return
+        self._started = False
+        self.stop_event.set()
+        self.process.join(timeout=2.0)
+        self.spectrum.stop()
+        self._views = {}
+        del self.status
+        self.ring = None
+        self.meters = None
+        self.spectrum = None
+        self.taps = None
+        for segment in (self.ring_segment, self.status_segment, self.meters_segment,
+                        self.taps_segment):
+            segment.close()
+            segment.unlink()
+
+    def post_command(self, name, target=-1, value=0.0):
+        from audiolooper import EFFECT_PREFIXES
+        shadow = self.shadow
+        with shadow._post_lock:
+            if name == 'add_loop' and target < 0:
+                target = shadow._reserve_loop_id()
+            if name == 'loop_stretch':
+                # The shadow holds no audio to stretch; it only tracks the new length
+                shadow._apply_command('loop_length', target, value)
+            elif name == 'clock.tempo':
+                shadow.transport.sync(bpm=value)
+            elif name == 'automation.record':
+                # Shown by the GUI; the lanes are recorded in the engine
+                armed = value and target in shadow.loop_controls.loops
+                shadow.automation_loop = target if armed else None
+            elif name in SHADOW_COMMANDS or name.startswith('granular.'):
+                shadow._apply_command(name, target, value)
+            elif name.split('.', 1)[0] in EFFECT_PREFIXES:
+                shadow._apply_effect_command(name, target, value)
+            if name == 'clear' and target in self._overviews:
+                self._overviews[target][1].mark_all()
+            if not self.ring.push(name, target, value):
+                print(f"Engine command queue full, dropped {name}")
+        return target
+
+    def save_recording(self, filename):
+        """Ask the engine to write the session; the save happens asynchronously"""
+        self.requests.put(('save', filename))
+        return True
+
+    def load_impulse_response(self, filename):
+        """Ask the engine to load a convolution IR; returns its length in seconds"""
+        from effects.convolution import read_impulse_response
+        # Read here too so a bad file is reported to the caller
+        seconds = len(read_impulse_response(filename, self.shadow.rate)) / self.shadow.rate
+        self.requests.put(('impulse', filename))
+        return seconds
+
+    def load_automation(self, filename):
+        """Ask the engine to load automation lanes; returns the loop ids in the file"""
+        with np.load(filename) as data:
+            # Read here too so a bad file is reported to the caller
+            loop_ids = sorted({int(key.split(':')[0]) for key in data.files})
+        self.requests.put(('automation', filename))
+        return loop_ids
+
+    def _read_status(self, retries=3):
+        """Consistent copy of the engine's status table (the last one if every read tore)"""
+        for _ in range(retries):
+            start = int(self.status[0, 0])
+            if start % 2:
+                continue
+            values = self.status.copy()
+            if int(self.status[0, 0]) == start:
+                self._status = values
+                break
+        return self._status
+
+    def loop_positions(self):
+        """Latest {loop_id: position} published by the engine"""
+        status = self._read_status()
+        count = int(status[0, 1])
+        return {int(row[0]): int(row[3]) for row in status[1:count + 1]}
+
+    def read_meters(self):
+        return self.meters.snapshot()
+
+    def stretch_progress(self):
+        status = self._read_status()
+        count = int(status[0, 1])
+        return {int(row[0]): float(row[4]) for row in status[1:count + 1] if row[4] >= 0}
+
+    def read_spectrum(self, tap='master'):
+        return self.spectrum.read(tap)
+
+    def memory_stats(self):
+        status = self._read_status()
+        return int(status[0, 2]), int(status[0, 3])
+
+    def latency_status(self):
+        latency = int(self._read_status()[0, 4])
+        return (self.shadow.record_latency, True) if latency < 0 else (latency, False)
+
+    def detect_tempo(self, loop_id):
+        """Estimate a loop's tempo from the engine's shared buffer in the background"""
+        # The engine may keep recording until the next beat/bar, so wait that long
+        transport = self.shadow.transport
+        wait = transport.samples_per_bar / self.shadow.rate if transport.quantize != 'off' else 0.0
+        ready_at = time.monotonic() + wait + 0.1
+
+        def read_audio():
+            view = self.loop_view(loop_id)
+            length = self.shadow.loop_controls.loop_lengths.get(loop_id)
+            if view is None or length is None:
+                return None
+            return view.reshape(-1)[:length].copy()
+
+        return self.shadow.tempo.start(loop_id, read_audio,
+                                       ready=lambda: time.monotonic() >= ready_at)
+
+    def loop_overview(self, loop_id):
+        """Peak overview built from the engine's shared buffer.
+
+        The engine only ever writes at a loop's play position, so the rows
+        the playhead has swept since the last call are the ones refreshed.
+        """
+        view = self.loop_view(loop_id)
+        cached = self._overviews.get(loop_id)
+        if view is None:
+            # A compressed loop can't change, so its last overview still holds
+            return cached[1] if cached is not None else None
+        generation = int(self._status_row(loop_id)[2])
+        position = self.loop_positions().get(loop_id, 0)
+        if cached is None or cached[0] != generation:
+            overview = PeakPyramid(len(view), self.shadow.chunk)
+        else:
+            _, overview, last = cached
+            swept = (np.arange(last, last + (position - last) % len(view) + 1)) % len(view)
+            overview.dirty[swept] = True
+        overview.refresh(view)
+        self._overviews[loop_id] = (generation, overview, position)
+        return overview
+
+    def _status_row(self, loop_id):
+        status = self._read_status()
+        count = int(status[0, 1])
+        for row in status[1:count + 1]:
+            if int(row[0]) == loop_id:
+                return row
+        return None
+
+    def loop_view(self, loop_id):
+        """Read-only view of a loop's audio in the engine, or None"""
+        row = self._status_row(loop_id)
+        if row is None:
+            return None
+        if row[2] < 0:
+            # Compressed in the engine; let go of the old buffer so it can be unmapped
+            self._views = {k: v for k, v in self._views.items() if k[0] != loop_id}
+            return None
+        key = (loop_id, int(row[2]))
+        if key not in self._views:
+            try:
+                segment = shared_memory.SharedMemory(
+                    name=SharedLoopBuffers.segment_name(self.session, *key))
+            except FileNotFoundError:
+                return None
+            view = np.ndarray((int(row[1]), self.shadow.chunk), dtype=self.shadow.format,
+                              buffer=segment.buf)
+            view.flags.writeable = False
+            self._views = {k: v for k, v in self._views.items() if k[0] != loop_id}
+            self._views[key] = (segment, view)
+        return self._views[key][1]
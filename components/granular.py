@@ -0,0 +1,115 @@
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+_windows = {}
+
+
+def hann_rows(length, chunk):
+    """Sliding rows over a Hann window of `length` samples padded with `chunk` zeros each side.
+
+    Row `age + chunk` holds the window for one block of a grain that is
+    `age` samples old at the block start (zero before and after the grain).
+    """
+    key = (length, chunk)
+    rows = _windows.get(key)
+    if rows is None:
+        padded = np.zeros(length + 2 * chunk, dtype=np.float32)
+        padded[chunk:chunk + length] = np.hanning(length + 2)[1:-1]
+        if len(_windows) >= 32:
+            _windows.clear()
+        rows = _windows[key] = sliding_window_view(padded, chunk)
+    return rows
+
+
+class GranularVoice:
+    """Granular playback of one loop buffer.
+
+    Grains start at `position` (a fraction of the loop, scattered by
+    `spray`), last `size_ms` and play at `pitch` semitones, `density` of
+    them per second. Every active grain is rendered together: a (grains,
+    chunk) array of read positions is built with index arithmetic, the
+    loop is gathered at both interpolation taps in one `take` each,
+    windowed with rows of a cached Hann table and summed over grains.
+    """
+    def __init__(self, rate, chunk, position=0.0, size_ms=80.0, pitch=0.0, density=40.0,
+                 spray=0.05, max_grains=512, seed=None):
+        self.rate = rate
+        self.chunk = chunk
+        self.position = position
+        self.size_ms = size_ms
+        self.pitch = pitch
+        self.density = density
+        self.spray = spray
+        self.max_grains = max_grains
+        self.rng = np.random.default_rng(seed)
+        # Active grains: start (loop sample), age at the block start (negative
+        # before the grain begins), length and playback rate
+        self.starts = np.zeros(0)
+        self.ages = np.zeros(0, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.rates = np.zeros(0)
+        self._due = 0.0
+        self._time = np.arange(chunk, dtype=np.int64)
+
+    def _spawn(self, loop_length):
+        self._due += self.density * self.chunk / self.rate
+        count = min(int(self._due), self.max_grains - len(self.ages))
+        self._due -= int(self._due)
+        if count <= 0:
+            return
+        centre = self.position * loop_length
+        starts = (centre + self.rng.uniform(-0.5, 0.5, count) * self.spray * loop_length) % loop_length
+        onsets = np.sort(self.rng.integers(0, self.chunk, count))
+        length = max(2, int(self.size_ms * self.rate / 1000))
+        self.starts = np.concatenate((self.starts, starts))
+        self.ages = np.concatenate((self.ages, -onsets))
+        self.lengths = np.concatenate((self.lengths, np.full(count, length, dtype=np.int64)))
+        self.rates = np.concatenate((self.rates, np.full(count, 2 ** (self.pitch / 12.0))))
+
+    def render(self, flat, loop_length, out):
+        """Sum this block's grains from a flat loop buffer into `out`"""
+        self._spawn(loop_length)
+        if not len(self.ages):
+            out[:] = 0
+            return out
+
+        # Read position of every grain at every sample of the block; samples
+        # before a grain starts read its first sample and are windowed out.
+        # Offsets stay small, so float32 keeps sub-sample precision even in
+        # long loops; the whole part of each start is added as an integer
+        whole = np.floor(self.starts)
+        local = np.maximum(self.ages[:, None] + self._time, 0).astype(np.float32)
+        local *= self.rates[:, None]
+        local += (self.starts - whole).astype(np.float32)[:, None]
+        taps = local.astype(np.int32)
+        local -= taps  # Now the fraction between the two taps
+        taps += whole.astype(np.int32)[:, None]
+        np.remainder(taps, loop_length, out=taps)
+        samples = flat.take(taps).astype(np.float32, copy=False)
+        taps += 1
+        taps[taps == loop_length] = 0
+        following = flat.take(taps).astype(np.float32, copy=False)
+        following -= samples
+        following *= local
+        samples += following
+
+        weights = np.empty_like(samples)
+        for length in np.unique(self.lengths).tolist():
+            group = self.lengths == length
+            rows = hann_rows(length, self.chunk)
+            weights[group] = rows[self.ages[group] + self.chunk]
+
+        # Overlapping grains add up; keep the sum near the loop's level
+        overlap = max(1.0, self.density * self.size_ms / 1000)
+        np.einsum('gt,gt->t', samples, weights, out=out)
+        out *= 1.0 / np.sqrt(overlap)
+
+        self.ages += self.chunk
+        alive = self.ages < self.lengths
+        if not alive.all():
+            self.starts = self.starts[alive]
+            self.ages = self.ages[alive]
+            self.lengths = self.lengths[alive]
+            self.rates = self.rates[alive]
+        return out
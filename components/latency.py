@@ -0,0 +1,116 @@
+import math
+import threading
+import numpy as np
+
+
+def chirp(rate, seconds=0.5, start_hz=200.0, end_hz=8000.0, level=0.5, fade_ms=10.0):
+    """Exponential sine sweep with short fades; its autocorrelation is one sharp peak"""
+    count = int(seconds * rate)
+    t = np.arange(count) / rate
+    growth = math.log(end_hz / start_hz)
+    phase = 2 * np.pi * start_hz * seconds / growth * (np.exp(t * growth / seconds) - 1)
+    signal = level * np.sin(phase)
+    fade = min(count // 2, int(fade_ms * rate / 1000))
+    if fade:
+        ramp = np.hanning(2 * fade)
+        signal[:fade] *= ramp[:fade]
+        signal[-fade:] *= ramp[fade:]
+    return signal.astype(np.float32)
+
+
+def measure_latency(played, recorded):
+    """(lag in samples, confidence 0-1) of `played` within `recorded`.
+
+    The lag is the peak of the FFT cross-correlation; confidence is that
+    peak normalized by both signals' energy, so it is near 1 for a clean
+    loopback and falls with noise or a weak return.
+    """
+    played = np.asarray(played, dtype=np.float64)
+    recorded = np.asarray(recorded, dtype=np.float64)
+    size = 1 << (len(played) + len(recorded) - 1).bit_length()
+    correlation = np.fft.irfft(np.fft.rfft(recorded, size) * np.conj(np.fft.rfft(played, size)), size)
+    # Only non-negative lags that leave the whole sweep inside the recording
+    correlation = np.abs(correlation[:len(recorded) - len(played) + 1])
+    lag = int(np.argmax(correlation))
+    window = recorded[lag:lag + len(played)]
+    energy = math.sqrt(float(np.dot(played, played)) * float(np.dot(window, window)))
+    return lag, (correlation[lag] / energy if energy > 0 else 0.0)
+
+
+class LatencyCalibrator:
+    """Plays a test chirp through the engine and finds it in the input.
+
+    The engine hands it every block: it replaces the output with the next
+    block of the chirp (then silence) and collects the input consumed in
+    the same block. Both are on the engine's block clock, so the measured
+    lag is exactly how far recorded input trails the playback it was made
+    against, including both stream buffers and the hand-over between them.
+
+    The cross-correlation runs on its own thread once the last block is
+    in; `measured` turns True when `latency` and `confidence` are final.
+    """
+    def __init__(self, rate, chunk, max_latency=1.0, min_confidence=0.3):
+        self.chunk = chunk
+        self.min_confidence = min_confidence
+        self.signal = chirp(rate)
+        self.blocks = -(-(len(self.signal) + int(max_latency * rate)) // chunk)
+        self.played = np.zeros(self.blocks * chunk, dtype=np.float32)
+        self.played[:len(self.signal)] = self.signal
+        self.captured = np.zeros(self.blocks * chunk, dtype=np.float32)
+        self.block = 0
+        self.latency = None  # Samples, once measured
+        self.confidence = 0.0
+        self.measured = False
+        self._captured = threading.Event()
+        threading.Thread(target=self._analyze, daemon=True).start()
+
+    @property
+    def done(self):
+        return self.block >= self.blocks
+
+    def process(self, inputs, out):
+        """Collect the input blocks taken this block and fill `out` with output.
+
+        `inputs` is [(age, block)], possibly empty; a block `age` blocks
+        late is stored that many blocks back.
+        """
+        start = self.block * self.chunk
+        for age, indata in inputs:
+            at = start - age * self.chunk
+            if 0 <= at <= len(self.captured) - self.chunk:
+                self.captured[at:at + self.chunk] = indata
+        out[:] = self.played[start:start + self.chunk]
+        self.block += 1
+        if self.done:
+            self._captured.set()
+        return out
+
+    def _analyze(self):
+        self._captured.wait()
+        lag, confidence = measure_latency(self.signal, self.captured)
+        self.confidence = confidence
+        if confidence >= self.min_confidence:
+            self.latency = lag
+        self.measured = True
+
+
+class LoopbackDevice:
+    """Stand-in for an audio interface with its output wired to its input.
+
+    `transfer` takes the block the engine plays and returns the block the
+    input stream delivers at the same time: the output `latency` samples
+    earlier, scaled by `gain` with optional noise.
+    """
+    def __init__(self, latency, gain=1.0, noise=0.0, seed=None):
+        self.gain = gain
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.line = np.zeros(latency, dtype=np.float32)
+
+    def transfer(self, block):
+        line = np.concatenate((self.line, np.asarray(block, dtype=np.float32)))
+        heard, self.line = line[:len(block)], line[len(block):]
+        heard = self.gain * heard
+        if self.noise:
+            heard += self.noise * self.rng.standard_normal(len(heard))
+        return heard.astype(np.float32)
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+def soft_clip(block, knee=0.9):
+    """Saturate samples beyond ±knee smoothly towards ±1.0, in place.
+
+    Samples below the knee pass unchanged, so a block that stays under it
+    costs only its peak check. Above it a tanh curve continues from the
+    knee with slope 1 and never reaches full scale.
+    """
+    if not block.size or max(block.max(), -block.min()) <= knee:
+        return block
+    over = np.abs(block) > knee
+    values = block[over]
+    room = 1.0 - knee
+    block[over] = np.copysign(knee + room * np.tanh((np.abs(values) - knee) / room), values)
+    return block
+
+
+class Limiter:
+    """Peak limiter for the master bus, with a soft-clipped ceiling.
+
+    The mixer has the whole block before it is played, so the gain for the
+    block's peak is reached within its first `attack` samples: a one-block
+    look-ahead that adds no latency. The gain recovers over `release`
+    seconds. Below the threshold nothing is done beyond the caller's peak
+    measurement, and the few samples the attack ramp lets past the
+    threshold are soft-clipped under full scale.
+    """
+    def __init__(self, rate, chunk, threshold=0.9, release=0.2, attack=64, dtype='float32'):
+        self.threshold = threshold
+        self.gain = 1.0
+        # Fraction of the remaining gain reduction recovered per block
+        self.recovery = 1.0 - np.exp(-chunk / (release * rate))
+        self._ramp = np.minimum(1.0, np.arange(1, chunk + 1) / attack).astype(dtype)
+        self._gains = np.empty(chunk, dtype=dtype)
+
+    def process(self, block, peak=None):
+        """Limit a mixed block in place; `peak` is its absolute peak if already known"""
+        if peak is None:
+            peak = max(block.max(), -block.min())
+        target = min(1.0, self.threshold / peak) if peak > 0 else 1.0
+        if target < self.gain:
+            gain = target
+        else:
+            gain = self.gain + (target - self.gain) * self.recovery
+            if gain > 0.9999:
+                gain = 1.0
+        if gain == 1.0 and self.gain == 1.0:
+            return block
+
+        gains = self._gains[:len(block)]
+        np.multiply(self._ramp[:len(block)], gain - self.gain, out=gains)
+        gains += self.gain
+        block *= gains
+        self.gain = gain
+        return soft_clip(block, self.threshold)
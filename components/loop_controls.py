@@ -1,12 +1,40 @@
 import numpy as np
+from components.limiter import soft_clip
+from components.waveform_cache import PeakPyramid
+from components.varispeed import Interpolator
+from components.granular import GranularVoice
 
 class LoopControls:
-    def __init__(self, rate, chunk, format, initial_lengths):
+    def __init__(self, rate, chunk, format, initial_lengths, input_channels=1, allocator=None,
+                 length_to_samples=None, history=None):
         self.rate = rate
         self.chunk = chunk
         self.format = format
-        
+        self.input_channels = input_channels
+        # allocator(loop_id, shape, dtype) -> zeroed array; lets loop audio live
+        # in shared memory when the engine runs in its own process
+        self.allocator = allocator or (lambda loop_id, shape, dtype: np.zeros(shape, dtype=dtype))
+        # length_to_samples(seconds) -> loop length; lets the transport snap lengths to bars
+        self.length_to_samples = length_to_samples or (lambda seconds: int(round(seconds * rate)))
+
+        # Audio is stored as (rows, chunk) but loops are played at sample
+        # resolution: loop_lengths/loop_offsets are in samples, and the last
+        # row is only partly used. loop_sizes/loop_positions are the row count
+        # and the row under the play position, for the overview and meters.
         self.loops = {}
+        self.overviews = {}  # loop_id -> PeakPyramid for the waveform display
+        self.loop_lengths = {}
+        self.loop_offsets = {}  # Fractional while a loop plays at a rate other than 1
+        self.loop_rates = {}  # Playback rate; negative plays in reverse
+        self.interpolator = Interpolator(chunk, dtype=format)
+        self.granular = {}  # loop_id -> GranularVoice for loops playing grains
+        self.automation = {}  # loop_id -> {'<effect>.<parameter>': AutomationLane}
+        # Optional UndoHistory; rows are saved to it before they are first written in a take
+        self.history = history
+        # Idle loops held compressed (see components.loop_store); their entry in
+        # `loops` is a read-only placeholder of zeros until they are expanded
+        self.compressed = {}
+        self.versions = {}  # Bumped on every write, so stale compressions are dropped
         self.loop_sizes = {}
         self.loop_positions = {}
         self.muted_loops = {}
@@ -20,50 +48,216 @@ class LoopControls:
         self.is_recording = False
         self.is_overdubbing = False
 
+        # Loop id armed on each input channel (-1 = not armed). Plain int array
+        # so the input callback can read it without taking the looper lock.
+        self.input_arms = np.full(input_channels, -1, dtype=np.int32)
+
     def calculate_loop_sizes(self, loop_lengths):
-        return [int(self.rate / self.chunk * length) for length in loop_lengths]
+        return [-(-self.samples_for_length(length) // self.chunk) for length in loop_lengths]
+
+    def samples_for_length(self, length):
+        # At least one block so a block read wraps the loop at most once
+        return max(self.chunk, self.length_to_samples(length))
 
     def update_loop_length(self, loop_id, length):
         if loop_id not in self.loops:
             return
-            
-        new_size = int(self.rate / self.chunk * length)
-        current_loop = self.loops[loop_id]
-        current_size = self.loop_sizes[loop_id]
+        self.resize_loop(loop_id, self.samples_for_length(length))
 
-        new_loop = np.zeros((new_size, self.chunk), dtype=self.format)
+    def resize_loop(self, loop_id, samples, offset=0):
+        """Give a loop an exact length in samples, repeating or cutting its audio"""
+        new_size = -(-samples // self.chunk)
+        source = self.loops[loop_id]
+        compressed = self.compressed.pop(loop_id, None)
+        if compressed is not None:
+            source = compressed.decompress_into(np.zeros(compressed.shape, dtype=self.format))
+        current = source.reshape(-1)[:self.loop_lengths[loop_id]]
 
-        if new_size < current_size:
-            new_loop[:new_size] = current_loop[:new_size]
-        else:
-            num_repeats = new_size // current_size
-            remainder = new_size % current_size
+        new_loop = self.allocator(loop_id, (new_size, self.chunk), self.format)
+        self._forget_history(loop_id)
+        # np.resize repeats the old audio to fill a longer loop
+        target = new_loop.reshape(-1)[:samples]
+        target[:] = np.resize(current, len(target))
 
-            for i in range(num_repeats):
-                new_loop[i*current_size:(i+1)*current_size] = current_loop
+        self.loops[loop_id] = new_loop
+        self.overviews[loop_id] = PeakPyramid(new_size, self.chunk)
+        self.loop_lengths[loop_id] = samples
+        self.loop_sizes[loop_id] = new_size
+        self.versions[loop_id] += 1
+        self.set_offset(loop_id, offset)
 
-            if remainder > 0:
-                new_loop[num_repeats*current_size:] = current_loop[:remainder]
+    def install_loop(self, loop_id, audio):
+        """Replace a loop's audio with `audio`, keeping the play head at the same point in it"""
+        samples = len(audio)
+        new_size = -(-samples // self.chunk)
+        new_loop = self.allocator(loop_id, (new_size, self.chunk), self.format)
+        self._forget_history(loop_id)
+        new_loop.reshape(-1)[:samples] = audio
+        fraction = self.loop_offsets[loop_id] / self.loop_lengths[loop_id]
 
         self.loops[loop_id] = new_loop
+        self.overviews[loop_id] = PeakPyramid(new_size, self.chunk)
+        self.loop_lengths[loop_id] = samples
         self.loop_sizes[loop_id] = new_size
-        self.loop_positions[loop_id] = 0
+        self.versions[loop_id] += 1
+        self.compressed.pop(loop_id, None)
+        self.set_offset(loop_id, int(fraction * samples))
+
+    def compress(self, loop_id, compressed):
+        """Swap a loop's buffer for its compressed form and a zero placeholder"""
+        self.compressed[loop_id] = compressed
+        placeholder = np.zeros(self.chunk, dtype=self.format)
+        placeholder.flags.writeable = False
+        self.loops[loop_id] = np.broadcast_to(placeholder, compressed.shape)
+
+    def expand(self, loop_id, dense):
+        """Put a decompressed buffer back in place of the placeholder"""
+        self.loops[loop_id] = dense
+        del self.compressed[loop_id]
+
+    def memory_stats(self):
+        """(bytes held by loop audio, bytes saved by compression)"""
+        held = saved = 0
+        for loop_id, loop in list(self.loops.items()):
+            compressed = self.compressed.get(loop_id)
+            if compressed is None:
+                held += loop.nbytes
+            else:
+                held += compressed.nbytes
+                saved += loop.nbytes - compressed.nbytes
+        return held, saved
+
+    def _forget_history(self, loop_id):
+        # Saved rows refer to the old buffer's layout
+        if self.history is not None:
+            self.history.forget(loop_id)
+
+    def set_offset(self, loop_id, offset):
+        offset %= self.loop_lengths[loop_id]
+        self.loop_offsets[loop_id] = offset
+        self.loop_positions[loop_id] = int(offset) // self.chunk
+
+    def set_rate(self, loop_id, rate):
+        if loop_id in self.loop_rates:
+            self.loop_rates[loop_id] = float(rate)
+
+    def advance(self, loop_id, frames, rate=None):
+        """Move a loop's play head on by `frames` output samples at its rate (or `rate`)"""
+        if rate is None:
+            rate = self.loop_rates[loop_id]
+        step = frames if rate == 1.0 else frames * rate
+        self.set_offset(loop_id, self.loop_offsets[loop_id] + step)
+
+    def set_granular(self, loop_id, enabled):
+        """Switch a loop between normal and granular playback"""
+        if not enabled:
+            self.granular.pop(loop_id, None)
+        elif loop_id in self.loops and loop_id not in self.granular:
+            self.granular[loop_id] = GranularVoice(self.rate, self.chunk)
+
+    def play_block(self, loop_id, out):
+        """Read the block a loop plays next, interpolating unless it runs at rate 1"""
+        offset = self.loop_offsets[loop_id]
+        rate = self.loop_rates[loop_id]
+        if loop_id in self.compressed:
+            out[:] = 0  # Only silent loops stay compressed while audible
+            return out
+        voice = self.granular.get(loop_id)
+        if voice is not None:
+            return voice.render(self.loops[loop_id].reshape(-1), self.loop_lengths[loop_id], out)
+        if rate == 1.0 and offset == int(offset):
+            return self.read_block(loop_id, offset, out)
+        return self.interpolator.read(self.loops[loop_id].reshape(-1), self.loop_lengths[loop_id],
+                                      offset, rate, out)
+
+    def read_block(self, loop_id, offset, out):
+        """Copy len(out) samples starting at `offset`, wrapping at the loop end"""
+        if loop_id in self.compressed:
+            out[:] = 0
+            return out
+        flat = self.loops[loop_id].reshape(-1)
+        length = self.loop_lengths[loop_id]
+        offset = int(offset) % length
+        first = min(len(out), length - offset)
+        out[:first] = flat[offset:offset + first]
+        out[first:] = flat[:len(out) - first]
+        return out
+
+    def write_block(self, loop_id, offset, block, overdub=False, clip=False):
+        """Write (or mix) a block at `offset`, wrapping at the loop end.
+
+        Overdub sums, and blocks written with `clip` (effect output), are
+        soft-clipped; anything else is written as is, so audio that was
+        already clipped isn't saturated a second time.
+        """
+        self.versions[loop_id] += 1
+        flat = self.loops[loop_id].reshape(-1)
+        length = self.loop_lengths[loop_id]
+        offset = int(offset) % length
+        first = min(len(block), length - offset)
+        for start, part in ((offset, block[:first]), (0, block[first:])):
+            if not len(part):
+                continue
+            rows = range(start // self.chunk, (start + len(part) - 1) // self.chunk + 1)
+            if self.history is not None:
+                self.history.save_rows(loop_id, rows, self.loops[loop_id])
+            target = flat[start:start + len(part)]
+            if overdub:
+                np.add(target, part, out=target, casting='unsafe')
+            else:
+                target[:] = part
+            if overdub or clip:
+                # Sums and effect output can exceed full scale; keep loop audio under it
+                soft_clip(target)
+            for row in rows:
+                self.mark_written(loop_id, row)
+
+    def arm_input(self, channel, loop_id):
+        """Arm an input channel to record into a loop (one channel per loop)"""
+        if not 0 <= channel < self.input_channels or loop_id not in self.loops:
+            return
+        self.input_arms[self.input_arms == loop_id] = -1
+        self.input_arms[channel] = loop_id
+
+    def disarm_input(self, channel):
+        if 0 <= channel < self.input_channels:
+            self.input_arms[channel] = -1
+
+    def armed_channel(self, loop_id):
+        """Input channel armed into a loop, or None"""
+        channels = np.flatnonzero(self.input_arms == loop_id)
+        return int(channels[0]) if channels.size else None
 
     def clear_loop(self, loop_id):
         if loop_id in self.loops:
+            if self.history is not None:
+                self.history.save_rows(loop_id, range(len(self.loops[loop_id])), self.loops[loop_id])
             self.loops[loop_id].fill(0)
+            self.overviews[loop_id].mark_all()
+            self.versions[loop_id] += 1
+
+    def mark_written(self, loop_id, row):
+        """Flag a row whose audio changed so the overview picks it up"""
+        self.overviews[loop_id].mark(row)
 
-    def _add_loop(self, length):
-        loop_id = self.next_id
-        size = int(self.rate / self.chunk * length)
+    def _add_loop(self, length, loop_id=None):
+        if loop_id is None:
+            loop_id = self.next_id
+        samples = self.samples_for_length(length)
+        size = -(-samples // self.chunk)
         
-        self.loops[loop_id] = np.zeros((size, self.chunk), dtype=self.format)
+        self.loops[loop_id] = self.allocator(loop_id, (size, self.chunk), self.format)
+        self.overviews[loop_id] = PeakPyramid(size, self.chunk)
+        self.loop_lengths[loop_id] = samples
+        self.loop_offsets[loop_id] = 0
+        self.loop_rates[loop_id] = 1.0
+        self.versions[loop_id] = 0
         self.loop_sizes[loop_id] = size
         self.loop_positions[loop_id] = 0
         self.muted_loops[loop_id] = False
         self.soloed_loops[loop_id] = False
         
-        self.next_id += 1
+        self.next_id = max(self.next_id, loop_id + 1)
         return loop_id
 
     def delete_loop(self, loop_id):
@@ -72,10 +266,20 @@ class LoopControls:
             
         # Clean up all references
         del self.loops[loop_id]
+        del self.overviews[loop_id]
+        del self.loop_lengths[loop_id]
+        del self.loop_offsets[loop_id]
+        del self.loop_rates[loop_id]
+        del self.versions[loop_id]
+        self.compressed.pop(loop_id, None)
+        self.granular.pop(loop_id, None)
+        self.automation.pop(loop_id, None)
         del self.loop_sizes[loop_id]
         del self.loop_positions[loop_id]
         del self.muted_loops[loop_id]
         del self.soloed_loops[loop_id]
+        self.input_arms[self.input_arms == loop_id] = -1
+        self._forget_history(loop_id)
         
         # Update current selection if needed
         if self.current_loop_id == loop_id:
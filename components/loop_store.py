@@ -0,0 +1,145 @@
+import collections
+import threading
+import time
+import zlib
+import numpy as np
+
+CODECS = ('zlib', 'int16', 'float16')
+
+
+class CompressedLoop:
+    """A loop's audio with silent rows reduced to markers and the rest packed.
+
+    `silent` flags rows that are all zero; only the other rows are kept,
+    zlib-compressed as they are (lossless), or as 16-bit PCM or half floats
+    (smaller, but re-quantized on every compression).
+    """
+    def __init__(self, loop, codec='zlib'):
+        self.shape = loop.shape
+        self.dtype = loop.dtype
+        self.codec = codec
+        self.silent = ~loop.any(axis=1)
+        rows = loop[~self.silent]
+        if codec == 'int16':
+            self.payload = np.rint(np.clip(rows, -1.0, 1.0) * 32767).astype(np.int16)
+        elif codec == 'float16':
+            self.payload = rows.astype(np.float16)
+        else:
+            self.payload = zlib.compress(np.ascontiguousarray(rows).tobytes(), 1)
+
+    @property
+    def nbytes(self):
+        size = self.payload.nbytes if isinstance(self.payload, np.ndarray) else len(self.payload)
+        return size + self.silent.nbytes
+
+    @property
+    def is_silent(self):
+        return bool(self.silent.all())
+
+    def decompress_into(self, out):
+        """Fill a zeroed (rows, chunk) array"""
+        if self.codec == 'int16':
+            rows = self.payload.astype(self.dtype) / 32767
+        elif self.codec == 'float16':
+            rows = self.payload.astype(self.dtype)
+        else:
+            rows = np.frombuffer(zlib.decompress(self.payload), dtype=self.dtype).reshape(-1, self.shape[1])
+        out[~self.silent] = rows
+        return out
+
+
+class LoopStore:
+    """Background tier that compresses idle loops and expands them on demand.
+
+    A loop that has been muted (or entirely silent) and not written for
+    `idle_seconds`, and that no input, effect or selection can write to, is
+    compressed off the audio thread and swapped for a read-only placeholder
+    by the mixer. Anything that needs its audio again asks for an expansion,
+    which is also done here; the mixer installs the dense buffer at a block
+    boundary, so playback never waits on either direction.
+    """
+    def __init__(self, looper, codec='zlib', idle_seconds=2.0, interval=0.5):
+        self.looper = looper
+        self.codec = codec
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.compressed_ready = collections.deque()  # (loop_id, version, CompressedLoop)
+        self.expanded_ready = collections.deque()  # (loop_id, dense array)
+        self._expand = collections.deque()
+        self._expanding = set()
+        self._idle_since = {}
+        self._wake = threading.Event()
+        self.is_running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def request_expand(self, loop_id):
+        """Ask for a compressed loop's audio back (called with the looper lock held)"""
+        if loop_id not in self._expanding:
+            self._expanding.add(loop_id)
+            self._expand.append(loop_id)
+            self._wake.set()
+
+    def installed(self, loop_id):
+        self._expanding.discard(loop_id)
+
+    def _run(self):
+        while self.is_running:
+            try:
+                while self._expand:
+                    self._expand_loop(self._expand.popleft())
+                self._compress_idle()
+            except Exception as e:
+                print(f"Loop store error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _expand_loop(self, loop_id):
+        controls = self.looper.loop_controls
+        compressed = controls.compressed.get(loop_id)
+        if compressed is None:
+            self._expanding.discard(loop_id)
+            return
+        # Allocated and filled without the looper lock; the mixer only swaps it in
+        dense = controls.allocator(loop_id, compressed.shape, compressed.dtype)
+        self.expanded_ready.append((loop_id, compressed.decompress_into(dense)))
+
+    def _compress_idle(self):
+        looper = self.looper
+        controls = looper.loop_controls
+        now = time.monotonic()
+        candidates = []
+        with looper.lock:
+            busy = looper.loops_in_use()
+            for loop_id, loop in controls.loops.items():
+                if loop_id in busy or loop_id in controls.compressed or loop_id in self._expanding:
+                    self._idle_since.pop(loop_id, None)
+                    continue
+                since = self._idle_since.setdefault(loop_id, (now, controls.versions[loop_id]))
+                if since[1] != controls.versions[loop_id]:
+                    self._idle_since[loop_id] = (now, controls.versions[loop_id])
+                elif now - since[0] >= self.idle_seconds:
+                    candidates.append((loop_id, controls.versions[loop_id], loop,
+                                       controls.muted_loops.get(loop_id, False)))
+                    self._idle_since[loop_id] = (now, controls.versions[loop_id])
+
+        # Copied and scanned without the lock: a write meanwhile bumps the
+        # version, and the mixer then drops this compression
+        for loop_id, version, loop, muted in candidates:
+            audio = loop.copy()
+            # A loop that can still be heard is only stored while it is all silence
+            if muted or not audio.any():
+                self.compressed_ready.append((loop_id, version, CompressedLoop(audio, self.codec)))
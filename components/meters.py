@@ -0,0 +1,76 @@
+import time
+import numpy as np
+
+
+class MeterBank:
+    """Per-loop peak/RMS and play positions published by the mixer each block.
+
+    Row 0 is the master bus [loop count, peak, rms, 0]; rows 1.. hold
+    [loop_id, peak, rms, position as a fraction of the loop]. The mixer
+    fills a private copy as it goes and publishes the block in `end`,
+    bracketed by a sequence counter that is odd only for that copy, so
+    readers copy without locks and seldom see a write in progress; a torn
+    read is retried after a short wait. The backing buffer can be shared
+    memory for an engine in another process.
+    """
+    def __init__(self, max_loops=64, buffer=None):
+        self.max_loops = max_loops
+        if buffer is None:
+            buffer = bytearray(self.nbytes(max_loops))
+        self.sequence = np.frombuffer(buffer, dtype=np.int64, count=1)
+        self.values = np.frombuffer(buffer, dtype=np.float64, count=(max_loops + 1) * 4,
+                                    offset=8).reshape(max_loops + 1, 4)
+        self._pending = np.zeros_like(self.values)  # The block being mixed
+        self._count = 0
+        self._last = None  # Last consistent read
+
+    @staticmethod
+    def nbytes(max_loops):
+        return 8 + (max_loops + 1) * 4 * 8
+
+    def begin(self):
+        """Start a block; nothing is published until `end`"""
+        self._count = 0
+
+    def set_loop(self, loop_id, peak, sum_squares, frames, position):
+        """Record one loop's block; peak and sum of squares come from the mix pass"""
+        if self._count >= self.max_loops:
+            return
+        self._count += 1
+        self._pending[self._count] = (loop_id, peak, np.sqrt(sum_squares / frames), position)
+
+    def end(self, peak, sum_squares, frames):
+        """Publish the block: the master level and every loop set since `begin`"""
+        count = self._count
+        self._pending[0] = (count, peak, np.sqrt(sum_squares / frames), 0.0)
+        self.sequence[0] += 1
+        self.values[:count + 1] = self._pending[:count + 1]
+        self.sequence[0] += 1
+
+    def read(self, retries=3, wait=0.0001):
+        """Consistent copy of the latest block's values.
+
+        A read that overlaps a publish is retried `wait` seconds later; if
+        every retry tears, the last consistent copy is returned (None
+        before the first).
+        """
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(wait)
+            start = int(self.sequence[0])
+            if start % 2:
+                continue
+            values = self.values.copy()
+            if int(self.sequence[0]) == start:
+                self._last = values
+                return values
+        return self._last
+
+    def snapshot(self):
+        """(master (peak, rms), {loop_id: (peak, rms, position)}) or None"""
+        values = self.read()
+        if values is None:
+            return None
+        count = int(values[0, 0])
+        loops = {int(row[0]): (row[1], row[2], row[3]) for row in values[1:count + 1]}
+        return (values[0, 1], values[0, 2]), loops
@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+from audiolooper import EFFECT_PREFIXES
+
+# MIDI clock runs at 24 ticks per quarter note
+PPQN = 24
+
+# (kind, number) -> (action, argument). Notes and CCs trigger on press
+# (velocity > 0, CC value >= 64); 'select_loop' picks by position among the
+# current loops, and from a CC mapped with no argument, by the CC value.
+DEFAULT_MAPPING = {
+    ('note', 36): ('toggle_recording', None),
+    ('note', 37): ('toggle_overdub', None),
+    ('note', 38): ('undo', None),
+    ('note', 39): ('redo', None),
+    **{('note', 40 + index): ('select_loop', index) for index in range(8)},
+    ('cc', 64): ('toggle_recording', None),  # Sustain pedal
+    ('cc', 65): ('toggle_overdub', None),
+    **{('cc', 20 + index): ('toggle_bypass', effect) for index, effect in
+       enumerate(['gate', 'pitch_shift', 'reverb', 'convolution', 'filter', 'delay'])},
+}
+
+
+def decode(data):
+    """A mido-style message (type and fields) from raw MIDI bytes"""
+    status = data[0]
+    if status < 0xF0:
+        kind, channel = status & 0xF0, status & 0x0F
+        if kind == 0x90 and data[2] > 0:
+            return SimpleNamespace(type='note_on', channel=channel, note=data[1], velocity=data[2])
+        if kind in (0x80, 0x90):
+            return SimpleNamespace(type='note_off', channel=channel, note=data[1], velocity=data[2])
+        if kind == 0xB0:
+            return SimpleNamespace(type='control_change', channel=channel, control=data[1], value=data[2])
+        return SimpleNamespace(type='other')
+    if status == 0xF2:
+        return SimpleNamespace(type='songpos', pos=data[1] | data[2] << 7)
+    return SimpleNamespace(type={0xF8: 'clock', 0xFA: 'start', 0xFB: 'continue',
+                                 0xFC: 'stop'}.get(status, 'other'))
+
+
+class ClockFilter:
+    """Tempo and phase of an incoming MIDI clock from jittery tick times.
+
+    Tick time is fitted against tick number by least squares over the last
+    `window` ticks, which averages out per-tick jitter (USB MIDI is often
+    off by a millisecond or more, a twentieth of a tick at 120 BPM). A tick
+    further than `tolerance` periods from the fit (a tempo jump, dropped
+    ticks, a restarted clock) restarts the fit from that tick.
+    """
+    def __init__(self, window=4 * 4 * PPQN, tolerance=0.5):
+        self.tolerance = tolerance
+        self.ticks = deque(maxlen=window)  # (tick number, time)
+        self.count = 0  # Ticks received
+        self.period = None  # Seconds per tick, once fitted
+        self._intercept = 0.0
+
+    def tick(self, timestamp):
+        """Add the next tick; returns its number"""
+        number = self.count
+        self.count += 1
+        # Judged once the fit spans a sixteenth note, so early ticks' jitter can't trip it
+        if len(self.ticks) >= PPQN // 4 and abs(timestamp - self.time_of(number)) > self.tolerance * self.period:
+            self.ticks.clear()
+            self.period = None
+        self.ticks.append((number, timestamp))
+        if len(self.ticks) >= 2:
+            numbers, times = np.array(self.ticks).T
+            mean = numbers.mean()
+            numbers -= mean
+            self.period = float(np.dot(numbers, times - times.mean()) / np.dot(numbers, numbers))
+            self._intercept = float(times.mean()) - self.period * mean
+        return number
+
+    def time_of(self, number):
+        """Fitted time of tick `number`"""
+        return self._intercept + self.period * number
+
+    @property
+    def bpm(self):
+        return None if self.period is None else 60.0 / (self.period * PPQN)
+
+
+class MidiController:
+    """MIDI control mapping and clock sync, on its own thread.
+
+    Notes and CCs are mapped (see DEFAULT_MAPPING) onto looper commands.
+    Incoming clock is smoothed by a ClockFilter, and once per beat the
+    fitted tempo and the time of the current bar's downbeat are posted as
+    'clock.tempo' and 'clock.downbeat', so the transport's bar grid (and
+    with it quantized record toggles and bar-length loops) follows the
+    master. Everything goes through `looper.post_command`, and toggles
+    work from the looper's state rather than the controller's own, so they
+    stay in step with the GUI and OSC.
+
+    `port` is anything that yields messages: a mido input port, or any
+    iterable of mido-style messages or raw byte lists, which stands in for
+    hardware. With no port, mido opens `port_name` (or the first input;
+    `virtual=True` creates a port other software can connect to).
+    Timestamps are taken from `clock` on arrival; `feed` takes explicit ones.
+    """
+    def __init__(self, looper, port=None, port_name=None, virtual=False, mapping=None,
+                 clock=time.perf_counter, min_ticks=PPQN):
+        self.looper = looper
+        self.port = port
+        self.port_name = port_name
+        self.virtual = virtual
+        self.mapping = dict(DEFAULT_MAPPING if mapping is None else mapping)
+        self.clock = clock
+        self.min_ticks = min_ticks  # Ticks in the fit before the tempo is trusted
+        self.filter = ClockFilter()
+        self.song_tick = None  # Song position in ticks (None until Start or Song Position)
+        self.playing = False  # Clock only advances the song position while playing
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        if self.port is None:
+            try:
+                import mido
+                self.port = mido.open_input(self.port_name, virtual=self.virtual)
+            except Exception as e:  # mido missing, no backend, or no such port
+                print(f"MIDI input unavailable: {e}")
+                return False
+            print(f"MIDI input: {self.port.name}")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._running = False
+        close = getattr(self.port, 'close', None)
+        if close is not None:
+            close()  # Ends a mido port's blocking iteration
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        try:
+            for message in self.port:
+                if not self._running:
+                    break
+                self.feed(message)
+        except Exception as e:
+            if self._running:
+                print(f"MIDI input error: {e}")
+
+    def feed(self, message, timestamp=None):
+        """Handle one message (mido-style or raw bytes) received at `timestamp`"""
+        if timestamp is None:
+            timestamp = self.clock()
+        if not hasattr(message, 'type'):
+            message = decode(message)
+        kind = message.type
+        if kind == 'clock':
+            self._tick(timestamp)
+        elif kind == 'start':
+            self.song_tick = 0
+            self.playing = True
+        elif kind == 'continue':
+            self.playing = True
+        elif kind == 'stop':
+            self.playing = False
+        elif kind == 'songpos':
+            self.song_tick = message.pos * PPQN // 4  # Song position counts sixteenths
+        elif kind == 'note_on' and message.velocity > 0:
+            self._trigger(self.mapping.get(('note', message.note)))
+        elif kind == 'control_change':
+            action = self.mapping.get(('cc', message.control))
+            if action is not None and action[0] == 'select_loop' and action[1] is None:
+                self._select(message.value)
+            elif message.value >= 64:
+                self._trigger(action)
+
+    def _tick(self, timestamp):
+        number = self.filter.tick(timestamp)
+        song_tick = self.song_tick if self.playing else None
+        if song_tick is not None:
+            self.song_tick += 1
+        if len(self.filter.ticks) < self.min_ticks or (number if song_tick is None else song_tick) % PPQN:
+            return
+        # Once per beat: tempo, then where this bar started on the fitted clock
+        self.looper.post_command('clock.tempo', value=self.filter.bpm)
+        if song_tick is not None:
+            ticks_per_bar = PPQN * self.looper.transport.beats_per_bar
+            self.looper.post_command('clock.downbeat',
+                                     value=self.filter.time_of(number - song_tick % ticks_per_bar))
+
+    def _trigger(self, action):
+        if action is None:
+            return
+        name, argument = action
+        if name == 'toggle_recording':
+            self.looper.post_command('record.toggle')
+        elif name == 'toggle_overdub':
+            self.looper.post_command('overdub.toggle')
+        elif name == 'toggle_bypass':
+            bypassed = getattr(self.looper, f"{EFFECT_PREFIXES[argument]}_bypass", True)
+            self.looper.post_command(f'{argument}.bypass', value=not bypassed)
+        elif name == 'select_loop':
+            self._select(argument)
+        elif name in ('undo', 'redo'):
+            self.looper.post_command(name)
+        else:
+            print(f"Unknown MIDI action {name}")
+
+    def _select(self, index):
+        loop_ids = sorted(dict(self.looper.loop_controls.loops))
+        if 0 <= index < len(loop_ids):
+            self.looper.post_command('select', loop_ids[index])
@@ -0,0 +1,221 @@
+import asyncio
+import socket
+import struct
+import threading
+
+from components.command_ring import COMMAND_CODES
+
+# Address segment -> command for per-loop addresses (/loop/<id>/<segment>)
+LOOP_COMMANDS = {
+    'mute': 'mute', 'solo': 'solo', 'clear': 'clear', 'select': 'select', 'delete': 'delete_loop',
+    'length': 'loop_length', 'rate': 'loop_rate', 'stretch': 'loop_stretch', 'arm': 'arm_input',
+    'granular': 'granular',
+}
+# One-argument commands whose argument is a loop id, not a value
+TARGET_COMMANDS = {'select', 'delete_loop', 'clear'}
+# Commands that are events, not settings: every one is delivered, in order
+EVENT_COMMANDS = {'clear', 'undo', 'redo', 'add_loop', 'delete_loop', 'calibrate',
+                  'session.start', 'session.stop', 'transport.align',
+                  'record.toggle', 'overdub.toggle'}
+
+
+def _read_string(data, offset):
+    end = data.index(b'\0', offset)
+    return data[offset:end].decode('utf-8', 'replace'), (end + 4) & ~3
+
+
+def parse_packet(data):
+    """[(address, [args])] from one OSC message or bundle (bundles are flattened)"""
+    if data.startswith(b'#bundle\0'):
+        messages = []
+        offset = 16  # Tag and time tag; contents are applied as they arrive
+        while offset + 4 <= len(data):
+            size, = struct.unpack_from('>i', data, offset)
+            messages.extend(parse_packet(data[offset + 4:offset + 4 + size]))
+            offset += 4 + size
+        return messages
+
+    address, offset = _read_string(data, 0)
+    tags, offset = _read_string(data, offset) if offset < len(data) else (',', offset)
+    args = []
+    for tag in tags[1:]:
+        if tag == 'i':
+            args.append(struct.unpack_from('>i', data, offset)[0])
+            offset += 4
+        elif tag == 'f':
+            args.append(struct.unpack_from('>f', data, offset)[0])
+            offset += 4
+        elif tag in 'hd':
+            args.append(struct.unpack_from('>q' if tag == 'h' else '>d', data, offset)[0])
+            offset += 8
+        elif tag == 's':
+            value, offset = _read_string(data, offset)
+            args.append(value)
+        elif tag in 'TF':
+            args.append(tag == 'T')
+        elif tag == 'N':
+            args.append(None)
+        else:
+            raise ValueError(f"Unsupported OSC type tag {tag!r}")
+    return [(address, args)]
+
+
+def _pad(data):
+    return data + b'\0' * (4 - len(data) % 4)
+
+
+def encode_message(address, *args):
+    """One OSC message with int, float and string arguments"""
+    tags = ','
+    payload = b''
+    for arg in args:
+        if isinstance(arg, bool):
+            tags += 'T' if arg else 'F'
+        elif isinstance(arg, int):
+            tags += 'i'
+            payload += struct.pack('>i', arg)
+        elif isinstance(arg, float):
+            tags += 'f'
+            payload += struct.pack('>f', arg)
+        else:
+            tags += 's'
+            payload += _pad(str(arg).encode('utf-8'))
+    return _pad(address.encode('utf-8')) + _pad(tags.encode('ascii')) + payload
+
+
+def encode_bundle(*messages):
+    """An OSC bundle (time tag 'immediately') of encoded messages"""
+    return b'#bundle\0' + struct.pack('>Q', 1) + b''.join(
+        struct.pack('>i', len(message)) + message for message in messages)
+
+
+def command_for(address, args):
+    """(name, target, value) for an OSC address, or None if it maps to no command.
+
+    Addresses may start with /looper. /loop/<id>/<name> addresses a loop
+    (e.g. /loop/2/mute 1, /loop/2/length 4.0); other paths join with dots
+    into a command name (/record 1, /reverb/decay 0.5, /reverb/input 2,
+    /pitch_shift/semitones 3). Routing, select and delete take the loop id
+    as their argument; '/mute 2 1'-style messages give target and value.
+    """
+    parts = [part for part in address.split('/') if part]
+    if parts and parts[0] == 'looper':
+        parts = parts[1:]
+    target = -1
+    if len(parts) == 3 and parts[0] == 'loop':
+        try:
+            target = int(parts[1])
+        except ValueError:
+            return None
+        name = LOOP_COMMANDS.get(parts[2])
+    else:
+        name = '.'.join(parts)
+    if name not in COMMAND_CODES:
+        return None
+
+    numbers = [float(arg) for arg in args if isinstance(arg, (int, float))]
+    if target < 0 and (name in TARGET_COMMANDS or name.endswith(('.input', '.output'))):
+        return name, int(numbers[0]) if numbers else -1, 0.0
+    if target < 0 and len(numbers) >= 2:
+        return name, int(numbers[0]), numbers[1]
+    return name, target, numbers[0] if numbers else 1.0
+
+
+class OscServer:
+    """OSC-over-UDP remote control on its own asyncio thread.
+
+    Messages are turned into looper commands and held until the next block
+    boundary (every chunk/rate seconds). Settings received in between are
+    coalesced, so only the last value for each (command, target) is posted;
+    events (undo, clear, add_loop...) are all posted, in order. Posting goes
+    through `looper.post_command`, the same lock-free command ring the GUI
+    uses, so the looper may be an AudioLooper or an EngineClient.
+    """
+    def __init__(self, looper, host='127.0.0.1', port=9000):
+        self.looper = looper
+        self.host = host
+        self.port = port
+        self.interval = looper.chunk / looper.rate
+        self.received = 0
+        self.posted = 0
+        self._pending = {}  # (name, target) or event sequence -> (name, target, value)
+        self._events = 0
+        self._loop = None
+        self._transport = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+        return self.port
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._transport, _ = self._loop.run_until_complete(self._loop.create_datagram_endpoint(
+                lambda: _OscProtocol(self), local_addr=(self.host, self.port)))
+        except OSError as e:
+            print(f"OSC server could not listen on {self.host}:{self.port}: {e}")
+            self._ready.set()
+            return
+        sock = self._transport.get_extra_info('socket')
+        try:
+            # Room for a burst of fader moves between two reads
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        except OSError:
+            pass
+        self.port = sock.getsockname()[1]  # The real port when 0 was asked
+        print(f"OSC server listening on {self.host}:{self.port}")
+        self._loop.call_soon(self._flush)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._transport.close()
+            self._loop.close()
+
+    def datagram(self, data):
+        try:
+            messages = parse_packet(data)
+        except (ValueError, IndexError, struct.error) as e:
+            print(f"Bad OSC packet: {e}")
+            return
+        for address, args in messages:
+            self.received += 1
+            command = command_for(address, args)
+            if command is None:
+                print(f"Unknown OSC address {address}")
+                continue
+            name, target, value = command
+            if name in EVENT_COMMANDS:
+                self._events += 1
+                self._pending[('event', self._events)] = command
+            else:
+                # Re-inserting keeps the order of the latest changes
+                self._pending.pop((name, target), None)
+                self._pending[(name, target)] = command
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        for name, target, value in pending.values():
+            self.looper.post_command(name, target, value)
+            self.posted += 1
+        self._loop.call_later(self.interval, self._flush)
+
+
+class _OscProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.datagram(data)
@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.io.wavfile import write
 
 class RecordingSession:
     def __init__(self, rate):
@@ -28,4 +27,5 @@ class RecordingSession:
         audio_data = np.clip(audio_data, -1.0, 1.0)
         audio_data = (audio_data * 32767).astype(np.int16)
         
+        from scipy.io.wavfile import write
         write(filename, self.rate, audio_data)
\ No newline at end of file
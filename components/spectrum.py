@@ -0,0 +1,139 @@
+import threading
+import time
+import numpy as np
+
+# Signals the mixer taps: the master bus and each effect's output
+TAPS = ('master', 'gate', 'pitch', 'reverb', 'convolution', 'filter', 'delay')
+
+
+class TapRing:
+    """Last few blocks of each tapped signal, written by the audio thread.
+
+    One ring of `capacity` blocks per tap with a block counter each. The
+    writer copies a block into the next slot and only then advances the
+    counter, so it never waits; a reader that falls more than a ring behind
+    simply sees the older blocks overwritten. The backing buffer can be
+    shared memory for an engine in another process.
+    """
+    def __init__(self, chunk, capacity=8, buffer=None):
+        self.chunk = chunk
+        self.capacity = capacity
+        if buffer is None:
+            buffer = bytearray(self.nbytes(chunk, capacity))
+        self.counters = np.frombuffer(buffer, dtype=np.int64, count=len(TAPS))
+        self.blocks = np.frombuffer(buffer, dtype=np.float32, count=len(TAPS) * capacity * chunk,
+                                    offset=8 * len(TAPS)).reshape(len(TAPS), capacity, chunk)
+
+    @staticmethod
+    def nbytes(chunk, capacity=8):
+        return 8 * len(TAPS) + len(TAPS) * capacity * chunk * 4
+
+    def write(self, tap, block):
+        index = TAPS.index(tap)
+        count = int(self.counters[index])
+        self.blocks[index, count % self.capacity] = block
+        self.counters[index] = count + 1  # Publish only after the block is written
+
+    def latest(self, tap, blocks, out):
+        """Copy the newest `blocks` blocks of a tap into `out`.
+
+        Returns the block counter the copy ends at, or None if there isn't
+        enough audio yet or the writer lapped the copy while it was read.
+        """
+        index = TAPS.index(tap)
+        count = int(self.counters[index])
+        if count < blocks:
+            return None
+        slots = np.arange(count - blocks, count) % self.capacity
+        np.take(self.blocks[index], slots, axis=0, out=out.reshape(blocks, self.chunk))
+        # The slot being written next is `counters % capacity`; a copy that
+        # started at count - blocks is intact while that slot wasn't reused
+        if int(self.counters[index]) - (count - blocks) >= self.capacity:
+            return None
+        return count
+
+
+class SpectrumAnalyzer:
+    """Smoothed log-frequency spectra of the tapped signals.
+
+    A background thread wakes every `interval` seconds, takes the newest
+    `fft_size` samples of each tap that has new audio and publishes dB levels
+    in `bands` log-spaced bands. Frames the thread doesn't get to are dropped;
+    nothing here runs on, or waits for, the audio thread.
+    """
+    def __init__(self, taps, rate, fft_size=4096, bands=48, smoothing=0.6,
+                 interval=0.033, min_freq=30.0):
+        self.taps = taps
+        self.rate = rate
+        self.interval = interval
+        self.smoothing = smoothing
+        self.blocks = -(-fft_size // taps.chunk)
+        self.fft_size = fft_size
+
+        # Everything per frame is precomputed: window, scratch and band map
+        self.window = np.hanning(fft_size).astype(np.float32)
+        self._scale = 2.0 / self.window.sum()
+        self._samples = np.zeros(self.blocks * taps.chunk, dtype=np.float32)
+        self._frame = np.zeros(fft_size, dtype=np.float32)
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / rate)
+        edges = np.geomspace(min_freq, rate / 2, bands + 1)
+        # First rfft bin of each band; a band narrower than a bin reads the nearest one
+        self._band_starts = np.minimum(np.searchsorted(freqs, edges[:-1]), len(freqs) - 1)
+        self.band_freqs = np.sqrt(edges[:-1] * edges[1:])
+
+        self._levels = {tap: np.full(bands, -90.0) for tap in TAPS}
+        self._published = {tap: None for tap in TAPS}
+        self._seen = {tap: 0 for tap in TAPS}
+        self.dropped_frames = 0
+        self.is_running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self._thread is not None:
+            self._thread.join(timeout=0.5)
+            self._thread = None
+
+    def read(self, tap):
+        """Latest band levels in dB for a tap, or None before the first frame"""
+        return self._published[tap]
+
+    def _run(self):
+        while self.is_running:
+            for tap in TAPS:
+                try:
+                    self.analyze(tap)
+                except Exception as e:
+                    print(f"Spectrum error: {e}")
+            time.sleep(self.interval)
+
+    def analyze(self, tap):
+        """Compute and publish one frame for a tap if it has new audio"""
+        count = int(self.taps.counters[TAPS.index(tap)])
+        if count == self._seen[tap]:
+            return False
+        end = self.taps.latest(tap, self.blocks, self._samples)
+        if end is None:
+            if count >= self.blocks:
+                self.dropped_frames += 1
+            return False
+        self._seen[tap] = end
+
+        np.multiply(self._samples[-self.fft_size:], self.window, out=self._frame)
+        magnitudes = np.abs(np.fft.rfft(self._frame)) * self._scale
+        bands = np.maximum.reduceat(magnitudes, self._band_starts)
+        db = 20 * np.log10(np.maximum(bands, 1e-5))
+
+        # Fast attack, smoothed release
+        levels = self._levels[tap]
+        np.maximum(db, self.smoothing * levels + (1 - self.smoothing) * db, out=levels)
+        # Publish a fresh array so readers never see one being updated
+        self._published[tap] = levels.copy()
+        return True
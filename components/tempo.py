@@ -0,0 +1,88 @@
+import threading
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def onset_strength(audio, n_fft=1024, hop=512):
+    """Spectral flux per hop of a looped buffer (the end wraps into the start)"""
+    padded = np.concatenate((audio, audio[:n_fft]))
+    frames = sliding_window_view(padded, n_fft)[::hop] * np.hanning(n_fft).astype(audio.dtype)
+    spectrum = np.log1p(100.0 * np.abs(np.fft.rfft(frames, axis=1)))
+    flux = np.maximum(np.diff(spectrum, axis=0, append=spectrum[:1]), 0.0).sum(axis=1)
+    # Keep only what stands out from the local level
+    local = np.convolve(np.concatenate((flux[-8:], flux, flux[:8])), np.ones(17) / 17, 'valid')
+    return np.maximum(flux - local, 0.0)
+
+
+def estimate_tempo(audio, rate, n_fft=1024, hop=512, min_bpm=60.0, max_bpm=200.0):
+    """(bpm, samples from the loop start to the first beat) of a loop, or None.
+
+    The onset envelope's circular autocorrelation gives the beat period; as
+    the buffer is a loop, the period is then fitted to a whole number of
+    beats per loop, and the phase is the beat grid offset that lines up with
+    the most onset energy.
+    """
+    envelope = onset_strength(audio, n_fft, hop)
+    if not envelope.any():
+        return None
+
+    spectrum = np.fft.rfft(envelope - envelope.mean())
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), len(envelope))
+    lags = np.arange(max(1, int(60.0 * rate / (max_bpm * hop))),
+                     min(len(envelope) // 2, int(np.ceil(60.0 * rate / (min_bpm * hop)))) + 1)
+    if not lags.size:
+        return None
+    # Mild preference for tempi near 120 BPM to settle half/double ambiguity
+    bpms = 60.0 * rate / (lags * hop)
+    weights = np.exp(-0.5 * np.log2(bpms / 120.0) ** 2)
+    best = lags[np.argmax(autocorr[lags] * weights)]
+
+    beat = best * hop
+    beats = max(1, int(round(len(audio) / beat)))
+    beat = len(audio) / beats
+    bpm = 60.0 * rate / beat
+
+    # Score every frame offset within one beat against the beat grid
+    period = beat / hop
+    offsets = np.arange(int(np.ceil(period)))
+    grid = np.rint(offsets[:, None] + np.arange(beats) * period).astype(int) % len(envelope)
+    first = offsets[np.argmax(envelope[grid].sum(axis=1))]
+    # Flux at frame f compares frames f and f + 1; place the onset at the window centre
+    phase = int(((first + 1) * hop + n_fft // 2) % beat)
+    return bpm, phase
+
+
+class TempoDetector:
+    """Runs estimate_tempo on a background thread and keeps the latest result"""
+    def __init__(self, rate):
+        self.rate = rate
+        self.result = None  # (loop_id, bpm, phase samples)
+        self._thread = None
+
+    def start(self, loop_id, read_audio, ready=None):
+        """Analyze read_audio() once ready() is true (e.g. recording has stopped)"""
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        self._thread = threading.Thread(target=self._run, args=(loop_id, read_audio, ready),
+                                        daemon=True)
+        self._thread.start()
+        return True
+
+    def take_result(self):
+        result, self.result = self.result, None
+        return result
+
+    def _run(self, loop_id, read_audio, ready):
+        try:
+            deadline = time.monotonic() + 30.0
+            while ready is not None and not ready() and time.monotonic() < deadline:
+                time.sleep(0.02)
+            audio = read_audio()
+            if audio is None:
+                return
+            estimate = estimate_tempo(audio, self.rate)
+            if estimate is not None:
+                self.result = (loop_id,) + estimate
+        except Exception as e:
+            print(f"Tempo detection error: {e}")
@@ -0,0 +1,120 @@
+import queue
+import threading
+import collections
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def time_stretch(audio, new_length, n_fft=2048, hop=512, batch=128, progress=None):
+    """Phase-vocoder stretch of a looped buffer to `new_length` samples, same pitch.
+
+    Analysis frames are taken circularly so the loop seam is treated like
+    any other point. Output frames are placed every `hop` samples and read
+    the input at a proportionally scaled frame position, interpolating the
+    magnitude and advancing each bin's phase by its measured frequency.
+    Frames are synthesized in batches (so `progress(fraction)` can be
+    reported) and overlap-added circularly into the new loop.
+    """
+    length = len(audio)
+    window = np.hanning(n_fft + 1)[:-1]
+    frames_in = -(-length // hop)
+    padded = np.resize(audio.astype(np.float64), frames_in * hop + n_fft)
+    stft = np.fft.rfft(sliding_window_view(padded, n_fft)[::hop][:frames_in] * window, axis=1)
+    magnitude = np.abs(stft)
+    phase = np.angle(stft)
+    expected = 2 * np.pi * hop * np.arange(n_fft // 2 + 1) / n_fft
+
+    frames_out = -(-new_length // hop)
+    positions = np.arange(frames_out) * (length / new_length)
+    output = np.zeros(new_length)
+    norm = np.zeros(new_length)
+    accumulated = phase[0].copy()
+
+    for start in range(0, frames_out, batch):
+        steps = positions[start:start + batch]
+        first = np.floor(steps).astype(np.int64) % frames_in
+        second = (first + 1) % frames_in
+        alpha = (steps - np.floor(steps))[:, None]
+        mags = (1 - alpha) * magnitude[first] + alpha * magnitude[second]
+
+        # Measured phase advance per hop, wrapped around the bin's expected advance
+        advance = phase[second] - phase[first] - expected
+        advance -= 2 * np.pi * np.round(advance / (2 * np.pi))
+        advance += expected
+        # Each output frame's phase is the running sum of the advances before it
+        phases = accumulated + np.concatenate(([np.zeros_like(accumulated)],
+                                               np.cumsum(advance[:-1], axis=0)))
+        accumulated = phases[-1] + advance[-1]
+
+        frames = np.fft.irfft(mags * np.exp(1j * phases), n_fft, axis=1) * window
+        index = ((np.arange(start, start + len(steps)) * hop)[:, None] + np.arange(n_fft)) % new_length
+        output += np.bincount(index.ravel(), weights=frames.ravel(), minlength=new_length)
+        norm += np.bincount(index.ravel(), weights=np.broadcast_to(window ** 2, frames.shape).ravel(),
+                            minlength=new_length)
+        if progress is not None:
+            progress(min(1.0, (start + len(steps)) / frames_out))
+
+    return (output / np.maximum(norm, 1e-8)).astype(audio.dtype)
+
+
+class LoopStretcher:
+    """Time-stretches loops on a background thread.
+
+    Requests for the same loop replace each other, so dragging a length
+    slider only stretches to the last value asked for. Finished loops wait
+    in `finished` until the mixer installs them at a block boundary.
+    """
+    def __init__(self, read_audio):
+        self.read_audio = read_audio  # loop_id -> copy of its audio, or None
+        self.progress = {}  # loop_id -> fraction done for loops being stretched
+        self.finished = collections.deque()
+        self._requests = {}
+        self._lock = threading.Lock()
+        self._wake = queue.SimpleQueue()
+        self._thread = None
+
+    def request(self, loop_id, samples):
+        with self._lock:
+            self._requests[loop_id] = samples
+        self.progress.setdefault(loop_id, 0.0)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wake.put(loop_id)
+
+    def take_finished(self):
+        """[(loop_id, audio)] ready to be installed"""
+        done = []
+        while self.finished:
+            done.append(self.finished.popleft())
+        return done
+
+    def _run(self):
+        while True:
+            self._wake.get()
+            while True:
+                with self._lock:
+                    if not self._requests:
+                        break
+                    loop_id, samples = self._requests.popitem()
+                try:
+                    self._stretch(loop_id, samples)
+                except Exception as e:
+                    print(f"Time-stretch error: {e}")
+                    self.progress.pop(loop_id, None)
+
+    def _stretch(self, loop_id, samples):
+        audio = self.read_audio(loop_id)
+        if audio is None or not len(audio):
+            self.progress.pop(loop_id, None)
+            return
+
+        def report(fraction):
+            self.progress[loop_id] = fraction
+
+        stretched = time_stretch(audio, samples, progress=report)
+        with self._lock:
+            superseded = loop_id in self._requests
+        if not superseded:
+            self.finished.append((loop_id, stretched))
+            self.progress.pop(loop_id, None)
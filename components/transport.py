@@ -0,0 +1,94 @@
+import heapq
+import itertools
+
+# Where record/overdub toggles land: straight away, or on the next beat/bar
+QUANTIZE_MODES = ['off', 'beat', 'bar']
+
+
+class Transport:
+    """Master tempo clock counted in samples, with a queue of scheduled commands.
+
+    The mixer advances the clock by one block at a time and takes the
+    commands that fall inside that block with their sample offsets, so a
+    toggle scheduled for the next bar takes effect on the exact sample.
+    Scheduled commands are kept in a heap ordered by sample, so each block
+    only costs the events it actually contains.
+    """
+    def __init__(self, rate, bpm=120.0, beats_per_bar=4, quantize='off'):
+        self.rate = rate
+        self._bpm = float(bpm)
+        self._beats_per_bar = int(beats_per_bar)
+        self.quantize = quantize
+        self.position = 0  # Samples since the clock started
+        self.origin = 0  # Sample at which beat 1 of bar 1 fell
+        self._events = []
+        self._order = itertools.count()  # Keeps same-sample events in posting order
+
+    @property
+    def bpm(self):
+        return self._bpm
+
+    @bpm.setter
+    def bpm(self, value):
+        # Restart the bar grid on the next beat so the new tempo starts cleanly
+        self.origin = self.next_boundary('beat')
+        self._bpm = max(20.0, min(300.0, float(value)))
+
+    @property
+    def beats_per_bar(self):
+        return self._beats_per_bar
+
+    @beats_per_bar.setter
+    def beats_per_bar(self, value):
+        self.origin = self.next_boundary('bar')
+        self._beats_per_bar = max(1, int(value))
+
+    def sync(self, bpm=None, downbeat=None):
+        """Follow an external clock: take its tempo as is and/or start a bar on sample `downbeat`"""
+        if bpm is not None:
+            self._bpm = max(20.0, min(300.0, float(bpm)))
+        if downbeat is not None:
+            self.origin = int(downbeat)
+
+    @property
+    def samples_per_beat(self):
+        return self.rate * 60.0 / self._bpm
+
+    @property
+    def samples_per_bar(self):
+        return self.samples_per_beat * self._beats_per_bar
+
+    def next_boundary(self, unit=None):
+        """First beat or bar boundary at or after the current position"""
+        step = self.samples_per_bar if (unit or self.quantize) == 'bar' else self.samples_per_beat
+        elapsed = self.position - self.origin
+        count = -(-elapsed // step)  # Ceiling, exact for whole-sample positions
+        return self.origin + int(round(count * step))
+
+    def phase(self, length):
+        """Offset into a loop of `length` samples that keeps it aligned to bar 1"""
+        return (self.position - self.origin) % length
+
+    def align(self, offset, length, phase):
+        """Put beat 1 on sample `phase` of a loop that is now playing at `offset`"""
+        self.origin = self.position + (phase - offset) % length - length
+
+    def loop_samples(self, seconds):
+        """Loop length in samples: whole bars while quantizing, else the exact time"""
+        if self.quantize == 'off':
+            return int(round(seconds * self.rate))
+        bars = max(1, int(round(seconds * self.rate / self.samples_per_bar)))
+        return int(round(bars * self.samples_per_bar))
+
+    def schedule(self, sample, name, target=-1, value=0.0):
+        heapq.heappush(self._events, (sample, next(self._order), name, target, value))
+
+    def take_block(self, frames):
+        """Advance by one block; returns [(offset, name, target, value)] inside it"""
+        end = self.position + frames
+        events = []
+        while self._events and self._events[0][0] < end:
+            sample, _, name, target, value = heapq.heappop(self._events)
+            events.append((max(0, sample - self.position), name, target, value))
+        self.position = end
+        return events
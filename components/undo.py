@@ -0,0 +1,145 @@
+import collections
+import numpy as np
+
+
+class Take:
+    """One undoable change: the pages saved in sequence numbers [first, end)"""
+    __slots__ = ('label', 'serial', 'first', 'end', 'dropped')
+
+    def __init__(self, label, serial, first):
+        self.label = label
+        self.serial = serial
+        self.first = first
+        self.end = first
+        self.dropped = False  # Outgrew the ring; nothing more is saved for it
+
+
+class UndoHistory:
+    """Copy-on-write undo/redo for loop buffers, one chunk row at a time.
+
+    While a take is open, the first write to any loop row saves the row's
+    old audio into a preallocated ring of pages; rows already saved in the
+    take are skipped, so a take costs what it touched rather than whole
+    loops. Undo swaps a take's pages with the loop rows (which makes the
+    same pages its redo). When the ring is full the oldest takes are
+    evicted, so the memory budget bounds the history depth; a take that
+    alone outgrows the ring is dropped whole rather than kept in part,
+    leaving the older takes it had not yet displaced.
+    """
+    def __init__(self, chunk, budget_bytes=64 * 2**20, dtype='float32'):
+        self.capacity = max(1, budget_bytes // (chunk * np.dtype(dtype).itemsize))
+        self.pages = np.empty((self.capacity, chunk), dtype=dtype)
+        self.pages.fill(0)  # Commit the memory now rather than on first write from the audio thread
+        self.page_loop = np.full(self.capacity, -1, dtype=np.int64)
+        self.page_row = np.zeros(self.capacity, dtype=np.int64)
+        self._counting = np.arange(self.capacity, dtype=np.int64)  # Row offsets for page_row
+        self.head = 0  # Sequence number of the next page; slot is head % capacity
+        self.undo_stack = collections.deque()
+        self.redo_stack = []
+        self.current = None
+        self._marks = {}  # loop_id -> serial of the last take that saved each row
+        self._serial = 0
+
+    def begin(self, label):
+        """Open a take; starting new work drops anything that could be redone"""
+        self.end()
+        if self.redo_stack:
+            # Redo takes are the newest pages in the ring, so their space is reused
+            self.head = self.redo_stack[-1].first
+            self.redo_stack.clear()
+        self._serial += 1
+        self.current = Take(label, self._serial, self.head)
+
+    def end(self):
+        if self.current is not None and self.current.end > self.current.first:
+            self.undo_stack.append(self.current)
+        self.current = None
+
+    def save_rows(self, loop_id, rows, loop):
+        """Save rows (a range) of `loop` not yet saved in the open take (before they are written).
+
+        Runs on the audio thread, so each run of unsaved rows is copied
+        into the preallocated pages with slice copies (two where the run
+        crosses the end of the ring), never row by row.
+        """
+        take = self.current
+        if take is None or take.dropped or rows.stop <= rows.start:
+            return
+        marks = self._marks.get(loop_id)
+        if marks is None or len(marks) != len(loop):
+            marks = self._marks[loop_id] = np.zeros(len(loop), dtype=np.int64)
+        start, stop = rows.start, rows.stop
+        fresh = np.flatnonzero(marks[start:stop] != take.serial)
+        if not len(fresh) or not self._make_room(len(fresh)):
+            return
+        if len(fresh) == stop - start:
+            self._copy_rows(loop_id, loop, start, stop)
+        else:
+            breaks = np.flatnonzero(np.diff(fresh) != 1) + 1
+            firsts = fresh[np.concatenate(([0], breaks))]
+            lasts = fresh[np.concatenate((breaks - 1, [len(fresh) - 1]))]
+            for first, last in zip(firsts.tolist(), lasts.tolist()):
+                self._copy_rows(loop_id, loop, start + first, start + last + 1)
+        marks[start:stop] = take.serial
+        take.end = self.head
+
+    def _copy_rows(self, loop_id, loop, first, stop):
+        while first < stop:
+            slot = self.head % self.capacity
+            count = min(stop - first, self.capacity - slot)
+            self.pages[slot:slot + count] = loop[first:first + count]
+            self.page_loop[slot:slot + count] = loop_id
+            np.add(self._counting[:count], first, out=self.page_row[slot:slot + count])
+            first += count
+            self.head += count
+
+    def _make_room(self, count):
+        """Evict the oldest takes until `count` more pages fit"""
+        take = self.current
+        if self.head + count - take.first > self.capacity:
+            # The open take alone is larger than the budget: drop all of it
+            # rather than keep an undo that would only restore part. Older
+            # takes it hasn't already displaced stay undoable.
+            print(f"Undo: '{take.label}' is larger than the undo budget and can't be undone")
+            take.dropped = True
+            self.head = take.end = take.first
+            return False
+        while self.undo_stack and self.head + count - self.undo_stack[0].first > self.capacity:
+            self.undo_stack.popleft()
+        return True
+
+    def forget(self, loop_id):
+        """Drop saved rows of a loop whose buffer was replaced or deleted"""
+        self.page_loop[self.page_loop == loop_id] = -1
+        self._marks.pop(loop_id, None)
+
+    def undo(self, loops, overviews):
+        self.end()
+        if not self.undo_stack:
+            return False
+        take = self.undo_stack.pop()
+        self._swap(take, loops, overviews)
+        self.redo_stack.append(take)
+        return True
+
+    def redo(self, loops, overviews):
+        if self.current is not None or not self.redo_stack:
+            return False
+        take = self.redo_stack.pop()
+        self._swap(take, loops, overviews)
+        self.undo_stack.append(take)
+        return True
+
+    def _swap(self, take, loops, overviews):
+        slots = np.arange(take.first, take.end) % self.capacity
+        owners = self.page_loop[slots]
+        for loop_id in np.unique(owners).tolist():
+            if loop_id not in loops:
+                continue
+            selected = slots[owners == loop_id]
+            rows = self.page_row[selected]
+            loop = loops[loop_id]
+            current = loop[rows]
+            loop[rows] = self.pages[selected]
+            self.pages[selected] = current
+            overviews[loop_id].dirty[rows] = True
@@ -0,0 +1,68 @@
+import math
+import numpy as np
+
+# Rates whose coefficients are built up front; other rates are built on first use
+COMMON_RATES = (1.0, 0.5, 2.0, -1.0, -0.5, -2.0)
+
+# Sample taps around the read head for each interpolation mode
+TAPS = {
+    'linear': np.array([0, 1]),
+    'cubic': np.array([-1, 0, 1, 2]),
+}
+
+
+def _weights(mode, t):
+    """Per-tap weights for fractional positions `t` (0 <= t < 1)"""
+    if mode == 'linear':
+        return np.stack((1.0 - t, t))
+    # Catmull-Rom spline through the four neighbouring samples
+    t2 = t * t
+    t3 = t2 * t
+    return np.stack((
+        0.5 * (-t3 + 2.0 * t2 - t),
+        0.5 * (3.0 * t3 - 5.0 * t2 + 2.0),
+        0.5 * (-3.0 * t3 + 4.0 * t2 + t),
+        0.5 * (t3 - t2),
+    ))
+
+
+class Interpolator:
+    """Reads a block from a loop at any rate through a fractional read head.
+
+    For a rate and the fractional part of the start position, the tap
+    offsets and weights of a whole block are fixed, so they are computed
+    once and cached. Reading a block is then one gather of all taps and one
+    weighted sum. Common rates keep a whole or half-sample start, so they
+    reuse a handful of entries.
+    """
+    def __init__(self, chunk, mode='cubic', dtype='float32', max_entries=64):
+        self.chunk = chunk
+        self.mode = mode
+        self.dtype = dtype
+        self.max_entries = max_entries
+        self._cache = {}
+        for rate in COMMON_RATES:
+            self.coefficients(rate, 0.0)
+
+    def coefficients(self, rate, fraction):
+        """(tap offsets, weights), each (taps, chunk), for a read head starting at `fraction`"""
+        key = (rate, round(fraction, 9))
+        entry = self._cache.get(key)
+        if entry is None:
+            positions = fraction + rate * np.arange(self.chunk)
+            whole = np.floor(positions)
+            offsets = whole.astype(np.int64) + TAPS[self.mode][:, None]
+            weights = _weights(self.mode, positions - whole).astype(self.dtype)
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+            entry = self._cache[key] = (offsets, weights)
+        return entry
+
+    def read(self, flat, length, offset, rate, out):
+        """Fill `out` from a looped buffer starting at a fractional offset"""
+        base = math.floor(offset)
+        offsets, weights = self.coefficients(rate, offset - base)
+        index = offsets + base
+        np.remainder(index, length, out=index)
+        np.einsum('ij,ij->j', flat[index], weights, out=out)
+        return out
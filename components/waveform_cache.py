@@ -0,0 +1,76 @@
+import numpy as np
+
+# Samples per min/max bucket at each level; each level is 4x the previous one.
+# Rows are split into equal finest buckets of at most BUCKET_SIZES[0] samples,
+# so a chunk that isn't a multiple of it gets slightly smaller buckets.
+BUCKET_SIZES = (256, 1024, 4096)
+
+
+class PeakPyramid:
+    """Min/max overview of one loop at several bucket sizes.
+
+    The audio thread only flags the rows it writes (`mark`); `refresh`
+    recomputes the buckets under those rows on the reader's thread, so the
+    cost of keeping the overview current follows what was recorded, not the
+    loop length.
+    """
+    def __init__(self, rows, chunk):
+        self.rows = rows
+        self.chunk = chunk
+        self.buckets_per_row = -(-chunk // BUCKET_SIZES[0])
+        # First sample of each finest bucket within a row
+        self.bucket_starts = np.arange(self.buckets_per_row) * chunk // self.buckets_per_row
+        self.dirty = np.ones(rows, dtype=bool)
+
+        # Bucket counts per level; finer levels are padded to a multiple of 4
+        # (with zeros) so each coarse bucket is always four finer ones
+        self.counts = [rows * self.buckets_per_row]
+        for _ in BUCKET_SIZES[1:]:
+            self.counts.append(-(-self.counts[-1] // 4))
+        padded = [4 * count for count in self.counts[1:]] + [self.counts[-1]]
+        self.mins = [np.zeros(size, dtype=np.float32) for size in padded]
+        self.maxs = [np.zeros(size, dtype=np.float32) for size in padded]
+
+    def mark(self, row):
+        self.dirty[row] = True
+
+    def mark_all(self):
+        self.dirty[:] = True
+
+    def refresh(self, loop):
+        """Recompute buckets for rows written since the last refresh"""
+        rows = np.flatnonzero(self.dirty)
+        if not rows.size:
+            return False
+        # Clear first: a row written while we read it gets flagged again
+        self.dirty[rows] = False
+
+        # Finest level straight from the written rows (one gather)
+        blocks = loop[rows]
+        buckets = (rows[:, None] * self.buckets_per_row + np.arange(self.buckets_per_row)).ravel()
+        self.mins[0][buckets] = np.minimum.reduceat(blocks, self.bucket_starts, axis=1).ravel()
+        self.maxs[0][buckets] = np.maximum.reduceat(blocks, self.bucket_starts, axis=1).ravel()
+
+        # Coarser levels from groups of four finer buckets
+        group = np.arange(4)
+        for level in range(1, len(BUCKET_SIZES)):
+            buckets = np.unique(buckets // 4)
+            members = buckets[:, None] * 4 + group
+            self.mins[level][buckets] = self.mins[level - 1][members].min(axis=1)
+            self.maxs[level][buckets] = self.maxs[level - 1][members].max(axis=1)
+        return True
+
+    def columns(self, width):
+        """(mins, maxs) with one entry per pixel column.
+
+        Reads the coarsest level that still has a bucket per column, so the
+        work per frame is bounded by the display width.
+        """
+        for level in reversed(range(len(BUCKET_SIZES))):
+            if self.counts[level] >= width or level == 0:
+                break
+        count = self.counts[level]
+        mins, maxs = self.mins[level][:count], self.maxs[level][:count]
+        width = min(width, count)
+        starts = (np.arange(width) * count) // width
+        return np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
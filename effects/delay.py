@@ -0,0 +1,102 @@
+import numpy as np
+from effects.plugin import EffectPlugin, Parameter
+
+
+class DelayEffect(EffectPlugin):
+    """Feedback delay on a preallocated circular buffer.
+
+    The buffer holds input plus fed-back echoes; each block is read back
+    `delay` samples behind the write position and written at it, which is
+    at most two slices each way around the wrap. Delays shorter than a
+    block are run in pieces no longer than the delay. The delay is set in
+    milliseconds or, with `beats` > 0 and a transport attached, in beats of
+    the transport's tempo. A new delay time is crossfaded in from the old
+    read position over one block, so changing it never reallocates or
+    clicks.
+    """
+    parameters = (Parameter('time_ms', 10, 2000, 375, 'ms'), Parameter('beats', 0.0, 4.0, 0.0),
+                  Parameter('feedback', 0.0, 0.95, 0.4), Parameter('wet', 0.0, 1.0, 0.35, ramped=True))
+
+    def __init__(self, rate, time_ms=375.0, beats=0.0, feedback=0.4, wet=0.35, max_seconds=4.0):
+        super().__init__(rate)
+        self.time_ms = time_ms
+        self.beats = beats
+        self.feedback = feedback
+        self.wet = wet
+        self.transport = None  # Set by AudioLooper; used when syncing to beats
+        self.buffer = np.zeros(int(max_seconds * rate), dtype=np.float32)
+        self.write_pos = 0
+        self._delay = None
+        self._echoes = self._incoming = self._feed = self._fade = None
+
+    def prepare(self, rate, max_block):
+        super().prepare(rate, max_block)
+        self._echoes = np.zeros(max_block, dtype=np.float32)
+        self._incoming = np.zeros(max_block, dtype=np.float32)
+        self._feed = np.zeros(max_block, dtype=np.float32)
+        self._fade_ramp(max_block)
+
+    def _fade_ramp(self, length):
+        # Crossfade weights from the old read position to the new one
+        self._fade = np.arange(1, length + 1, dtype=np.float32) / length
+
+    def delay_samples(self):
+        if self.beats > 0 and self.transport is not None:
+            samples = self.beats * self.transport.samples_per_beat
+        else:
+            samples = self.time_ms * self.rate / 1000.0
+        # Never under the shortest time_ms, so a block runs in a few pieces at most
+        shortest = self.parameters[0].minimum * self.rate / 1000.0
+        return int(min(max(shortest, round(samples)), len(self.buffer) - 1))
+
+    def _read(self, delay, count, out):
+        size = len(self.buffer)
+        start = (self.write_pos - delay) % size
+        first = min(count, size - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:count] = self.buffer[:count - first]
+        return out
+
+    def _write(self, block):
+        size = len(self.buffer)
+        first = min(len(block), size - self.write_pos)
+        self.buffer[self.write_pos:self.write_pos + first] = block[:first]
+        self.buffer[:len(block) - first] = block[first:]
+        self.write_pos = (self.write_pos + len(block)) % size
+
+    def reset(self):
+        self.buffer.fill(0)
+        self._delay = None
+
+    def process(self, input_signal, out):
+        length = len(input_signal)
+        if self._echoes is None or length > len(self._echoes):
+            self.prepare(self.rate, length)  # Used without prepare (e.g. apply())
+        if len(self._fade) != length:
+            self._fade_ramp(length)
+        target = self.delay_samples()
+        current = target if self._delay is None else self._delay
+        echoes = self._echoes[:length]
+
+        done = 0
+        while done < length:
+            # A piece may only read samples written before it starts
+            step = min(length - done, current, target)
+            piece = echoes[done:done + step]
+            self._read(current, step, piece)
+            if current != target:
+                new = self._read(target, step, self._incoming[:step])
+                new -= piece
+                new *= self._fade[done:done + step]
+                piece += new
+            feed = np.multiply(piece, self.feedback, out=self._feed[:step])
+            feed += input_signal[done:done + step]
+            self._write(feed)
+            done += step
+        self._delay = target
+
+        # input + wet * (echoes - input); wet may be a per-sample ramp
+        np.subtract(echoes, input_signal, out=out)
+        out *= self.wet
+        out += input_signal
+        return out
@@ -0,0 +1,146 @@
+import math
+import numpy as np
+from effects.plugin import EffectPlugin, Parameter
+
+sosfilt = None  # scipy.signal.sosfilt, imported by preload() before the first block
+
+FILTER_KINDS = ['lowpass', 'highpass', 'bandpass', 'lowshelf', 'highshelf', 'peak']
+
+
+def preload():
+    """Import SciPy; deferred so it isn't paid at startup"""
+    global sosfilt
+    if sosfilt is None:
+        from scipy.signal import sosfilt
+
+
+def biquad(kind, frequency, q, gain_db, rate):
+    """One second-order section (b0, b1, b2, 1, a1, a2) from the RBJ audio EQ cookbook"""
+    frequency = min(max(frequency, 1.0), 0.49 * rate)
+    w0 = 2 * math.pi * frequency / rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2 * max(q, 1e-3))
+    a = 10 ** (gain_db / 40)
+    if kind == 'lowpass':
+        b = ((1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2)
+        den = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    elif kind == 'highpass':
+        b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+        den = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    elif kind == 'bandpass':
+        b = (alpha, 0.0, -alpha)
+        den = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    elif kind == 'peak':
+        b = (1 + alpha * a, -2 * cos_w0, 1 - alpha * a)
+        den = (1 + alpha / a, -2 * cos_w0, 1 - alpha / a)
+    elif kind in ('lowshelf', 'highshelf'):
+        sign = 1 if kind == 'lowshelf' else -1
+        root = 2 * math.sqrt(a) * alpha
+        b = (a * ((a + 1) - sign * (a - 1) * cos_w0 + root),
+             sign * 2 * a * ((a - 1) - sign * (a + 1) * cos_w0),
+             a * ((a + 1) - sign * (a - 1) * cos_w0 - root))
+        den = ((a + 1) + sign * (a - 1) * cos_w0 + root,
+               -sign * 2 * ((a - 1) + sign * (a + 1) * cos_w0),
+               (a + 1) + sign * (a - 1) * cos_w0 - root)
+    else:
+        raise ValueError(f"Unknown filter kind: {kind}")
+    return np.array([[b[0], b[1], b[2], den[0], den[1], den[2]]]) / den[0]
+
+
+def group_delay(sos, frequency=0.01):
+    """Group delay in samples at `frequency` (a fraction of Nyquist) of a cascade"""
+    sos = np.asarray(sos, dtype=np.float64)
+    w = np.pi * frequency * np.array([0.99, 1.01])
+    z = np.exp(-1j * w)[:, None]
+    response = np.prod((sos[:, 0] + sos[:, 1] * z + sos[:, 2] * z * z) /
+                       (sos[:, 3] + sos[:, 4] * z + sos[:, 5] * z * z), axis=1)
+    phase = np.unwrap(np.angle(response))
+    return -(phase[1] - phase[0]) / (w[1] - w[0])
+
+
+class SosFilter:
+    """Cascaded second-order sections whose state carries across blocks.
+
+    When the coefficients change, the block is filtered in `steps` pieces
+    with coefficients interpolated from the old set to the new one, so a
+    sweep has no zipper noise and the carried state never sees a jump.
+    """
+    def __init__(self, sos=None, steps=8):
+        self.steps = steps
+        self.sos = None
+        self.zi = None
+        self._target = None
+        if sos is not None:
+            self.set_sos(sos)
+
+    def set_sos(self, sos):
+        sos = np.asarray(sos, dtype=np.float64)
+        if self.sos is None or self.sos.shape != sos.shape:
+            # A different cascade can't reuse the old state
+            self.sos = sos
+            self.zi = np.zeros((len(sos), 2))
+            self._target = None
+        elif not np.array_equal(sos, self.sos):
+            self._target = sos
+
+    def reset(self):
+        if self.zi is not None:
+            self.zi.fill(0)
+
+    def process(self, block):
+        target, self._target = self._target, None
+        if target is None:
+            output, self.zi = sosfilt(self.sos, block, zi=self.zi)
+            return output.astype(block.dtype, copy=False)
+
+        output = np.empty(len(block))
+        start_sos = self.sos
+        edges = np.linspace(0, len(block), self.steps + 1).astype(int)
+        for step in range(self.steps):
+            sos = start_sos + (target - start_sos) * ((step + 1) / self.steps)
+            start, end = edges[step], edges[step + 1]
+            output[start:end], self.zi = sosfilt(sos, block[start:end], zi=self.zi)
+        self.sos = target
+        return output.astype(block.dtype, copy=False)
+
+
+class FilterEffect(EffectPlugin):
+    """EQ/filter: one RBJ biquad (low/high/band pass, shelves or peak)"""
+    parameters = (Parameter('frequency', 20.0, 20000.0, 1000.0, 'Hz'), Parameter('q', 0.1, 10.0, 0.707),
+                  Parameter('gain_db', -24.0, 24.0, 0.0, 'dB'))
+
+    def __init__(self, rate, kind='lowpass', frequency=1000.0, q=0.707, gain_db=0.0,
+                 max_entries=256):
+        super().__init__(rate)
+        self.kind = kind
+        self.frequency = frequency
+        self.q = q
+        self.gain_db = gain_db
+        self.max_entries = max_entries
+        self._cache = {}
+        self._filter = SosFilter()
+
+    def prepare(self, rate, max_block):
+        super().prepare(rate, max_block)
+        preload()  # Here rather than in process, which runs on the audio thread
+
+    def preload(self):
+        preload()
+
+    def coefficients(self):
+        """Cached section for the current parameters"""
+        key = (self.kind, float(self.frequency), float(self.q), float(self.gain_db))
+        sos = self._cache.get(key)
+        if sos is None:
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+            sos = self._cache[key] = biquad(*key, self.rate)
+        return sos
+
+    def reset(self):
+        self._filter.reset()
+
+    def process(self, input_signal, out):
+        self._filter.set_sos(self.coefficients())
+        out[:] = self._filter.process(input_signal)
+        return out
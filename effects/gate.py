@@ -1,28 +1,44 @@
-import numpy as np
+from effects import kernels
+from effects.plugin import EffectPlugin, Parameter
 
-class GateEffect:
+class GateEffect(EffectPlugin):
     """Enhanced gate effect with attack/release controls"""
+    parameters = (Parameter('threshold', 0.0, 1.0, 0.1), Parameter('attack_ms', 1, 50, 10, 'ms'),
+                  Parameter('release_ms', 10, 500, 100, 'ms'))
+
     def __init__(self, rate, threshold=0.1, attack_ms=10, release_ms=100):
-        self.rate = rate
+        super().__init__(rate)
         self.threshold = threshold
         self.attack_ms = attack_ms
         self.release_ms = release_ms
-        self.attack_samples = int(rate * attack_ms / 1000)
-        self.release_samples = int(rate * release_ms / 1000)
+        self.gain = 0.0
+
+    @property
+    def attack_ms(self):
+        return self._attack_ms
+
+    @attack_ms.setter
+    def attack_ms(self, value):
+        self._attack_ms = value
+        self.attack_samples = max(1, int(self.rate * value / 1000))
+
+    @property
+    def release_ms(self):
+        return self._release_ms
+
+    @release_ms.setter
+    def release_ms(self, value):
+        self._release_ms = value
+        self.release_samples = max(1, int(self.rate * value / 1000))
+
+    def preload(self):
+        kernels.warmup()
+
+    def reset(self):
         self.gain = 0.0
         
-    def apply(self, input_signal):
-        output_signal = np.zeros_like(input_signal)
-        
-        for i in range(len(input_signal)):
-            # Determine if signal is above threshold
-            if abs(input_signal[i]) > self.threshold:
-                # Attack phase
-                self.gain = min(1.0, self.gain + 1.0/self.attack_samples)
-            else:
-                # Release phase
-                self.gain = max(0.0, self.gain - 1.0/self.release_samples)
-                
-            output_signal[i] = input_signal[i] * self.gain
-            
-        return output_signal
\ No newline at end of file
+    def process(self, input_signal, out):
+        self.gain = kernels.gate_envelope(
+            input_signal, out, float(self.gain), float(self.threshold),
+            1.0 / self.attack_samples, 1.0 / self.release_samples)
+        return out
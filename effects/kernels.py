@@ -0,0 +1,148 @@
+"""Recursive DSP kernels: per-sample loops compiled with Numba when it is
+installed, with vectorized NumPy fallbacks. Module-level names use the best backend."""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _comb_feedback_loop(input_signal, output_signal, history, pos, decay):
+    """y[i] = x[i] + decay * y[i - len(history)], history being a ring of past outputs"""
+    size = history.shape[0]
+    for i in range(input_signal.shape[0]):
+        output_signal[i] = input_signal[i] + decay * history[pos]
+        history[pos] = output_signal[i]
+        pos += 1
+        if pos == size:
+            pos = 0
+    return pos
+
+
+def _gate_envelope_loop(input_signal, output_signal, gain, threshold, attack_step, release_step):
+    """Linear attack/release gain that opens above the threshold; returns the final gain"""
+    for i in range(input_signal.shape[0]):
+        if abs(input_signal[i]) > threshold:
+            gain = min(1.0, gain + attack_step)
+        else:
+            gain = max(0.0, gain - release_step)
+        output_signal[i] = input_signal[i] * gain
+    return gain
+
+
+def _feedback_mix_loop(processed, previous, amount, output_signal):
+    """output = processed + amount * previous in one pass (left unclipped for headroom)"""
+    for i in range(processed.shape[0]):
+        output_signal[i] = processed[i] + amount * previous[i]
+
+
+def _mix_meter_loop(block, output, add):
+    """Peak and sum of squares of `block` in one pass, adding it into `output` if `add`"""
+    peak = 0.0
+    total = 0.0
+    for i in range(block.shape[0]):
+        sample = block[i]
+        if add:
+            output[i] += sample
+        level = abs(sample)
+        if level > peak:
+            peak = level
+        total += sample * sample
+    return peak, total
+
+
+def _comb_feedback_numpy(input_signal, output_signal, history, pos, decay):
+    # Samples less than one delay apart don't depend on each other, so the
+    # block is processed in runs that end at the history wrap point
+    size = history.shape[0]
+    done = 0
+    total = input_signal.shape[0]
+    while done < total:
+        step = min(total - done, size - pos)
+        out = output_signal[done:done + step]
+        np.multiply(history[pos:pos + step], decay, out=out)
+        out += input_signal[done:done + step]
+        history[pos:pos + step] = out
+        pos = (pos + step) % size
+        done += step
+    return pos
+
+
+def _gate_envelope_numpy(input_signal, output_signal, gain, threshold, attack_step, release_step):
+    # Each sample maps the gain through x -> min(max(x + step, 0), 1). Maps of
+    # that form, min(max(x + a, low), high), compose into the same form, so a
+    # log-step prefix scan gives every sample's map from the block's start
+    # gain in log2(n) vectorized passes, however often the input crosses
+    # the threshold.
+    count = len(input_signal)
+    a = np.where(np.abs(input_signal) > threshold, attack_step, -release_step)
+    low = np.zeros(count)
+    high = np.ones(count)
+    shift = 1
+    while shift < count:
+        # Sample i's map after sample i - shift's
+        later = slice(shift, None)
+        earlier = slice(None, count - shift)
+        step, floor, ceiling = a[later], low[later], high[later]
+        new_low = low[earlier] + step
+        new_high = high[earlier] + step
+        for bound in (new_low, new_high):
+            np.maximum(bound, floor, out=bound)
+            np.minimum(bound, ceiling, out=bound)
+        a[later] += a[earlier]
+        low[later] = new_low
+        high[later] = new_high
+        shift *= 2
+    gains = np.maximum(gain + a, low)
+    np.minimum(gains, high, out=gains)
+    np.multiply(input_signal, gains, out=output_signal, casting='unsafe')
+    return float(gains[-1]) if count else gain
+
+
+def _feedback_mix_numpy(processed, previous, amount, output_signal):
+    # One temporary so output_signal may be `processed` itself
+    np.add(processed, previous * amount, out=output_signal)
+
+
+def _mix_meter_numpy(block, output, add):
+    # A pass each for the add, max, min and sum of squares
+    if add:
+        output += block
+    return float(max(block.max(), -block.min())), float(np.dot(block, block))
+
+
+BACKENDS = {
+    'numpy': {
+        'comb_feedback': _comb_feedback_numpy,
+        'gate_envelope': _gate_envelope_numpy,
+        'feedback_mix': _feedback_mix_numpy,
+        'mix_meter': _mix_meter_numpy,
+    },
+}
+if numba is not None:
+    BACKENDS['numba'] = {
+        'comb_feedback': numba.njit(cache=True)(_comb_feedback_loop),
+        'gate_envelope': numba.njit(cache=True)(_gate_envelope_loop),
+        'feedback_mix': numba.njit(cache=True)(_feedback_mix_loop),
+        'mix_meter': numba.njit(cache=True)(_mix_meter_loop),
+    }
+
+BACKEND = 'numba' if 'numba' in BACKENDS else 'numpy'
+comb_feedback = BACKENDS[BACKEND]['comb_feedback']
+gate_envelope = BACKENDS[BACKEND]['gate_envelope']
+feedback_mix = BACKENDS[BACKEND]['feedback_mix']
+mix_meter = BACKENDS[BACKEND]['mix_meter']
+
+
+def warmup(dtype='float32'):
+    """Run every kernel once so JIT compilation doesn't land on the first audio block"""
+    block = np.zeros(64, dtype=dtype)
+    out = np.empty_like(block)
+    history = np.zeros(16, dtype=dtype)
+    for kernels in BACKENDS.values():
+        kernels['comb_feedback'](block, out, history, 0, 0.5)
+        kernels['gate_envelope'](block, out, 0.0, 0.1, 0.01, 0.001)
+        kernels['feedback_mix'](block, block, 0.5, out)
+        kernels['mix_meter'](block, out, True)
+        kernels['mix_meter'](block, block, False)
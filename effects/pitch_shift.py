@@ -1,15 +1,25 @@
 import numpy as np
-from scipy.signal import resample_poly
 import warnings
+from effects import filter as filters
+from effects.plugin import EffectPlugin, Parameter
 
-class PitchShiftEffect:
+resample_poly = None  # scipy.signal.resample_poly, imported by preload()
+butter = None
+
+class PitchShiftEffect(EffectPlugin):
     """More robust pitch shifting implementation"""
+    parameters = (Parameter('semitones', -24, 24, 0, 'st'),)
+
     def __init__(self, rate, semitones=0, quality='medium'):
-        self.rate = rate
+        super().__init__(rate)
         self.semitones = semitones
         self.quality = quality
         self.set_quality(quality)
-        
+        # Low-pass ahead of downsampling; its state carries across blocks
+        self._anti_alias = filters.SosFilter()
+        self._anti_alias_ratio = None
+        self._anti_alias_latency = 0
+
     def set_quality(self, quality):
         """Set resampling quality"""
         self.quality = quality
@@ -19,11 +29,34 @@ class PitchShiftEffect:
             'medium': 128,
             'high': 256
         }.get(quality.lower(), 128)
+
+    def prepare(self, rate, max_block):
+        super().prepare(rate, max_block)
+        self.preload()  # Here rather than in process, which runs on the audio thread
+
+    def preload(self):
+        """Import SciPy; deferred so it isn't paid at startup"""
+        global resample_poly, butter
+        if resample_poly is None:
+            from scipy.signal import resample_poly, butter
+        filters.preload()
+
+    @property
+    def latency_samples(self):
+        """Delay of the anti-alias filter, which only runs when the block is downsampled"""
+        return self._anti_alias_latency if self.semitones > 0 else 0
+
+    def reset(self):
+        self._anti_alias.reset()
+
+    def process(self, input_signal, out):
+        out[:] = self._shift(input_signal)
+        return out
         
-    def apply(self, input_signal):
+    def _shift(self, input_signal):
         """Apply pitch shift to the input signal"""
         if self.semitones == 0 or len(input_signal) == 0:
-            return input_signal.copy()
+            return input_signal
             
         try:
             # Changed sign here to correct direction
@@ -54,11 +87,13 @@ class PitchShiftEffect:
                             mode='constant')
         except Exception as e:
             print(f"Pitch shift error: {e}")
-            return input_signal.copy()
+            return input_signal
     
     def _anti_alias_filter(self, signal, ratio):
-        """Simple anti-aliasing filter for pitch reduction"""
-        # This is a basic low-pass filter - could be improved
-        b = [0.05, 0.1, 0.2, 0.3, 0.2, 0.1, 0.05]
-        a = 1
-        return np.convolve(signal, b, mode='same')
\ No newline at end of file
+        """Butterworth low-pass just under the new Nyquist frequency, for pitch reduction"""
+        if ratio != self._anti_alias_ratio:
+            sos = butter(8, 0.9 * ratio, output='sos')
+            self._anti_alias.set_sos(sos)
+            self._anti_alias_ratio = ratio
+            self._anti_alias_latency = int(round(filters.group_delay(sos)))
+        return self._anti_alias.process(signal)
\ No newline at end of file
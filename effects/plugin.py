@@ -0,0 +1,92 @@
+import numpy as np
+
+# Installed packages add effects by declaring an entry point in this group,
+# e.g. in pyproject.toml:
+#   [project.entry-points."freaky_looper.effects"]
+#   chorus = "my_package.chorus:ChorusEffect"
+ENTRY_POINT_GROUP = 'freaky_looper.effects'
+
+
+class Parameter:
+    """Describes one numeric effect parameter, for commands and generic controls.
+
+    A `ramped` parameter may also be set to an array with one value per
+    sample of the next block, which automation uses for smooth ramps.
+    """
+    def __init__(self, name, minimum, maximum, default, unit='', ramped=False):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+        self.unit = unit
+        self.ramped = ramped
+
+    def clamp(self, value):
+        return min(max(value, self.minimum), self.maximum)
+
+    def __repr__(self):
+        return f"Parameter({self.name!r}, {self.minimum}, {self.maximum}, {self.default})"
+
+
+class EffectPlugin:
+    """Base class for effects the looper can route loops through.
+
+    The engine builds an effect with its sample rate, then calls
+    `prepare(rate, max_block)` once, off the audio thread, so it can size
+    its buffers. Each block it calls `process(input_signal, out)`, which
+    writes exactly len(input_signal) samples into the preallocated `out`
+    (never the input buffer) without allocating where it can avoid it.
+
+    `latency_samples` is how far the output lags the input; the engine
+    shifts routed output back by the chain's total so it lands in time
+    with the loop it came from. `reset()` clears tails and filter state,
+    and is called when the effect is switched back in. `parameters` lists
+    the attributes that may be set while running.
+    """
+    parameters = ()
+    latency_samples = 0
+
+    def __init__(self, rate=44100):
+        self.rate = rate
+        self.max_block = None
+
+    def prepare(self, rate, max_block):
+        self.rate = rate
+        self.max_block = max_block
+
+    def process(self, input_signal, out):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+    def apply(self, input_signal):
+        """Process one block into a new array"""
+        out = np.empty_like(input_signal)
+        self.process(input_signal, out)
+        return out
+
+
+def discover_plugins():
+    """{name: (module, class name)} for installed effect entry points, by name.
+
+    Only the entry point metadata is read; the modules themselves are
+    imported on first use, like the built-in effects.
+    """
+    try:
+        from importlib.metadata import entry_points
+        try:
+            found = entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:  # Python < 3.10
+            found = entry_points().get(ENTRY_POINT_GROUP, [])
+    except Exception as e:
+        print(f"Effect plugin discovery failed: {e}")
+        return {}
+    plugins = {}
+    for entry in sorted(found, key=lambda entry: entry.name):
+        module_name, _, class_name = entry.value.partition(':')
+        if not class_name:
+            print(f"Ignoring effect plugin {entry.name}: expected 'module:Class', got {entry.value!r}")
+            continue
+        plugins[entry.name] = (module_name.strip(), class_name.strip())
+    return plugins
@@ -1,27 +1,43 @@
 import numpy as np
+from effects import kernels
+from effects.plugin import EffectPlugin, Parameter
 
-class ReverbEffect:
+class ReverbEffect(EffectPlugin):
     """Enhanced reverb effect with configurable parameters"""
+    parameters = (Parameter('decay', 0.0, 1.0, 0.5), Parameter('wet', 0.0, 1.0, 0.5, ramped=True),
+                  Parameter('delay_ms', 50, 500, 100, 'ms'))
+
     def __init__(self, rate, decay=0.5, wet=0.5, delay_ms=100):
-        self.rate = rate
+        super().__init__(rate)
         self.decay = decay
         self.wet = wet
         self.delay_ms = delay_ms
-        self.delay_samples = int(rate * delay_ms / 1000)
-        self.buffer = np.zeros(self.delay_samples)
+
+    @property
+    def delay_ms(self):
+        return self._delay_ms
+
+    @delay_ms.setter
+    def delay_ms(self, value):
+        # Ring of the last delay_samples outputs for the feedback comb
+        self._delay_ms = value
+        self.delay_samples = max(1, int(self.rate * value / 1000))
+        self.buffer = np.zeros(self.delay_samples, dtype=np.float32)
+        self.buffer_pos = 0
+
+    def preload(self):
+        kernels.warmup()
+
+    def reset(self):
+        self.buffer.fill(0)
+        self.buffer_pos = 0
         
-    def apply(self, input_signal):
-        output_signal = np.zeros_like(input_signal)
-        for i in range(len(input_signal)):
-            # Get the delayed sample
-            delayed_sample = self.buffer[-1] * self.decay
-            
-            # Mix with input
-            output_signal[i] = input_signal[i] + delayed_sample
-            
-            # Update buffer
-            self.buffer = np.roll(self.buffer, 1)
-            self.buffer[0] = output_signal[i]
+    def process(self, input_signal, out):
+        self.buffer_pos = kernels.comb_feedback(
+            input_signal, out, self.buffer, self.buffer_pos, float(self.decay))
             
-        # Apply wet/dry mix
-        return (1 - self.wet) * input_signal + self.wet * output_signal
\ No newline at end of file
+        # Apply wet/dry mix: dry + wet * (comb - dry)
+        out -= input_signal
+        out *= self.wet
+        out += input_signal
+        return out
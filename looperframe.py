@@ -1,7 +1,84 @@
+import os
 import wx
 import numpy as np
-from effects.reverb import ReverbEffect
-from effects.gate import GateEffect
+from audiolooper import PITCH_QUALITIES, FILTER_KINDS, PLUGIN_EFFECTS, effect_class
+from components.transport import QUANTIZE_MODES
+
+# Delay sync choices: label and delay length in beats (0 = free time in ms)
+DELAY_DIVISIONS = [("Off", 0.0), ("1/16", 0.25), ("1/8", 0.5), ("Dotted 1/8", 0.75),
+                   ("1/4", 1.0), ("1/2", 2.0)]
+
+# Playback rate presets offered per loop (label, rate)
+LOOP_RATES = [("1x", 1.0), ("0.5x", 0.5), ("2x", 2.0),
+              ("Rev", -1.0), ("Rev 0.5x", -0.5), ("Rev 2x", -2.0)]
+
+
+class WaveformPanel(wx.Panel):
+    """Draws a loop's peak overview with its play head"""
+    def __init__(self, parent, size=(240, 40)):
+        super().__init__(parent, size=size)
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.overview = None
+        self.position = 0.0
+        self.Bind(wx.EVT_PAINT, self._on_paint)
+
+    def set_overview(self, overview, position):
+        self.overview = overview
+        self.position = position
+        self.Refresh(False)
+
+    def _on_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self)
+        width, height = self.GetClientSize()
+        dc.SetBackground(wx.Brush(wx.Colour(30, 30, 30)))
+        dc.Clear()
+        if width <= 0:
+            return
+
+        if self.overview is not None:
+            # One vertical min/max line per pixel column
+            mins, maxs = self.overview.columns(width)
+            mid = height / 2
+            x = (np.arange(len(mins)) * width / len(mins)).astype(int)
+            top = (mid - np.clip(maxs, -1.0, 1.0) * mid).astype(int)
+            bottom = (mid - np.clip(mins, -1.0, 1.0) * mid).astype(int)
+            dc.SetPen(wx.Pen(wx.Colour(90, 200, 120)))
+            dc.DrawLineList(np.column_stack((x, top, x, bottom)).tolist())
+
+        playhead = int(self.position * width)
+        dc.SetPen(wx.Pen(wx.Colour(255, 80, 80), 2))
+        dc.DrawLine(playhead, 0, playhead, height)
+
+
+class SpectrumPanel(wx.Panel):
+    """Draws smoothed band levels (dB) as bars"""
+    def __init__(self, parent, size=(360, 80), floor_db=-90.0):
+        super().__init__(parent, size=size)
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.floor_db = floor_db
+        self.levels = None
+        self.Bind(wx.EVT_PAINT, self._on_paint)
+
+    def set_levels(self, levels):
+        self.levels = levels
+        self.Refresh(False)
+
+    def _on_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self)
+        width, height = self.GetClientSize()
+        dc.SetBackground(wx.Brush(wx.Colour(30, 30, 30)))
+        dc.Clear()
+        if self.levels is None or width <= 0:
+            return
+
+        count = len(self.levels)
+        heights = np.clip(1 - self.levels / self.floor_db, 0.0, 1.0) * height
+        x = (np.arange(count) * width / count).astype(int)
+        bar = max(1, width // count - 1)
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.SetBrush(wx.Brush(wx.Colour(90, 160, 220)))
+        dc.DrawRectangleList([(int(left), height - int(h), bar, int(h))
+                              for left, h in zip(x, heights)])
 
 
 class LooperFrame(wx.Frame):
@@ -9,10 +86,43 @@ class LooperFrame(wx.Frame):
         super().__init__(None, title="Audio Looper", size=(1000, 700))
         self.looper = looper
         self.loop_controls = []  # Stores UI controls for each loop
+
+        # GUI-side copy of the state it changes; the engine applies changes
+        # at the next block, so labels are driven from these values, and
+        # they follow the engine (changes from OSC or MIDI) on the display timer
+        controls = looper.loop_controls
+        self.is_recording = controls.is_recording
+        self.is_overdubbing = controls.is_overdubbing
+        self.automation_loop = looper.automation_loop
+        self.selected_loop_id = controls.current_loop_id
+        self.muted = dict(controls.muted_loops)
+        self.soloed = dict(controls.soloed_loops)
+        self.effect_flags = {}
+        self.effect_prefixes = {}
+        for effect, prefix in (('reverb', 'reverb'), ('gate', 'gate'), ('pitch_shift', 'pitch'),
+                               ('convolution', 'convolution'), ('filter', 'filter'),
+                               ('delay', 'delay')) + tuple((name, name) for name in PLUGIN_EFFECTS):
+            self.effect_prefixes[effect] = prefix
+            for flag in ('bypass', 'overdub'):
+                self.effect_flags[f"{effect}.{flag}"] = getattr(looper, f"{prefix}_{flag}")
+        self.effect_buttons = {}  # "effect.flag" -> (button, label)
         self._init_ui()
+        for effect, prefix in self.effect_prefixes.items():
+            if effect not in PLUGIN_EFFECTS:
+                self.effect_buttons[f"{effect}.bypass"] = (
+                    getattr(self, f"bypass_{prefix}_button"), f"Bypass {prefix.title()}")
+                self.effect_buttons[f"{effect}.overdub"] = (
+                    getattr(self, f"{prefix}_overdub_button"), f"{prefix.title()} Overdub")
         self._setup_event_handlers()
         self._update_ui_state()
 
+        # Waveform/meter/playhead refresh at ~30 fps
+        self._last_meters = ((0.0, 0.0), {})
+        self._was_stretching = False
+        self.display_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self._on_display_timer, self.display_timer)
+        self.display_timer.Start(33)
+
     def _init_ui(self):
         """Initialize all UI components"""
         self.panel = wx.Panel(self)
@@ -26,18 +136,35 @@ class LooperFrame(wx.Frame):
 
         # Initialize loop controls for existing loops
         for loop_id in self.looper.loop_controls.loops:
-            loop_length = self.looper.loop_controls.loop_sizes[loop_id] * self.looper.chunk / self.looper.rate
+            loop_length = self.looper.loop_controls.loop_lengths[loop_id] / self.looper.rate
             self._add_loop_control(loop_id, len(self.loop_controls) + 1, loop_length)
 
     def _create_top_controls(self):
         """Create the top control panel"""
         top_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self._create_recording_controls(top_sizer)
+        self._create_transport_controls(top_sizer)
         self._create_reverb_controls(top_sizer)
         self._create_gate_controls(top_sizer)
         self._create_pitch_controls(top_sizer)
         self.main_sizer.Add(top_sizer, 0, wx.EXPAND)
 
+        # Second row for the newer effects
+        effects_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self._create_convolution_controls(effects_sizer)
+        self._create_filter_controls(effects_sizer)
+        self._create_delay_controls(effects_sizer)
+        self._create_granular_controls(effects_sizer)
+        self.main_sizer.Add(effects_sizer, 0, wx.EXPAND)
+
+        # Installed effect plugins get generic controls from their parameter descriptors
+        self.plugin_controls = {}
+        if PLUGIN_EFFECTS:
+            plugins_sizer = wx.BoxSizer(wx.HORIZONTAL)
+            for name in PLUGIN_EFFECTS:
+                self._create_plugin_controls(plugins_sizer, name)
+            self.main_sizer.Add(plugins_sizer, 0, wx.EXPAND)
+
     def _create_recording_controls(self, parent_sizer):
         """Create recording controls"""
         recording_box = wx.StaticBox(self.panel, label="Recording")
@@ -46,6 +173,11 @@ class LooperFrame(wx.Frame):
         controls = [
             ("recording_button", "Record: Off", self.toggle_recording),
             ("overdub_button", "Overdub: Off", self.toggle_overdub),
+            ("undo_button", "Undo", self.undo),
+            ("redo_button", "Redo", self.redo),
+            ("automation_button", "Automate: Off", self.toggle_automation),
+            ("clear_automation_button", "Clear Automation", self.clear_automation),
+            ("load_automation_button", "Load Automation...", self.load_automation),
             ("start_recording_button", "Start Session", self.start_recording_session),
             ("stop_recording_button", "Stop Session", self.stop_recording_session),
             ("save_recording_button", "Save Recording", self.save_recording)
@@ -61,6 +193,38 @@ class LooperFrame(wx.Frame):
         self.save_recording_button.Disable()
         parent_sizer.Add(recording_sizer, 1, wx.EXPAND|wx.ALL, 5)
 
+    def _create_transport_controls(self, parent_sizer):
+        """Create tempo/quantize controls"""
+        box = wx.StaticBox(self.panel, label="Transport")
+        sizer = wx.StaticBoxSizer(box, wx.VERTICAL)
+        transport = self.looper.transport
+
+        grid = wx.FlexGridSizer(cols=2, vgap=5, hgap=5)
+        self.bpm_spin = wx.SpinCtrl(self.panel, min=40, max=240, initial=int(transport.bpm))
+        self.beats_spin = wx.SpinCtrl(self.panel, min=1, max=12, initial=transport.beats_per_bar)
+        self.quantize_choice = wx.Choice(self.panel, choices=["Off", "Beat", "Bar"])
+        self.quantize_choice.SetSelection(QUANTIZE_MODES.index(transport.quantize))
+        for label, ctrl in (("BPM:", self.bpm_spin), ("Beats/Bar:", self.beats_spin),
+                            ("Quantize:", self.quantize_choice)):
+            grid.Add(wx.StaticText(self.panel, label=label), 0, wx.ALIGN_CENTER_VERTICAL)
+            grid.Add(ctrl, 0, wx.EXPAND)
+        sizer.Add(grid, 1, wx.EXPAND|wx.ALL, 5)
+
+        # Resize mode for loop length changes: cut/repeat, or time-stretch
+        self.stretch_checkbox = wx.CheckBox(self.panel, label="Time-stretch on resize")
+        sizer.Add(self.stretch_checkbox, 0, wx.ALL, 5)
+
+        # Offered once a tempo has been detected from a recorded loop
+        self.use_tempo_button = self._create_button("Use Detected Tempo", self._on_use_tempo)
+        self.use_tempo_button.Disable()
+        sizer.Add(self.use_tempo_button, 0, wx.ALL|wx.EXPAND, 5)
+        self.detected_tempo = None
+
+        self.bpm_spin.Bind(wx.EVT_SPINCTRL, self._on_bpm_change)
+        self.beats_spin.Bind(wx.EVT_SPINCTRL, self._on_beats_change)
+        self.quantize_choice.Bind(wx.EVT_CHOICE, self._on_quantize_change)
+        parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
+
     def _create_pitch_controls(self, parent_sizer):
         """Create pitch shift effect controls"""
         box = wx.StaticBox(self.panel, label="Pitch Shift")
@@ -143,6 +307,140 @@ class LooperFrame(wx.Frame):
         sizer.Add(self.reverb_overdub_button, 0, wx.ALL|wx.EXPAND, 5)
         parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
 
+    def _create_convolution_controls(self, parent_sizer):
+        """Create convolution (impulse response) controls"""
+        box = wx.StaticBox(self.panel, label="Convolution")
+        sizer = wx.StaticBoxSizer(box, wx.VERTICAL)
+
+        self.bypass_convolution_button = self._create_button("Bypass Convolution: On",
+                                                             self.toggle_bypass_convolution)
+        self.convolution_overdub_button = self._create_button("Convolution Overdub: Off",
+                                                              self.toggle_convolution_overdub)
+        self.load_impulse_button = self._create_button("Load IR...", self.load_impulse_response)
+        self.impulse_label = wx.StaticText(self.panel, label="No IR loaded")
+
+        params = [
+            ("Input Loop:", "convolution_input_choice", []),
+            ("Output Loop:", "convolution_output_choice", []),
+            ("Wet/Dry:", "convolution_wet_slider", 50, 0, 100)
+        ]
+
+        grid = self._create_parameter_grid(params)
+        sizer.Add(self.bypass_convolution_button, 0, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(self.load_impulse_button, 0, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(self.impulse_label, 0, wx.ALL, 5)
+        sizer.Add(grid, 1, wx.EXPAND|wx.ALL, 5)
+        sizer.Add(self.convolution_overdub_button, 0, wx.ALL|wx.EXPAND, 5)
+        parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
+
+    def _create_filter_controls(self, parent_sizer):
+        """Create filter/EQ controls"""
+        box = wx.StaticBox(self.panel, label="Filter / EQ")
+        sizer = wx.StaticBoxSizer(box, wx.VERTICAL)
+
+        self.bypass_filter_button = self._create_button("Bypass Filter: On", self.toggle_bypass_filter)
+        self.filter_overdub_button = self._create_button("Filter Overdub: Off", self.toggle_filter_overdub)
+
+        params = [
+            ("Input Loop:", "filter_input_choice", []),
+            ("Output Loop:", "filter_output_choice", []),
+            ("Type:", "filter_kind_choice", [kind.capitalize() for kind in FILTER_KINDS]),
+            ("Frequency:", "filter_frequency_slider", 50, 0, 100),
+            ("Q (x10):", "filter_q_slider", 7, 1, 100),
+            ("Gain (dB):", "filter_gain_slider", 0, -24, 24)
+        ]
+
+        grid = self._create_parameter_grid(params)
+        sizer.Add(self.bypass_filter_button, 0, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(grid, 1, wx.EXPAND|wx.ALL, 5)
+        sizer.Add(self.filter_overdub_button, 0, wx.ALL|wx.EXPAND, 5)
+        parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
+
+    def _create_delay_controls(self, parent_sizer):
+        """Create delay controls"""
+        box = wx.StaticBox(self.panel, label="Delay")
+        sizer = wx.StaticBoxSizer(box, wx.VERTICAL)
+
+        self.bypass_delay_button = self._create_button("Bypass Delay: On", self.toggle_bypass_delay)
+        self.delay_overdub_button = self._create_button("Delay Overdub: Off", self.toggle_delay_overdub)
+
+        params = [
+            ("Input Loop:", "delay_input_choice", []),
+            ("Output Loop:", "delay_output_choice", []),
+            ("Time (ms):", "delay_time_slider", 375, 10, 2000),
+            ("Sync:", "delay_sync_choice", [label for label, beats in DELAY_DIVISIONS]),
+            ("Feedback:", "delay_feedback_slider", 40, 0, 95),
+            ("Wet/Dry:", "delay_wet_slider", 35, 0, 100)
+        ]
+
+        grid = self._create_parameter_grid(params)
+        sizer.Add(self.bypass_delay_button, 0, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(grid, 1, wx.EXPAND|wx.ALL, 5)
+        sizer.Add(self.delay_overdub_button, 0, wx.ALL|wx.EXPAND, 5)
+        parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
+
+    def _create_granular_controls(self, parent_sizer):
+        """Create granular playback controls"""
+        box = wx.StaticBox(self.panel, label="Granular")
+        sizer = wx.StaticBoxSizer(box, wx.VERTICAL)
+
+        self.granular_loops = set()  # Loops switched to granular playback from here
+        self.granular_button = self._create_button("Granular: Off", self.toggle_granular)
+
+        params = [
+            ("Loop:", "granular_loop_choice", []),
+            ("Position (%):", "granular_position_slider", 0, 0, 100),
+            ("Grain (ms):", "granular_size_slider", 80, 10, 500),
+            ("Pitch (st):", "granular_pitch_slider", 0, -24, 24),
+            ("Density (/s):", "granular_density_slider", 40, 1, 400),
+            ("Spray (%):", "granular_spray_slider", 5, 0, 100)
+        ]
+
+        grid = self._create_parameter_grid(params)
+        sizer.Add(self.granular_button, 0, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(grid, 1, wx.EXPAND|wx.ALL, 5)
+        parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
+
+    def _create_plugin_controls(self, parent_sizer, name):
+        """Create bypass, routing and parameter controls for an effect plugin"""
+        parameters = effect_class(name).parameters
+        label = name.replace('_', ' ').title()
+        box = wx.StaticBox(self.panel, label=label)
+        sizer = wx.StaticBoxSizer(box, wx.VERTICAL)
+
+        controls = self.plugin_controls[name] = {'sliders': []}
+        bypass = wx.Button(self.panel, label=f"Bypass {label}: On")
+        bypass.Bind(wx.EVT_BUTTON, lambda e: self._toggle_effect_flag(name, 'bypass', bypass, f"Bypass {label}"))
+        self.effect_buttons[f"{name}.bypass"] = (bypass, f"Bypass {label}")
+
+        grid = wx.FlexGridSizer(cols=2, vgap=5, hgap=5)
+        for key in ('input', 'output'):
+            grid.Add(wx.StaticText(self.panel, label=f"{key.title()} Loop:"), 0, wx.ALIGN_CENTER_VERTICAL)
+            choice = controls[key] = wx.Choice(self.panel, choices=[])
+            choice.Bind(wx.EVT_CHOICE, lambda e, k=key: self._on_plugin_route_change(name, k))
+            grid.Add(choice, 0, wx.EXPAND)
+        # Sliders run 0-100 across each parameter's range
+        for index, parameter in enumerate(parameters):
+            unit = f" ({parameter.unit})" if parameter.unit else ""
+            grid.Add(wx.StaticText(self.panel, label=f"{parameter.name.replace('_', ' ').title()}{unit}:"),
+                     0, wx.ALIGN_CENTER_VERTICAL)
+            span = (parameter.maximum - parameter.minimum) or 1
+            slider = wx.Slider(self.panel, value=int(round(100 * (parameter.default - parameter.minimum) / span)),
+                               minValue=0, maxValue=100)
+            slider.Bind(wx.EVT_SLIDER, lambda e, i=index, p=parameter, sl=slider: self.looper.post_command(
+                f'{name}.param', i, p.minimum + (p.maximum - p.minimum) * sl.GetValue() / 100.0))
+            controls['sliders'].append(slider)
+            grid.Add(slider, 0, wx.EXPAND)
+
+        sizer.Add(bypass, 0, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(grid, 1, wx.EXPAND|wx.ALL, 5)
+        parent_sizer.Add(sizer, 1, wx.EXPAND|wx.ALL, 5)
+
+    @staticmethod
+    def _filter_frequency(position):
+        """Map a 0-100 slider position onto 20 Hz - 20 kHz, logarithmically"""
+        return 20.0 * 1000 ** (position / 100.0)
+
     def _create_gate_controls(self, parent_sizer):
         """Create gate controls"""
         box = wx.StaticBox(self.panel, label="Gate")
@@ -211,6 +509,24 @@ class LooperFrame(wx.Frame):
 
     def _create_bottom_controls(self):
         """Create bottom controls"""
+        master_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        master_sizer.Add(wx.StaticText(self.panel, label="Master:"), 0, wx.ALIGN_CENTER_VERTICAL|wx.RIGHT, 5)
+        self.master_meter = wx.Gauge(self.panel, range=100, size=(200, 12))
+        master_sizer.Add(self.master_meter, 0, wx.ALIGN_CENTER_VERTICAL)
+        master_sizer.Add(wx.StaticText(self.panel, label="Spectrum:"), 0, wx.ALIGN_CENTER_VERTICAL|wx.LEFT|wx.RIGHT, 5)
+        self.spectrum_tap = wx.Choice(self.panel, choices=["Master", "Gate", "Pitch", "Reverb", "Convolution", "Filter", "Delay"])
+        self.spectrum_tap.SetSelection(0)
+        master_sizer.Add(self.spectrum_tap, 0, wx.ALIGN_CENTER_VERTICAL|wx.RIGHT, 5)
+        self.spectrum_panel = SpectrumPanel(self.panel)
+        master_sizer.Add(self.spectrum_panel, 0, wx.ALIGN_CENTER_VERTICAL)
+        self.memory_label = wx.StaticText(self.panel, label="")
+        master_sizer.Add(self.memory_label, 0, wx.ALIGN_CENTER_VERTICAL|wx.LEFT, 10)
+        self.calibrate_button = self._create_button("Calibrate Latency", self.calibrate_latency)
+        master_sizer.Add(self.calibrate_button, 0, wx.ALIGN_CENTER_VERTICAL|wx.LEFT, 10)
+        self.latency_label = wx.StaticText(self.panel, label="")
+        master_sizer.Add(self.latency_label, 0, wx.ALIGN_CENTER_VERTICAL|wx.LEFT, 5)
+        self.main_sizer.Add(master_sizer, 0, wx.ALL | wx.CENTER, 5)
+
         self.status_label = wx.StaticText(self.panel, label="Ready")
         self.status_label.SetFont(wx.Font(12, wx.FONTFAMILY_DEFAULT, 
                                        wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
@@ -242,7 +558,23 @@ class LooperFrame(wx.Frame):
         
         # Length display
         control['length_label'] = wx.StaticText(self.scroll_panel, label=f"{initial_length:.1f} s")
+
+        # Waveform overview with play head, and a level meter
+        control['waveform'] = WaveformPanel(self.scroll_panel)
+        control['meter'] = wx.Gauge(self.scroll_panel, range=100, size=(60, 12))
         
+        # Input channel armed into this loop
+        input_names = ["In: Off"] + [f"In {ch + 1}" for ch in range(self.looper.input_channels)]
+        control['input'] = wx.Choice(self.scroll_panel, choices=input_names)
+        armed = self.looper.loop_controls.armed_channel(loop_id)
+        control['input'].SetSelection(0 if armed is None else armed + 1)
+
+        # Playback rate / direction
+        control['rate'] = wx.Choice(self.scroll_panel, choices=[label for label, _ in LOOP_RATES])
+        rate = self.looper.loop_controls.loop_rates.get(loop_id, 1.0)
+        rates = [value for _, value in LOOP_RATES]
+        control['rate'].SetSelection(rates.index(rate) if rate in rates else 0)
+
         # Action buttons
         control['select'] = wx.Button(self.scroll_panel, label="Select")
         control['mute'] = wx.Button(self.scroll_panel, label="Mute")
@@ -251,7 +583,7 @@ class LooperFrame(wx.Frame):
         control['delete'] = wx.Button(self.scroll_panel, label="Delete")
 
         # Add controls to sizer
-        for key in ['text', 'slider', 'length_label', 'select', 
+        for key in ['text', 'slider', 'length_label', 'waveform', 'meter', 'input', 'rate', 'select', 
                 'clear', 'delete', 'mute', 'solo']:
             loop_sizer.Add(control[key], 0, wx.ALL | wx.CENTER, 5)
 
@@ -261,6 +593,8 @@ class LooperFrame(wx.Frame):
         # Bind events
         control['text'].Bind(wx.EVT_TEXT, lambda e, lid=loop_id: self._on_loop_text_change(lid, e))
         control['slider'].Bind(wx.EVT_SLIDER, lambda e, lid=loop_id: self._on_loop_slider_change(lid, e))
+        control['input'].Bind(wx.EVT_CHOICE, lambda e, lid=loop_id: self._on_loop_input_change(lid, e))
+        control['rate'].Bind(wx.EVT_CHOICE, lambda e, lid=loop_id: self._on_loop_rate_change(lid, e))
         control['select'].Bind(wx.EVT_BUTTON, lambda e, lid=loop_id: self.select_loop(lid))
         control['mute'].Bind(wx.EVT_BUTTON, lambda e, lid=loop_id: self.toggle_mute(lid))
         control['solo'].Bind(wx.EVT_BUTTON, lambda e, lid=loop_id: self.toggle_solo(lid))
@@ -278,6 +612,32 @@ class LooperFrame(wx.Frame):
         self.reverb_wet_slider.Bind(wx.EVT_SLIDER, self._on_reverb_wet_change)
         self.reverb_delay_slider.Bind(wx.EVT_SLIDER, self._on_reverb_delay_change)
 
+        # Convolution controls
+        self.convolution_input_choice.Bind(wx.EVT_CHOICE, self._on_convolution_input_change)
+        self.convolution_output_choice.Bind(wx.EVT_CHOICE, self._on_convolution_output_change)
+        self.convolution_wet_slider.Bind(wx.EVT_SLIDER, self._on_convolution_wet_change)
+
+        # Filter controls
+        self.filter_input_choice.Bind(wx.EVT_CHOICE, self._on_filter_input_change)
+        self.filter_output_choice.Bind(wx.EVT_CHOICE, self._on_filter_output_change)
+        self.filter_kind_choice.Bind(wx.EVT_CHOICE, self._on_filter_kind_change)
+        self.filter_frequency_slider.Bind(wx.EVT_SLIDER, self._on_filter_frequency_change)
+        self.filter_q_slider.Bind(wx.EVT_SLIDER, self._on_filter_q_change)
+        self.filter_gain_slider.Bind(wx.EVT_SLIDER, self._on_filter_gain_change)
+
+        # Delay controls
+        self.delay_input_choice.Bind(wx.EVT_CHOICE, self._on_delay_input_change)
+        self.delay_output_choice.Bind(wx.EVT_CHOICE, self._on_delay_output_change)
+        self.delay_time_slider.Bind(wx.EVT_SLIDER, self._on_delay_time_change)
+        self.delay_sync_choice.Bind(wx.EVT_CHOICE, self._on_delay_sync_change)
+        self.delay_feedback_slider.Bind(wx.EVT_SLIDER, self._on_delay_feedback_change)
+        self.delay_wet_slider.Bind(wx.EVT_SLIDER, self._on_delay_wet_change)
+
+        # Granular controls
+        self.granular_loop_choice.Bind(wx.EVT_CHOICE, self._on_granular_loop_change)
+        for param, slider in self._granular_sliders():
+            slider.Bind(wx.EVT_SLIDER, lambda e, p=param: self._post_granular_param(p))
+
         # Gate controls
         self.gate_input_choice.Bind(wx.EVT_CHOICE, self._on_gate_input_change)
         self.gate_output_choice.Bind(wx.EVT_CHOICE, self._on_gate_output_change)
@@ -302,16 +662,44 @@ class LooperFrame(wx.Frame):
         # Reverb
         self.bypass_reverb_button.SetLabel(f"Bypass Reverb: {'On' if self.looper.reverb_bypass else 'Off'}")
         self.reverb_overdub_button.SetLabel(f"Reverb Overdub: {'On' if self.looper.reverb_overdub else 'Off'}")
-        self.reverb_decay_slider.SetValue(int(self.looper.reverb.decay * 100))
-        self.reverb_wet_slider.SetValue(int(self.looper.reverb.wet * 100))
-        self.reverb_delay_slider.SetValue(int(self.looper.reverb.delay_ms))
+        self.reverb_decay_slider.SetValue(int(self.looper.effect_setting('reverb', 'decay') * 100))
+        self.reverb_wet_slider.SetValue(int(self.looper.effect_setting('reverb', 'wet') * 100))
+        self.reverb_delay_slider.SetValue(int(self.looper.effect_setting('reverb', 'delay_ms')))
+
+        # Convolution
+        self.bypass_convolution_button.SetLabel(
+            f"Bypass Convolution: {'On' if self.looper.convolution_bypass else 'Off'}")
+        self.convolution_overdub_button.SetLabel(
+            f"Convolution Overdub: {'On' if self.looper.convolution_overdub else 'Off'}")
+        self.convolution_wet_slider.SetValue(int(self.looper.effect_setting('convolution', 'wet') * 100))
+
+        # Filter
+        self.bypass_filter_button.SetLabel(f"Bypass Filter: {'On' if self.looper.filter_bypass else 'Off'}")
+        self.filter_overdub_button.SetLabel(f"Filter Overdub: {'On' if self.looper.filter_overdub else 'Off'}")
+        self.filter_kind_choice.SetSelection(
+            FILTER_KINDS.index(self.looper.effect_setting('filter', 'kind')))
+        self.filter_frequency_slider.SetValue(
+            int(round(100 * np.log(self.looper.effect_setting('filter', 'frequency') / 20.0) / np.log(1000))))
+        self.filter_q_slider.SetValue(int(round(self.looper.effect_setting('filter', 'q') * 10)))
+        self.filter_gain_slider.SetValue(int(self.looper.effect_setting('filter', 'gain_db')))
+
+        # Delay
+        self.bypass_delay_button.SetLabel(f"Bypass Delay: {'On' if self.looper.delay_bypass else 'Off'}")
+        self.delay_overdub_button.SetLabel(f"Delay Overdub: {'On' if self.looper.delay_overdub else 'Off'}")
+        self.delay_time_slider.SetValue(int(self.looper.effect_setting('delay', 'time_ms')))
+        delay_beats = self.looper.effect_setting('delay', 'beats')
+        self.delay_sync_choice.SetSelection(next(
+            (i for i, (label, beats) in enumerate(DELAY_DIVISIONS) if beats == delay_beats), 0))
+        self.delay_time_slider.Enable(delay_beats == 0)
+        self.delay_feedback_slider.SetValue(int(self.looper.effect_setting('delay', 'feedback') * 100))
+        self.delay_wet_slider.SetValue(int(self.looper.effect_setting('delay', 'wet') * 100))
         
         # Gate
         self.bypass_gate_button.SetLabel(f"Bypass Gate: {'On' if self.looper.gate_bypass else 'Off'}")
         self.gate_overdub_button.SetLabel(f"Gate Overdub: {'On' if self.looper.gate_overdub else 'Off'}")
-        self.gate_threshold_slider.SetValue(int(self.looper.gate.threshold * 100))
-        self.gate_attack_slider.SetValue(int(self.looper.gate.attack_ms))
-        self.gate_release_slider.SetValue(int(self.looper.gate.release_ms))
+        self.gate_threshold_slider.SetValue(int(self.looper.effect_setting('gate', 'threshold') * 100))
+        self.gate_attack_slider.SetValue(int(self.looper.effect_setting('gate', 'attack_ms')))
+        self.gate_release_slider.SetValue(int(self.looper.effect_setting('gate', 'release_ms')))
 
         # Pitch shift controls
         self.bypass_pitch_button.SetLabel(f"Bypass Pitch: {'On' if self.looper.pitch_bypass else 'Off'}")
@@ -321,14 +709,15 @@ class LooperFrame(wx.Frame):
         self.pitch_semitones_text.Unbind(wx.EVT_TEXT)
         self.pitch_semitones_slider.Unbind(wx.EVT_SLIDER)
         
-        self.pitch_semitones_text.ChangeValue(str(self.looper.pitch_shift.semitones))
-        self.pitch_semitones_slider.SetValue(self.looper.pitch_shift.semitones)
+        self.pitch_semitones_text.ChangeValue(str(self.looper.effect_setting('pitch_shift', 'semitones')))
+        self.pitch_semitones_slider.SetValue(self.looper.effect_setting('pitch_shift', 'semitones'))
         
         self.pitch_semitones_text.Bind(wx.EVT_TEXT, self._on_pitch_semitones_text_change)
         self.pitch_semitones_slider.Bind(wx.EVT_SLIDER, self._on_pitch_semitones_slider_change)
         
         # Set quality selection
-        quality_index = ["low", "medium", "high"].index(self.looper.pitch_shift.quality.lower())
+        quality = self.looper.effect_setting('pitch_shift', 'quality')
+        quality_index = ["low", "medium", "high"].index(quality.lower())
         self.pitch_quality_choice.SetSelection(quality_index)
 
     def _update_effect_menus(self):
@@ -342,9 +731,9 @@ class LooperFrame(wx.Frame):
         # Set default selections if not set
         if len(self.loop_controls) > 0:
             if self.looper.reverb_input_id is None:
-                self.looper.reverb_input_id = self.loop_controls[0]['id']
+                self.looper.post_command('reverb.input', self.loop_controls[0]['id'])
             if self.looper.reverb_output_id is None:
-                self.looper.reverb_output_id = self.loop_controls[0]['id']
+                self.looper.post_command('reverb.output', self.loop_controls[0]['id'])
             
             # Find current selections
             input_idx = next((i for i, c in enumerate(self.loop_controls) 
@@ -354,6 +743,75 @@ class LooperFrame(wx.Frame):
             
         self.reverb_input_choice.SetSelection(input_idx)
         self.reverb_output_choice.SetSelection(output_idx)
+
+        # Convolution menus
+        self.convolution_input_choice.SetItems(loop_names)
+        self.convolution_output_choice.SetItems(loop_names)
+        if len(self.loop_controls) > 0:
+            if self.looper.convolution_input_id is None:
+                self.looper.post_command('convolution.input', self.loop_controls[0]['id'])
+            if self.looper.convolution_output_id is None:
+                self.looper.post_command('convolution.output', self.loop_controls[0]['id'])
+
+            input_idx = next((i for i, c in enumerate(self.loop_controls)
+                            if c['id'] == self.looper.convolution_input_id), 0)
+            output_idx = next((i for i, c in enumerate(self.loop_controls)
+                            if c['id'] == self.looper.convolution_output_id), 0)
+
+            self.convolution_input_choice.SetSelection(input_idx)
+            self.convolution_output_choice.SetSelection(output_idx)
+
+        # Filter menus
+        self.filter_input_choice.SetItems(loop_names)
+        self.filter_output_choice.SetItems(loop_names)
+        if len(self.loop_controls) > 0:
+            if self.looper.filter_input_id is None:
+                self.looper.post_command('filter.input', self.loop_controls[0]['id'])
+            if self.looper.filter_output_id is None:
+                self.looper.post_command('filter.output', self.loop_controls[0]['id'])
+
+            input_idx = next((i for i, c in enumerate(self.loop_controls)
+                            if c['id'] == self.looper.filter_input_id), 0)
+            output_idx = next((i for i, c in enumerate(self.loop_controls)
+                            if c['id'] == self.looper.filter_output_id), 0)
+
+            self.filter_input_choice.SetSelection(input_idx)
+            self.filter_output_choice.SetSelection(output_idx)
+
+        # Delay menus
+        self.delay_input_choice.SetItems(loop_names)
+        self.delay_output_choice.SetItems(loop_names)
+        if len(self.loop_controls) > 0:
+            if self.looper.delay_input_id is None:
+                self.looper.post_command('delay.input', self.loop_controls[0]['id'])
+            if self.looper.delay_output_id is None:
+                self.looper.post_command('delay.output', self.loop_controls[0]['id'])
+
+            input_idx = next((i for i, c in enumerate(self.loop_controls)
+                            if c['id'] == self.looper.delay_input_id), 0)
+            output_idx = next((i for i, c in enumerate(self.loop_controls)
+                            if c['id'] == self.looper.delay_output_id), 0)
+
+            self.delay_input_choice.SetSelection(input_idx)
+            self.delay_output_choice.SetSelection(output_idx)
+
+        # Plugin menus
+        for name, controls in self.plugin_controls.items():
+            for key in ('input', 'output'):
+                controls[key].SetItems(loop_names)
+                current = getattr(self.looper, f"{name}_{key}_id")
+                if len(self.loop_controls) > 0:
+                    controls[key].SetSelection(next(
+                        (i for i, c in enumerate(self.loop_controls) if c['id'] == current), 0))
+
+        # Granular loop menu
+        selected = self._granular_loop_id()
+        self.granular_loop_choice.SetItems(loop_names)
+        self.granular_loops &= {c['id'] for c in self.loop_controls}
+        if len(self.loop_controls) > 0:
+            self.granular_loop_choice.SetSelection(next(
+                (i for i, c in enumerate(self.loop_controls) if c['id'] == selected), 0))
+        self._update_granular_button()
         
         # Gate menus
         self.gate_input_choice.SetItems(loop_names)
@@ -362,9 +820,9 @@ class LooperFrame(wx.Frame):
         # Set default selections if not set
         if len(self.loop_controls) > 0:
             if self.looper.gate_input_id is None:
-                self.looper.gate_input_id = self.loop_controls[0]['id']
+                self.looper.post_command('gate.input', self.loop_controls[0]['id'])
             if self.looper.gate_output_id is None:
-                self.looper.gate_output_id = self.loop_controls[0]['id']
+                self.looper.post_command('gate.output', self.loop_controls[0]['id'])
             
             # Find current selections
             input_idx = next((i for i, c in enumerate(self.loop_controls) 
@@ -382,9 +840,9 @@ class LooperFrame(wx.Frame):
         # Set default selections if not set
         if len(self.loop_controls) > 0:
             if self.looper.pitch_input_id is None:
-                self.looper.pitch_input_id = self.loop_controls[0]['id']
+                self.looper.post_command('pitch_shift.input', self.loop_controls[0]['id'])
             if self.looper.pitch_output_id is None:
-                self.looper.pitch_output_id = self.loop_controls[0]['id']
+                self.looper.post_command('pitch_shift.output', self.loop_controls[0]['id'])
             
             input_idx = next((i for i, c in enumerate(self.loop_controls) 
                             if c['id'] == self.looper.pitch_input_id), 0)
@@ -394,9 +852,98 @@ class LooperFrame(wx.Frame):
             self.pitch_input_choice.SetSelection(input_idx)
             self.pitch_output_choice.SetSelection(output_idx)
 
+    def _on_display_timer(self, event):
+        """Redraw waveforms and meters from what the mixer published; never takes the looper lock"""
+        meters = self.looper.read_meters()
+        if meters is not None:
+            self._last_meters = meters
+        master, loops = self._last_meters
+
+        self.master_meter.SetValue(self._meter_value(master[0]))
+        self._sync_engine_state()
+        for control in self.loop_controls:
+            loop_id = control['id']
+            peak, rms, position = loops.get(loop_id, (0.0, 0.0, 0.0))
+            control['meter'].SetValue(self._meter_value(peak))
+            control['waveform'].set_overview(self.looper.loop_overview(loop_id), position)
+
+        stretching = self.looper.stretch_progress()
+        if stretching:
+            self.status_label.SetLabel(", ".join(
+                f"Stretching Loop {self._get_display_number(loop_id)}: {fraction:.0%}"
+                for loop_id, fraction in stretching.items()))
+        elif self._was_stretching:
+            self.status_label.SetLabel("Time-stretch done")
+        self._was_stretching = bool(stretching)
+
+        detected = self.looper.tempo.take_result()
+        if detected is not None:
+            self.detected_tempo = detected
+            self.use_tempo_button.Enable()
+            self.status_label.SetLabel(
+                f"Detected {detected[1]:.1f} BPM in Loop {self._get_display_number(detected[0])}")
+
+        tap = self.spectrum_tap.GetStringSelection().lower()
+        self.spectrum_panel.set_levels(self.looper.read_spectrum(tap))
+
+        held, saved = self.looper.memory_stats()
+        label = f"Loops: {held / 2**20:.1f} MB"
+        if saved:
+            label += f" ({saved / 2**20:.1f} MB saved)"
+        if label != self.memory_label.GetLabel():
+            self.memory_label.SetLabel(label)
+
+        latency, calibrating = self.looper.latency_status()
+        label = "Calibrating..." if calibrating else f"Latency: {1000 * latency / self.looper.rate:.1f} ms"
+        if label != self.latency_label.GetLabel():
+            self.latency_label.SetLabel(label)
+        self.calibrate_button.Enable(not calibrating)
+
+    def _sync_engine_state(self):
+        """Pick up toggles changed elsewhere (OSC, MIDI) once our own commands have landed"""
+        if self.looper.commands.pending():
+            return  # The engine hasn't applied what we last sent yet
+        controls = self.looper.loop_controls
+        if controls.is_recording != self.is_recording:
+            self.is_recording = controls.is_recording
+            self.recording_button.SetLabel(f"Recording: {'On' if self.is_recording else 'Off'}")
+        if controls.is_overdubbing != self.is_overdubbing:
+            self.is_overdubbing = controls.is_overdubbing
+            self.overdub_button.SetLabel(f"Overdub: {'On' if self.is_overdubbing else 'Off'}")
+        for loop_id in self.muted:
+            muted = controls.muted_loops.get(loop_id, self.muted[loop_id])
+            soloed = controls.soloed_loops.get(loop_id, self.soloed[loop_id])
+            if muted != self.muted[loop_id]:
+                self.muted[loop_id] = muted
+                self.update_mute_button(loop_id)
+            if soloed != self.soloed[loop_id]:
+                self.soloed[loop_id] = soloed
+                self.update_solo_button(loop_id)
+        if controls.current_loop_id != self.selected_loop_id and controls.current_loop_id in self.muted:
+            self.selected_loop_id = controls.current_loop_id
+            self._update_selected_loop_highlight()
+        for key, (button, label) in self.effect_buttons.items():
+            effect, flag = key.split('.')
+            value = getattr(self.looper, f"{self.effect_prefixes[effect]}_{flag}")
+            if value != self.effect_flags[key]:
+                self.effect_flags[key] = value
+                button.SetLabel(f"{label}: {'On' if value else 'Off'}")
+        automation_loop = self.looper.automation_loop
+        if automation_loop != self.automation_loop:
+            self.automation_loop = automation_loop
+            self.automation_button.SetLabel("Automate: Off" if automation_loop is None else
+                                            f"Automate: Loop {self._get_display_number(automation_loop)}")
+
+    @staticmethod
+    def _meter_value(level):
+        """Map a linear level onto a 0-100 gauge spanning -60..0 dBFS"""
+        if level <= 1e-3:
+            return 0
+        return int(min(100, max(0, (20 * np.log10(level) + 60) * 100 / 60)))
+
     def _update_selected_loop_highlight(self):
         """Highlight the currently selected loop"""
-        current_id = self.looper.loop_controls.current_loop_id
+        current_id = self.selected_loop_id
         for control in self.loop_controls:
             control['label'].SetForegroundColour(
                 wx.Colour(0, 128, 0) if control['id'] == current_id 
@@ -415,10 +962,58 @@ class LooperFrame(wx.Frame):
                 control['text'].Bind(wx.EVT_TEXT,
                     lambda e, lid=loop_id: self._on_loop_text_change(lid, e))
                 
-                control['length_label'].SetLabel(f"{value:.1f} s")
-                self.looper.update_loop_length(loop_id, value)
+                control['length_label'].SetLabel(self._length_label(value))
+                self._post_loop_length(loop_id, value)
                 break
 
+    def _on_loop_rate_change(self, loop_id, event):
+        """Set a loop's playback rate (negative plays it in reverse)"""
+        self.looper.post_command('loop_rate', loop_id, LOOP_RATES[event.GetSelection()][1])
+
+    def _post_loop_length(self, loop_id, seconds):
+        """Resize a loop, time-stretching its audio when that mode is on"""
+        command = 'loop_stretch' if self.stretch_checkbox.GetValue() else 'loop_length'
+        self.looper.post_command(command, loop_id, seconds)
+
+    def _length_label(self, seconds):
+        """Length the engine will use for `seconds`, in bars when quantizing"""
+        transport = self.looper.transport
+        samples = transport.loop_samples(seconds)
+        if transport.quantize == 'off':
+            return f"{samples / self.looper.rate:.2f} s"
+        return f"{samples / transport.samples_per_bar:.0f} bar(s)"
+
+    def _on_bpm_change(self, event):
+        self.looper.post_command('transport.bpm', value=self.bpm_spin.GetValue())
+
+    def _on_beats_change(self, event):
+        self.looper.post_command('transport.beats_per_bar', value=self.beats_spin.GetValue())
+
+    def _on_quantize_change(self, event):
+        self.looper.post_command('transport.quantize', value=self.quantize_choice.GetSelection())
+
+    def _on_use_tempo(self, event):
+        """Adopt the detected tempo and conform the other loops to its bars"""
+        if self.detected_tempo is None:
+            return
+        loop_id, bpm, phase = self.detected_tempo
+        self.looper.post_command('transport.bpm', value=bpm)
+        self.looper.post_command('transport.align', loop_id, phase)
+        self.looper.post_command('transport.quantize', value=QUANTIZE_MODES.index('bar'))
+        self.bpm_spin.SetValue(int(round(bpm)))
+        self.quantize_choice.SetSelection(QUANTIZE_MODES.index('bar'))
+
+        for control in self.loop_controls:
+            if control['id'] == loop_id:
+                continue
+            value = 1.0 + control['slider'].GetValue() / 10.0
+            self._post_loop_length(control['id'], value)
+            control['length_label'].SetLabel(self._length_label(value))
+
+        self.detected_tempo = None
+        self.use_tempo_button.Disable()
+        self.status_label.SetLabel(f"Tempo set to {bpm:.1f} BPM")
+
     def _on_loop_text_change(self, loop_id, event):
         """Handle text changes"""
         for control in self.loop_controls:
@@ -433,64 +1028,161 @@ class LooperFrame(wx.Frame):
                     control['slider'].Bind(wx.EVT_SLIDER, 
                         lambda e, lid=loop_id: self._on_loop_slider_change(lid, e))
                     
-                    control['length_label'].SetLabel(f"{value:.1f} s")
-                    self.looper.update_loop_length(loop_id, value)
+                    control['length_label'].SetLabel(self._length_label(value))
+                    self._post_loop_length(loop_id, value)
                 except ValueError:
                     pass
                 break
 
+    def _on_loop_input_change(self, loop_id, event):
+        """Arm or disarm an input channel for a loop"""
+        for control in self.loop_controls:
+            if control['id'] == loop_id:
+                channel = control['input'].GetSelection() - 1
+                self.looper.post_command('arm_input', loop_id, channel)
+                # Arming a channel disarms it on any other loop
+                if channel >= 0:
+                    for other in self.loop_controls:
+                        if other['id'] != loop_id and other['input'].GetSelection() == channel + 1:
+                            other['input'].SetSelection(0)
+                break
+
     # Effect parameter handlers
     def _on_reverb_input_change(self, event):
         if self.reverb_input_choice.GetSelection() < len(self.loop_controls):
             control = self.loop_controls[self.reverb_input_choice.GetSelection()]
-            self.looper.reverb_input_id = control['id']
+            self.looper.post_command('reverb.input', control['id'])
     def _on_reverb_output_change(self, event):
         if self.reverb_output_choice.GetSelection() < len(self.loop_controls):
             control = self.loop_controls[self.reverb_output_choice.GetSelection()]
-        self.looper.reverb_output_id = control['id']
+            self.looper.post_command('reverb.output', control['id'])
     def _on_reverb_decay_change(self, event): 
-        self.looper.reverb.decay = self.reverb_decay_slider.GetValue() / 100.0
+        self.looper.post_command('reverb.decay', value=self.reverb_decay_slider.GetValue() / 100.0)
     def _on_reverb_wet_change(self, event): 
-        self.looper.reverb.wet = self.reverb_wet_slider.GetValue() / 100.0
+        self.looper.post_command('reverb.wet', value=self.reverb_wet_slider.GetValue() / 100.0)
     def _on_reverb_delay_change(self, event): 
-        self.looper.reverb.delay_ms = self.reverb_delay_slider.GetValue()
+        self.looper.post_command('reverb.delay_ms', value=self.reverb_delay_slider.GetValue())
+
+    def _on_convolution_input_change(self, event):
+        if self.convolution_input_choice.GetSelection() < len(self.loop_controls):
+            control = self.loop_controls[self.convolution_input_choice.GetSelection()]
+            self.looper.post_command('convolution.input', control['id'])
+    def _on_convolution_output_change(self, event):
+        if self.convolution_output_choice.GetSelection() < len(self.loop_controls):
+            control = self.loop_controls[self.convolution_output_choice.GetSelection()]
+            self.looper.post_command('convolution.output', control['id'])
+    def _on_convolution_wet_change(self, event):
+        self.looper.post_command('convolution.wet', value=self.convolution_wet_slider.GetValue() / 100.0)
+
+    def _on_filter_input_change(self, event):
+        if self.filter_input_choice.GetSelection() < len(self.loop_controls):
+            control = self.loop_controls[self.filter_input_choice.GetSelection()]
+            self.looper.post_command('filter.input', control['id'])
+    def _on_filter_output_change(self, event):
+        if self.filter_output_choice.GetSelection() < len(self.loop_controls):
+            control = self.loop_controls[self.filter_output_choice.GetSelection()]
+            self.looper.post_command('filter.output', control['id'])
+    def _on_filter_kind_change(self, event):
+        self.looper.post_command('filter.kind', value=self.filter_kind_choice.GetSelection())
+    def _on_filter_frequency_change(self, event):
+        self.looper.post_command('filter.frequency',
+                                 value=self._filter_frequency(self.filter_frequency_slider.GetValue()))
+    def _on_filter_q_change(self, event):
+        self.looper.post_command('filter.q', value=self.filter_q_slider.GetValue() / 10.0)
+    def _on_filter_gain_change(self, event):
+        self.looper.post_command('filter.gain_db', value=self.filter_gain_slider.GetValue())
+
+    def _on_delay_input_change(self, event):
+        if self.delay_input_choice.GetSelection() < len(self.loop_controls):
+            control = self.loop_controls[self.delay_input_choice.GetSelection()]
+            self.looper.post_command('delay.input', control['id'])
+    def _on_delay_output_change(self, event):
+        if self.delay_output_choice.GetSelection() < len(self.loop_controls):
+            control = self.loop_controls[self.delay_output_choice.GetSelection()]
+            self.looper.post_command('delay.output', control['id'])
+    def _on_delay_time_change(self, event):
+        self.looper.post_command('delay.time_ms', value=self.delay_time_slider.GetValue())
+    def _on_delay_sync_change(self, event):
+        beats = DELAY_DIVISIONS[self.delay_sync_choice.GetSelection()][1]
+        self.looper.post_command('delay.beats', value=beats)
+        self.delay_time_slider.Enable(beats == 0)
+    def _on_delay_feedback_change(self, event):
+        self.looper.post_command('delay.feedback', value=self.delay_feedback_slider.GetValue() / 100.0)
+    def _on_delay_wet_change(self, event):
+        self.looper.post_command('delay.wet', value=self.delay_wet_slider.GetValue() / 100.0)
+    def _on_plugin_route_change(self, name, key):
+        index = self.plugin_controls[name][key].GetSelection()
+        if index < len(self.loop_controls):
+            self.looper.post_command(f'{name}.{key}', self.loop_controls[index]['id'])
+
+    def _granular_loop_id(self):
+        index = self.granular_loop_choice.GetSelection()
+        if 0 <= index < len(self.loop_controls):
+            return self.loop_controls[index]['id']
+        return None
+    def _granular_sliders(self):
+        return (('position', self.granular_position_slider), ('size_ms', self.granular_size_slider),
+                ('pitch', self.granular_pitch_slider), ('density', self.granular_density_slider),
+                ('spray', self.granular_spray_slider))
+    def _post_granular_param(self, param):
+        value = dict(self._granular_sliders())[param].GetValue()
+        if param in ('position', 'spray'):
+            value /= 100.0
+        loop_id = self._granular_loop_id()
+        if loop_id is not None:
+            self.looper.post_command(f'granular.{param}', loop_id, value)
+    def _update_granular_button(self):
+        enabled = self._granular_loop_id() in self.granular_loops
+        self.granular_button.SetLabel(f"Granular: {'On' if enabled else 'Off'}")
+    def _on_granular_loop_change(self, event):
+        self._update_granular_button()
+
     def _on_gate_input_change(self, event):
         if self.gate_input_choice.GetSelection() < len(self.loop_controls):
             control = self.loop_controls[self.gate_input_choice.GetSelection()]
-            self.looper.gate_input_id = control['id']
+            self.looper.post_command('gate.input', control['id'])
 
     def _on_gate_output_change(self, event):
         if self.gate_output_choice.GetSelection() < len(self.loop_controls):
             control = self.loop_controls[self.gate_output_choice.GetSelection()]
-            self.looper.gate_output_id = control['id']
+            self.looper.post_command('gate.output', control['id'])
     def _on_gate_threshold_change(self, event): 
-        self.looper.gate.threshold = self.gate_threshold_slider.GetValue() / 100.0
+        self.looper.post_command('gate.threshold', value=self.gate_threshold_slider.GetValue() / 100.0)
     def _on_gate_attack_change(self, event): 
-        self.looper.gate.attack_ms = self.gate_attack_slider.GetValue()
+        self.looper.post_command('gate.attack_ms', value=self.gate_attack_slider.GetValue())
     def _on_gate_release_change(self, event): 
-        self.looper.gate.release_ms = self.gate_release_slider.GetValue()
+        self.looper.post_command('gate.release_ms', value=self.gate_release_slider.GetValue())
 
     # Button actions
 
     def toggle_recording(self, event):
-        self.looper.loop_controls.is_recording = not self.looper.loop_controls.is_recording
-        self.recording_button.SetLabel(f"Recording: {'On' if self.looper.loop_controls.is_recording else 'Off'}")
-        if self.looper.loop_controls.is_recording:
-            self.status_label.SetLabel(f"Recording to Loop {self._get_display_number(self.looper.loop_controls.current_loop_id)} (real-time monitoring)")
+        # Engine state changes at the next block (or beat/bar when quantizing),
+        # so label from the value we sent
+        self.is_recording = not self.is_recording
+        self.looper.post_command('record', value=self.is_recording)
+        self.recording_button.SetLabel(f"Recording: {'On' if self.is_recording else 'Off'}")
+        quantize = self.looper.transport.quantize
+        if self.is_recording:
+            start = "" if quantize == 'off' else f" from the next {quantize}"
+            self.status_label.SetLabel(f"Recording to Loop {self._get_display_number(self.selected_loop_id)}{start} (real-time monitoring)")
+        elif quantize == 'off':
+            # No tempo in use yet: offer one from what was just played
+            self.looper.detect_tempo(self.selected_loop_id)
 
     def toggle_overdub(self, event):
-        self.looper.loop_controls.is_overdubbing = not self.looper.loop_controls.is_overdubbing
-        self.overdub_button.SetLabel(f"Overdub: {'On' if self.looper.loop_controls.is_overdubbing else 'Off'}")
+        self.is_overdubbing = not self.is_overdubbing
+        self.looper.post_command('overdub', value=self.is_overdubbing)
+        self.overdub_button.SetLabel(f"Overdub: {'On' if self.is_overdubbing else 'Off'}")
 
     def start_recording_session(self, event):
-        self.looper.start_recording_session()
+        self.looper.post_command('session.start')
         self.start_recording_button.Disable()
         self.stop_recording_button.Enable()
         self.save_recording_button.Disable()
         self.status_label.SetLabel("Recording session started.")
 
     def stop_recording_session(self, event):
-        self.looper.stop_recording_session()
+        self.looper.post_command('session.stop')
         self.start_recording_button.Enable()
         self.stop_recording_button.Disable()
         self.save_recording_button.Enable()
@@ -510,59 +1202,158 @@ class LooperFrame(wx.Frame):
                 wx.MessageBox(f"Failed to save recording: {e}", "Error", wx.OK | wx.ICON_ERROR)
 
     def toggle_bypass_reverb(self, event):
-        self.looper.reverb_bypass = not self.looper.reverb_bypass
-        self.bypass_reverb_button.SetLabel(f"Bypass Reverb: {'On' if self.looper.reverb_bypass else 'Off'}")
+        self._toggle_effect_flag('reverb', 'bypass', self.bypass_reverb_button, "Bypass Reverb")
 
     def toggle_reverb_overdub(self, event):
-        self.looper.reverb_overdub = not self.looper.reverb_overdub
-        self.reverb_overdub_button.SetLabel(f"Reverb Overdub: {'On' if self.looper.reverb_overdub else 'Off'}")
+        self._toggle_effect_flag('reverb', 'overdub', self.reverb_overdub_button, "Reverb Overdub")
+
+    def toggle_bypass_convolution(self, event):
+        self._toggle_effect_flag('convolution', 'bypass', self.bypass_convolution_button,
+                                 "Bypass Convolution")
+
+    def toggle_convolution_overdub(self, event):
+        self._toggle_effect_flag('convolution', 'overdub', self.convolution_overdub_button,
+                                 "Convolution Overdub")
+
+    def toggle_bypass_filter(self, event):
+        self._toggle_effect_flag('filter', 'bypass', self.bypass_filter_button, "Bypass Filter")
+
+    def toggle_filter_overdub(self, event):
+        self._toggle_effect_flag('filter', 'overdub', self.filter_overdub_button, "Filter Overdub")
+
+    def toggle_bypass_delay(self, event):
+        self._toggle_effect_flag('delay', 'bypass', self.bypass_delay_button, "Bypass Delay")
+
+    def toggle_delay_overdub(self, event):
+        self._toggle_effect_flag('delay', 'overdub', self.delay_overdub_button, "Delay Overdub")
+
+    def toggle_granular(self, event):
+        loop_id = self._granular_loop_id()
+        if loop_id is None:
+            return
+        enabled = loop_id not in self.granular_loops
+        self.looper.post_command('granular', loop_id, enabled)
+        if enabled:
+            self.granular_loops.add(loop_id)
+            # A new voice starts from defaults; send the sliders' settings
+            for param, slider in self._granular_sliders():
+                self._post_granular_param(param)
+        else:
+            self.granular_loops.discard(loop_id)
+        self._update_granular_button()
+
+    def calibrate_latency(self, event):
+        # Connect the output to the input (or hold the mic to the speaker) first
+        self.looper.post_command('calibrate')
+        self.status_label.SetLabel("Measuring round-trip latency: playing test chirp")
+
+    def load_impulse_response(self, event):
+        with wx.FileDialog(self, "Load impulse response", wildcard="WAV files (*.wav)|*.wav",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as file_dialog:
+            if file_dialog.ShowModal() == wx.ID_CANCEL:
+                return
+
+            filepath = file_dialog.GetPath()
+            try:
+                seconds = self.looper.load_impulse_response(filepath)
+            except Exception as e:
+                wx.MessageBox(f"Failed to load impulse response: {e}", "Error", wx.OK | wx.ICON_ERROR)
+                return
+            name = os.path.basename(filepath)
+            self.impulse_label.SetLabel(f"{name} ({seconds:.1f} s)")
+            self.status_label.SetLabel(f"Loaded impulse response {name}.")
 
     def toggle_bypass_gate(self, event):
-        self.looper.gate_bypass = not self.looper.gate_bypass
-        self.bypass_gate_button.SetLabel(f"Bypass Gate: {'On' if self.looper.gate_bypass else 'Off'}")
+        self._toggle_effect_flag('gate', 'bypass', self.bypass_gate_button, "Bypass Gate")
 
     def toggle_gate_overdub(self, event):
-        self.looper.gate_overdub = not self.looper.gate_overdub
-        self.gate_overdub_button.SetLabel(f"Gate Overdub: {'On' if self.looper.gate_overdub else 'Off'}")
+        self._toggle_effect_flag('gate', 'overdub', self.gate_overdub_button, "Gate Overdub")
+
+    def _toggle_effect_flag(self, effect, flag, button, label):
+        """Flip an effect's bypass/overdub flag and relabel its button"""
+        key = f"{effect}.{flag}"
+        self.effect_flags[key] = not self.effect_flags[key]
+        self.looper.post_command(key, value=self.effect_flags[key])
+        button.SetLabel(f"{label}: {'On' if self.effect_flags[key] else 'Off'}")
 
     def toggle_mute(self, loop_id):
         """Toggle mute for a loop"""
-        with self.looper.lock:
-            if loop_id in self.looper.loop_controls.muted_loops:
-                self.looper.loop_controls.muted_loops[loop_id] = not self.looper.loop_controls.muted_loops[loop_id]
-                self.update_mute_button(loop_id)
+        if loop_id in self.muted:
+            self.muted[loop_id] = not self.muted[loop_id]
+            self.looper.post_command('mute', loop_id, self.muted[loop_id])
+            self.update_mute_button(loop_id)
 
     def toggle_solo(self, loop_id):
         """Toggle solo for a loop"""
-        with self.looper.lock:
-            if loop_id in self.looper.loop_controls.soloed_loops:
-                if not self.looper.loop_controls.soloed_loops[loop_id]:
-                    # Clear other solos if enabling this one
-                    for lid in self.looper.loop_controls.soloed_loops:
-                        self.looper.loop_controls.soloed_loops[lid] = False
-                        self.update_solo_button(lid)
-                
-                self.looper.loop_controls.soloed_loops[loop_id] = not self.looper.loop_controls.soloed_loops[loop_id]
-                self.update_solo_button(loop_id)
+        if loop_id in self.soloed:
+            if not self.soloed[loop_id]:
+                # Clear other solos if enabling this one
+                for lid in self.soloed:
+                    self.soloed[lid] = False
+                    self.update_solo_button(lid)
+            
+            self.soloed[loop_id] = not self.soloed[loop_id]
+            self.looper.post_command('solo', loop_id, self.soloed[loop_id])
+            self.update_solo_button(loop_id)
 
     def select_loop(self, loop_id):
         """Select a loop for recording"""
-        with self.looper.lock:
-            if loop_id in self.looper.loop_controls.loops:
-                self.looper.loop_controls.current_loop_id = loop_id
-                self._update_selected_loop_highlight()
-                self.status_label.SetLabel(f"Selected Loop {self._get_display_number(loop_id)} for recording.")
+        if loop_id in self.muted:
+            self.selected_loop_id = loop_id
+            self.looper.post_command('select', loop_id)
+            self._update_selected_loop_highlight()
+            self.status_label.SetLabel(f"Selected Loop {self._get_display_number(loop_id)} for recording.")
+
+    def undo(self, event):
+        """Undo the last take or clear"""
+        self.looper.post_command('undo')
+        self.status_label.SetLabel("Undo")
+
+    def redo(self, event):
+        self.looper.post_command('redo')
+        self.status_label.SetLabel("Redo")
+
+    def toggle_automation(self, event):
+        """Record effect knob moves against the selected loop's cycle"""
+        if self.automation_loop is None:
+            self.automation_loop = self.selected_loop_id
+            self.looper.post_command('automation.record', self.automation_loop, 1)
+            number = self._get_display_number(self.automation_loop)
+            self.automation_button.SetLabel(f"Automate: Loop {number}")
+            self.status_label.SetLabel(f"Recording effect moves on Loop {number}'s cycle.")
+        else:
+            self.looper.post_command('automation.record', self.automation_loop, 0)
+            self.automation_loop = None
+            self.automation_button.SetLabel("Automate: Off")
+
+    def clear_automation(self, event):
+        self.looper.post_command('automation.clear', self.selected_loop_id)
+        self.status_label.SetLabel(
+            f"Cleared automation on Loop {self._get_display_number(self.selected_loop_id)}.")
+
+    def load_automation(self, event):
+        with wx.FileDialog(self, "Load automation", wildcard="Automation (*.npz)|*.npz",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as file_dialog:
+            if file_dialog.ShowModal() == wx.ID_CANCEL:
+                return
+
+            filepath = file_dialog.GetPath()
+            try:
+                self.looper.load_automation(filepath)
+            except Exception as e:
+                wx.MessageBox(f"Failed to load automation: {e}", "Error", wx.OK | wx.ICON_ERROR)
+                return
+            self.status_label.SetLabel(f"Loaded automation {os.path.basename(filepath)}.")
 
     def clear_loop(self, loop_id):
         """Clear a loop's audio"""
-        with self.looper.lock:
-            if loop_id in self.looper.loop_controls.loops:
-                self.looper.loop_controls.loops[loop_id].fill(0)
-                self.status_label.SetLabel(f"Cleared Loop {self._get_display_number(loop_id)}.")
+        if loop_id in self.muted:
+            self.looper.post_command('clear', loop_id)
+            self.status_label.SetLabel(f"Cleared Loop {self._get_display_number(loop_id)}.")
 
     def delete_loop(self, loop_id):
         """Delete a loop"""
-        if len(self.looper.loop_controls.loops) <= 1:
+        if len(self.loop_controls) <= 1:
             wx.MessageBox("You must have at least one loop!", "Error", wx.OK | wx.ICON_ERROR)
             return
 
@@ -570,7 +1361,7 @@ class LooperFrame(wx.Frame):
         for i, control in enumerate(self.loop_controls):
             if control['id'] == loop_id:
                 # Destroy all controls
-                for key in ['label', 'text', 'slider', 'length_label',
+                for key in ['label', 'text', 'slider', 'length_label', 'waveform', 'meter', 'input', 'rate',
                           'select', 'mute', 'solo', 'clear', 'delete']:
                     control[key].Destroy()
                 self.scroll_sizer.Detach(control['sizer'])
@@ -578,12 +1369,15 @@ class LooperFrame(wx.Frame):
                 break
 
         # Remove from audio backend
-        with self.looper.lock:
-            try:
-                self.looper.loop_controls.delete_loop(loop_id)
-            except ValueError as e:
-                wx.MessageBox(str(e), "Error", wx.OK | wx.ICON_ERROR)
-                return
+        self.looper.post_command('delete_loop', loop_id)
+        del self.muted[loop_id]
+        del self.soloed[loop_id]
+        if self.selected_loop_id == loop_id:
+            self.selected_loop_id = self.loop_controls[0]['id']
+            self.looper.post_command('select', self.selected_loop_id)
+        if self.automation_loop == loop_id:
+            self.automation_loop = None  # The engine stops recording with the loop gone
+            self.automation_button.SetLabel("Automate: Off")
 
         # Update remaining UI controls
         for i, control in enumerate(self.loop_controls):
@@ -600,7 +1394,7 @@ class LooperFrame(wx.Frame):
         for control in self.loop_controls:
             if control['id'] == loop_id:
                 control['mute'].SetLabel(
-                    "Unmute" if self.looper.loop_controls.muted_loops[loop_id] 
+                    "Unmute" if self.muted[loop_id] 
                     else "Mute")
                 break
 
@@ -609,7 +1403,7 @@ class LooperFrame(wx.Frame):
         for control in self.loop_controls:
             if control['id'] == loop_id:
                 control['solo'].SetLabel(
-                    "Unsolo" if self.looper.loop_controls.soloed_loops[loop_id] 
+                    "Unsolo" if self.soloed[loop_id] 
                     else "Solo")
                 break
 
@@ -624,8 +1418,9 @@ class LooperFrame(wx.Frame):
         """Add a new loop"""
         new_length = 4.0
         
-        with self.looper.lock:
-            loop_id = self.looper.loop_controls._add_loop(new_length)
+        loop_id = self.looper.post_command('add_loop', value=new_length)
+        self.muted[loop_id] = False
+        self.soloed[loop_id] = False
         
         # Add to UI with sequential display number
         display_number = len(self.loop_controls) + 1
@@ -638,46 +1433,44 @@ class LooperFrame(wx.Frame):
     def _on_pitch_input_change(self, event):
         if self.pitch_input_choice.GetSelection() < len(self.loop_controls):
             control = self.loop_controls[self.pitch_input_choice.GetSelection()]
-            self.looper.pitch_input_id = control['id']
+            self.looper.post_command('pitch_shift.input', control['id'])
             print(f"Pitch input set to loop {control['display_number']}")  # Debug
 
     def _on_pitch_output_change(self, event):
         if self.pitch_output_choice.GetSelection() < len(self.loop_controls):
             control = self.loop_controls[self.pitch_output_choice.GetSelection()]
-            self.looper.pitch_output_id = control['id']
+            self.looper.post_command('pitch_shift.output', control['id'])
             print(f"Pitch output set to loop {control['display_number']}")  # Debug
 
     def _on_pitch_semitones_change(self, event):
         semitones = self.pitch_semitones_slider.GetValue()
-        self.looper.pitch_shift.semitones = semitones
+        self.looper.post_command('pitch_shift.semitones', value=semitones)
         print(f"Pitch semitones set to {semitones}")  # Debug
 
     def _on_pitch_quality_change(self, event):
         quality = self.pitch_quality_choice.GetStringSelection().lower()
-        self.looper.pitch_shift.set_quality(quality)
+        self.looper.post_command('pitch_shift.quality', value=PITCH_QUALITIES.index(quality))
         print(f"Pitch quality set to {quality}")  # Debug
 
     def _on_pitch_feedback_change(self, event):
         """Handle feedback slider changes"""
         feedback = self.pitch_feedback_slider.GetValue() / 100.0  # Convert to 0.0-0.9 range
-        self.looper.pitch_feedback = feedback
+        self.looper.post_command('pitch_shift.feedback', value=feedback)
         print(f"Pitch feedback set to {feedback:.2f}")
 
     # Add button handlers
     def toggle_bypass_pitch(self, event):
-        self.looper.pitch_bypass = not self.looper.pitch_bypass
-        state = "OFF" if self.looper.pitch_bypass else "ON"
-        self.bypass_pitch_button.SetLabel(f"Bypass Pitch: {'On' if self.looper.pitch_bypass else 'Off'}")
+        self._toggle_effect_flag('pitch_shift', 'bypass', self.bypass_pitch_button, "Bypass Pitch")
+        state = "OFF" if self.effect_flags['pitch_shift.bypass'] else "ON"
         print(f"Pitch effect bypass: {state}")
         print(f"Current settings:")
         print(f"  Input loop: {self.looper.pitch_input_id}")
         print(f"  Output loop: {self.looper.pitch_output_id}")
-        print(f"  Semitones: {self.looper.pitch_shift.semitones}")
-        print(f"  Quality: {self.looper.pitch_shift.quality}")
+        print(f"  Semitones: {self.looper.effect_setting('pitch_shift', 'semitones')}")
+        print(f"  Quality: {self.looper.effect_setting('pitch_shift', 'quality')}")
 
     def toggle_pitch_overdub(self, event):
-        self.looper.pitch_overdub = not self.looper.pitch_overdub
-        self.pitch_overdub_button.SetLabel(f"Pitch Overdub: {'On' if self.looper.pitch_overdub else 'Off'}")
+        self._toggle_effect_flag('pitch_shift', 'overdub', self.pitch_overdub_button, "Pitch Overdub")
 
     def _on_pitch_semitones_text_change(self, event):
         """Handle text changes for semitones"""
@@ -700,10 +1493,10 @@ class LooperFrame(wx.Frame):
             
             
             # Update pitch effect with corrected direction
-            self.looper.pitch_shift.semitones = value
+            self.looper.post_command('pitch_shift.semitones', value=value)
             print(f"Pitch set to {value} semitones (negative = lower, positive = higher)")
         except ValueError:
-            current = self.looper.pitch_shift.semitones
+            current = self.looper.effect_setting('pitch_shift', 'semitones')
             self.pitch_semitones_text.ChangeValue(str(current))
            
 
@@ -717,22 +1510,23 @@ class LooperFrame(wx.Frame):
         self.pitch_semitones_text.Bind(wx.EVT_TEXT, self._on_pitch_semitones_text_change)
         
         # Update pitch effect
-        self.looper.pitch_shift.semitones = value
+        self.looper.post_command('pitch_shift.semitones', value=value)
         print(f"Pitch semitones set to {value} (from slider)")
 
     def _on_pitch_feedback_change(self, event):
         """Handle feedback slider changes"""
         feedback = self.pitch_feedback_slider.GetValue()
-        self.looper.pitch_feedback = feedback / 100.0  # Convert to 0.0-0.9 range
+        self.looper.post_command('pitch_shift.feedback', value=feedback / 100.0)  # Convert to 0.0-0.9 range
         self.pitch_feedback_text.SetLabel(f"{feedback}%")
         print(f"Pitch feedback set to {feedback}%")
 
     def on_quit(self, event):
         """Quit the application"""
+        self.display_timer.Stop()
         self.looper.is_running = False
         
-        if hasattr(self.looper, 'is_recording') and self.looper.is_recording:
-            self.looper.is_recording = False
+        if self.is_recording:
+            self.looper.post_command('record', value=False)
         
         def safe_close():
             self.looper.stop()
@@ -1,19 +1,48 @@
-import wx
+import argparse
 from audiolooper import AudioLooper
-from looperframe import LooperFrame
 
 def main():
-    looper = AudioLooper(initial_loop_lengths=[2.0, 4.0, 8.0])
+    parser = argparse.ArgumentParser(description="freaky_Looper")
+    parser.add_argument("--engine-process", action="store_true",
+                        help="run the audio engine in its own process")
+    parser.add_argument("--osc-port", type=int, default=None,
+                        help="accept OSC remote control on this UDP port")
+    parser.add_argument("--osc-host", default="127.0.0.1",
+                        help="address to listen for OSC on (0.0.0.0 for any)")
+    parser.add_argument("--midi", nargs="?", const="", default=None, metavar="PORT",
+                        help="take MIDI control and clock from this input (default: the first one)")
+    args = parser.parse_args()
+
+    if args.engine_process:
+        from components.engine_process import EngineClient
+        looper = EngineClient(initial_loop_lengths=[2.0, 4.0, 8.0])
+    else:
+        looper = AudioLooper(initial_loop_lengths=[2.0, 4.0, 8.0])
+    osc = None
+    midi = None
     try:
+        # Start audio before paying for the GUI imports
         looper.start()
+        if args.osc_port is not None:
+            from components.osc_server import OscServer
+            osc = OscServer(looper, args.osc_host, args.osc_port)
+            osc.start()
+        if args.midi is not None:
+            from components.midi import MidiController
+            midi = MidiController(looper, port_name=args.midi or None)
+            midi.start()
+        import wx
+        from looperframe import LooperFrame
         app = wx.App(False)
         frame = LooperFrame(looper)
         frame.Show()
         app.MainLoop()
     finally:
+        if osc is not None:
+            osc.stop()
+        if midi is not None:
+            midi.stop()
         looper.stop()
-        import time
-        time.sleep(0.1)  # Ensure clean exit
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
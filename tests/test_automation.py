@@ -0,0 +1,98 @@
+"""Automation lanes: breakpoint writes in both directions, and record/replay on a reversed loop.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.automation import AutomationLane
+
+RATE = 44100
+CHUNK = 1024
+
+
+def reference(lane, positions):
+    """Cyclic interpolation over the whole lane"""
+    return np.interp(positions % lane.length, lane.times, lane.values, period=lane.length)
+
+
+def old_lane(length, count=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return AutomationLane(length, np.sort(rng.choice(length, count, replace=False)), rng.random(count))
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_write_replaces_only_what_it_passed(reverse):
+    length = 10 * RATE
+    lane = old_lane(length)
+    before = dict(zip(lane.times.tolist(), lane.values.tolist()))
+    step = -CHUNK if reverse else CHUNK
+    start = 5 * RATE
+    lane.write(start, 1.0, reverse)
+    lane.write(start + step, 2.0, reverse)
+    low, high = sorted((start, start + step))
+    kept = {t: v for t, v in before.items() if not low <= t <= high}
+    after = dict(zip(lane.times.tolist(), lane.values.tolist()))
+    assert {t: v for t, v in after.items() if t not in (start, start + step)} == kept
+    assert after[start] == 1.0 and after[start + step] == 2.0
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_write_across_the_wrap(reverse):
+    length = 4 * RATE
+    lane = old_lane(length)
+    start = 100 if reverse else length - 100
+    end = length - 100 if reverse else 100
+    lane.write(start, 1.0, reverse)
+    lane.write(end, 2.0, reverse)
+    times = lane.times
+    assert np.all(np.diff(times) > 0)
+    # Only the two new points remain within 100 samples of the wrap
+    assert sorted(times[(times <= 100) | (times >= length - 100)].tolist()) == [100, length - 100]
+
+
+def test_writes_grow_past_capacity():
+    length = 600 * RATE
+    lane = AutomationLane(length, capacity=4)
+    for block in range(1000):
+        lane.write(block * CHUNK, float(block))
+    assert len(lane) == 1000
+    assert np.array_equal(lane.times, np.arange(1000) * CHUNK)
+    block = lane.ramp(10.5 * CHUNK, 1.0, np.empty(CHUNK))
+    assert np.allclose(block, reference(lane, 10.5 * CHUNK + np.arange(CHUNK)))
+
+
+@pytest.mark.parametrize('start, step', [(4 * RATE - 300.0, 1.0), (200.0, -1.0), (1234.5, 0.75)])
+def test_ramp_matches_whole_lane_interpolation(start, step):
+    lane = old_lane(4 * RATE)
+    got = lane.ramp(start, step, np.empty(CHUNK))
+    assert np.allclose(got, reference(lane, start + step * np.arange(CHUNK)))
+
+
+def test_record_on_reversed_loop():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                         backend=FakeBackend())
+    controls = looper.loop_controls
+    loop_id = next(iter(controls.loops))
+    length = controls.loop_lengths[loop_id]
+    blocks = length // CHUNK
+    looper.post_command('loop_rate', loop_id, -1.0)
+    looper.post_command('reverb.bypass', value=0)
+    looper.post_command('automation.record', loop_id, 1)
+    # One pass down the cycle, sweeping the wet level up
+    for block in range(blocks):
+        looper.post_command('reverb.wet', value=block / blocks)
+        looper.mix_loops()
+    looper.post_command('automation.record', loop_id, 0)
+    lane = controls.automation[loop_id]['reverb.wet']
+    # One breakpoint per block, not a cycle overwritten on every block
+    assert blocks <= len(lane) <= blocks + 2
+    times = lane.times[np.argsort(lane.times)[::-1]]
+    values = lane.values[np.argsort(lane.times)[::-1]]
+    # Played backwards, the sweep rises as the cycle position falls (the
+    # first write is at 0, and the earlier value is held at 1 just before it)
+    swept = (times > 1) & (times < length - CHUNK)
+    assert np.all(np.diff(values[swept]) >= 0)
+    assert values[swept][-1] > 0.9
@@ -0,0 +1,47 @@
+"""Tempo-synced feedback delay: echo placement, block-free processing and clamped commands.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from effects.delay import DelayEffect
+
+RATE = 44100
+CHUNK = 1024
+
+
+def impulse_response(effect, blocks):
+    signal = np.zeros(blocks * CHUNK, dtype=np.float32)
+    signal[0] = 1.0
+    out = np.empty(CHUNK, dtype=np.float32)
+    return np.concatenate([effect.process(signal[i:i + CHUNK], out).copy()
+                           for i in range(0, len(signal), CHUNK)])
+
+
+@pytest.mark.parametrize('time_ms', [10.0, 100.0, 375.0])
+def test_echoes_land_at_the_delay(time_ms):
+    effect = DelayEffect(RATE, time_ms=time_ms, feedback=0.5, wet=1.0)
+    effect.prepare(RATE, CHUNK)
+    delay = effect.delay_samples()
+    response = impulse_response(effect, -(-3 * delay // CHUNK) + 1)
+    expected = np.zeros_like(response)
+    expected[delay::delay] = 0.5 ** np.arange(len(expected[delay::delay]))
+    assert np.allclose(response, expected, atol=1e-6)
+
+
+def test_shortest_delay_is_bounded():
+    effect = DelayEffect(RATE, time_ms=0.0, beats=0.0)
+    assert effect.delay_samples() == round(10 * RATE / 1000)
+
+
+def test_commands_clamp_to_parameter_range():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                         backend=FakeBackend())
+    looper.post_command('delay.time_ms', value=0)
+    looper.post_command('delay.feedback', value=3.0)
+    looper.mix_loops()
+    assert looper.delay.time_ms == 10
+    assert looper.delay.feedback == 0.95
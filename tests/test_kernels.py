@@ -0,0 +1,119 @@
+"""Both kernel backends against the plain per-sample loops on random blocks.
+
+The loops are what the Numba backend compiles, run here uncompiled as the
+reference; the NumPy fallbacks and the compiled kernels must both match it.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from effects import kernels
+
+REFERENCE = {
+    'comb_feedback': kernels._comb_feedback_loop,
+    'gate_envelope': kernels._gate_envelope_loop,
+    'feedback_mix': kernels._feedback_mix_loop,
+    'mix_meter': kernels._mix_meter_loop,
+}
+BACKENDS = ['numpy', pytest.param('numba', marks=pytest.mark.skipif(
+    'numba' not in kernels.BACKENDS, reason="numba is not installed"))]
+
+
+def kernel(backend, name):
+    """A backend's kernel, or the uncompiled reference loop for None"""
+    return REFERENCE[name] if backend is None else kernels.BACKENDS[backend][name]
+
+
+def blocks(seed, count=8, size=1024):
+    rng = np.random.default_rng(seed)
+    return [rng.uniform(-1, 1, size).astype(np.float32) for _ in range(count)]
+
+
+def run_comb(backend, seed):
+    comb_feedback = kernel(backend, 'comb_feedback')
+    history = np.zeros(1557, dtype=np.float32)  # Not a divisor of the block, so runs wrap mid-block
+    pos, outputs = 0, []
+    for block in blocks(seed):
+        out = np.empty_like(block)
+        pos = comb_feedback(block, out, history, pos, 0.84)
+        outputs.append(out)
+    return np.concatenate(outputs), history, pos
+
+
+def run_gate(backend, seed):
+    gate_envelope = kernel(backend, 'gate_envelope')
+    gain, outputs, gains = 0.0, [], []
+    for block in blocks(seed):
+        block *= np.repeat(np.random.default_rng(seed).random(16), 64)  # Bursts above and below
+        out = np.empty_like(block)
+        gain = gate_envelope(block, out, gain, 0.3, 0.01, 0.002)
+        outputs.append(out)
+        gains.append(gain)
+    return np.concatenate(outputs), np.array(gains)
+
+
+def run_gate_chatter(backend, seed):
+    """Noise around the threshold, crossing it on about every other sample"""
+    gate_envelope = kernel(backend, 'gate_envelope')
+    rng = np.random.default_rng(seed)
+    gain, outputs = 0.5, []
+    for _ in range(4):
+        block = (0.3 + 0.01 * rng.standard_normal(1024)).astype(np.float32)
+        out = np.empty_like(block)
+        gain = gate_envelope(block, out, gain, 0.3, 0.01, 0.002)
+        outputs.append(out)
+    return np.concatenate(outputs), np.array([gain])
+
+
+def run_feedback_mix(backend, seed):
+    feedback_mix = kernel(backend, 'feedback_mix')
+    processed, previous = blocks(seed, count=2)
+    out = np.empty_like(processed)
+    feedback_mix(processed, previous, 0.6, out)
+    in_place = processed.copy()
+    feedback_mix(in_place, previous, 0.6, in_place)  # As the pitch feedback path calls it
+    return out, in_place
+
+
+def run_mix_meter(backend, seed):
+    mix_meter = kernel(backend, 'mix_meter')
+    output = np.zeros(1024, dtype=np.float32)
+    levels = [mix_meter(block, output, True) for block in blocks(seed, count=4)]
+    levels.append(mix_meter(output, output, False))  # The master meter, summing nothing
+    return output, np.array(levels)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_comb_feedback(backend, seed):
+    for got, expected in zip(run_comb(backend, seed), run_comb(None, seed)):
+        assert np.allclose(got, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_gate_envelope(backend, seed):
+    for got, expected in zip(run_gate(backend, seed), run_gate(None, seed)):
+        assert np.allclose(got, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_gate_envelope_chatter(backend, seed):
+    for got, expected in zip(run_gate_chatter(backend, seed), run_gate_chatter(None, seed)):
+        assert np.allclose(got, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_feedback_mix(backend, seed):
+    for got, expected in zip(run_feedback_mix(backend, seed), run_feedback_mix(None, seed)):
+        assert np.allclose(got, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_mix_meter(backend, seed):
+    for got, expected in zip(run_mix_meter(backend, seed), run_mix_meter(None, seed)):
+        assert np.allclose(got, expected, rtol=1e-5)
@@ -0,0 +1,98 @@
+"""Record-latency compensation, with the engine's output looped back to its input by FakeBackend.
+
+Run from the repository root:  python -m pytest tests
+"""
+import time
+
+import numpy as np
+import pytest
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+
+RATE = 44100
+CHUNK = 1024
+
+
+def looped_back(device_latency, loop_lengths):
+    """A looper whose output comes back as input `device_latency` samples later"""
+    backend = FakeBackend(loopback_latency=device_latency)
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=loop_lengths, loop_compression=None,
+                         backend=backend)
+    output = backend.open_output(None, RATE, 1, looper.format, CHUNK)
+    output.start()
+    backend.open_input(None, RATE, looper.input_channels, looper.format, CHUNK, looper.callback).start()
+    return looper, output
+
+
+def click_offset(device_latency, record_latency):
+    """Record a click loop's playback into a second loop; how late the clicks land"""
+    looper, output = looped_back(device_latency, [1.0, 1.0])
+    controls = looper.loop_controls
+    controls.loops[0].reshape(-1)[::RATE // 4] = 0.5
+    looper.post_command('record_latency', value=record_latency)
+    looper.post_command('select', 1)
+    looper.post_command('record', value=1)
+    for _ in range(RATE // CHUNK):  # One pass, before the new take plays back
+        output.write(looper.mix_loops())
+    looper.post_command('record', value=0)
+    output.write(looper.mix_loops())
+    played = controls.loops[0].reshape(-1)[:controls.loop_lengths[0]]
+    recorded = controls.loops[1].reshape(-1)[:controls.loop_lengths[1]]
+    return int(np.argmax(recorded > 0.25)) - int(np.argmax(played > 0.25))
+
+
+@pytest.mark.parametrize('device_latency', [0, 441, 3000])
+def test_uncompensated_record_lands_late(device_latency):
+    # The device delay plus the one block the input takes to be handed over
+    assert click_offset(device_latency, 0) == device_latency + CHUNK
+
+
+@pytest.mark.parametrize('device_latency', [0, 441, 3000])
+def test_record_latency_offsets_writes(device_latency):
+    assert click_offset(device_latency, device_latency + CHUNK) == 0
+
+
+def test_calibration_measures_round_trip():
+    looper, output = looped_back(2048, [1.0])
+    looper.post_command('calibrate')
+    for _ in range(5 * RATE // CHUNK):
+        output.write(looper.mix_loops())
+        if not looper.latency_status()[1]:
+            break
+        if looper.calibrator is not None and looper.calibrator.done:
+            time.sleep(0.01)  # The analysis thread; its result lands on a later block
+    assert looper.latency_status() == (2048 + CHUNK, False)
+
+
+def test_calibration_analysis_leaves_the_audio_thread():
+    looper, output = looped_back(2048, [1.0])
+    looper.post_command('calibrate')
+    output.write(looper.mix_loops())
+    calibrator = looper.calibrator
+    while not calibrator.done:
+        output.write(looper.mix_loops())
+    # The block that completed the capture did not wait for the measurement
+    assert looper.calibrator is calibrator and looper.latency_status()[1]
+
+
+def test_jittery_input_lands_once_at_its_offset():
+    # Every input sample carries its own index, exact in float32 and under the soft-clip knee
+    backend = FakeBackend(input_signal=lambda start, frames: (start + 1 + np.arange(frames)) / 2 ** 17,
+                          jitter=0.004, seed=3)
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                         backend=backend)
+    output = backend.open_output(None, RATE, 1, looper.format, CHUNK)
+    output.start()
+    handed = []
+    backend.open_input(None, RATE, looper.input_channels, looper.format, CHUNK,
+                       lambda *args: (handed.append(backend.blocks_written), looper.callback(*args))).start()
+    looper.post_command('record_latency', value=CHUNK)
+    looper.post_command('record', value=1)
+    blocks = 40
+    for _ in range(blocks):
+        output.write(looper.mix_loops())
+    # Some callbacks came a block late, and two arrived before one mix
+    assert len(set(handed)) < len(handed)
+    recorded = looper.loop_controls.loops[0].reshape(-1)[:(blocks - 3) * CHUNK]
+    assert np.array_equal(recorded * 2 ** 17, 1 + np.arange(len(recorded)))
@@ -0,0 +1,48 @@
+"""Effects load on first use: reading settings doesn't build them, and commands load them off the audio thread.
+
+Run from the repository root:  python -m pytest tests
+"""
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+
+RATE = 44100
+CHUNK = 1024
+
+
+def make_looper():
+    return AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                       backend=FakeBackend())
+
+
+def test_settings_read_defaults_until_loaded():
+    looper = make_looper()
+    assert looper.effect_setting('reverb', 'delay_ms') == 100
+    assert looper.effect_setting('filter', 'kind') == 'lowpass'
+    assert looper.effect_setting('pitch_shift', 'quality') == 'medium'
+    assert not looper._effects
+    looper.post_command('reverb.delay_ms', value=250)
+    looper.mix_loops()
+    assert looper.effect_setting('reverb', 'delay_ms') == 250
+
+
+def test_posting_a_command_loads_the_effect():
+    looper = make_looper()
+    looper.post_command('gate.threshold', value=0.3)
+    assert 'gate' in looper._effects
+    looper.mix_loops()
+    assert looper.gate.threshold == 0.3
+
+
+def test_commands_wait_for_the_effect_to_load():
+    looper = make_looper()
+    # Straight into the ring, as another process writes it
+    looper.commands.push('delay.bypass', 0, 0.0)
+    looper.commands.push('delay.feedback', -1, 0.7)
+    looper.commands.push('record', -1, 1.0)
+    looper.mix_loops()
+    # The audio thread doesn't build the delay; other commands go ahead
+    assert 'delay' not in looper._effects and looper.delay_bypass
+    assert looper.loop_controls.is_recording
+    looper.preload_effect('delay')
+    looper.mix_loops()
+    assert not looper.delay_bypass and looper.delay.feedback == 0.7
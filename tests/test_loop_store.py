@@ -0,0 +1,83 @@
+"""Idle-loop compression: the default codec round-trips exactly, through the store and the mixer.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.loop_store import CODECS, CompressedLoop
+
+RATE = 44100
+CHUNK = 1024
+
+
+def noise_loop(rows=20, seed=0):
+    loop = 0.2 * np.random.default_rng(seed).standard_normal((rows, CHUNK)).astype(np.float32)
+    loop[5:8] = 0  # Silent rows are stored as markers only
+    return loop
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_codecs_round_trip(codec):
+    loop = noise_loop()
+    restored = CompressedLoop(loop, codec).decompress_into(np.zeros_like(loop))
+    if codec == 'zlib':
+        assert np.array_equal(restored, loop)
+    else:
+        assert np.abs(restored - loop).max() < 1e-3
+    assert not restored[5:8].any()
+
+
+def test_idle_loop_is_stored_losslessly_by_default():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 2.0], backend=FakeBackend())
+    controls = looper.loop_controls
+    store = looper.loop_store
+    store.idle_seconds = 0
+    controls.loops[1][:] = noise_loop(len(controls.loops[1]), seed=1)
+    audio = controls.loops[1].copy()
+    looper.post_command('select', 0)
+    looper.post_command('mute', 1, 1)
+    looper.mix_loops()
+    store._compress_idle()  # Seen idle
+    store._compress_idle()  # Still idle: compressed
+    looper.mix_loops()
+    assert 1 in controls.compressed
+
+    looper.post_command('mute', 1, 0)  # Waits for the loop to be expanded
+    looper.mix_loops()
+    store._expand_loop(store._expand.popleft())
+    looper.mix_loops()
+    assert 1 not in controls.compressed
+    assert np.array_equal(controls.loops[1], audio)
+    assert not controls.muted_loops[1]
+
+
+def test_only_commands_for_compressed_loops_wait():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 2.0, 1.0], backend=FakeBackend())
+    controls = looper.loop_controls
+    store = looper.loop_store
+    store.idle_seconds = 0
+    controls.loops[2][:] = noise_loop(len(controls.loops[2]), seed=2)  # Audible: stays dense
+    looper.post_command('select', 0)
+    looper.post_command('mute', 1, 1)
+    looper.mix_loops()
+    store._compress_idle()
+    store._compress_idle()
+    looper.mix_loops()
+    assert 1 in controls.compressed and 2 not in controls.compressed
+
+    looper.post_command('mute', 1, 0)  # Waits for loop 1 to be expanded
+    looper.post_command('solo', 1, 1)  # Waits behind it
+    looper.post_command('mute', 1, 1)  # On loop 1 again; applied last
+    looper.post_command('solo', 2, 1)  # Another loop: applied this block
+    looper.post_command('record', value=1)
+    looper.mix_loops()
+    assert controls.soloed_loops[2] and controls.is_recording
+    assert controls.muted_loops[1] and 1 in controls.compressed
+
+    store._expand_loop(store._expand.popleft())
+    looper.mix_loops()
+    # Loop 1's commands landed in the order they were sent
+    assert controls.muted_loops[1] and controls.soloed_loops[1] and not controls.soloed_loops[2]
@@ -0,0 +1,31 @@
+"""Meter publishing: a block appears whole at `end`, and readers never get a torn copy.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+
+from components.meters import MeterBank
+
+
+def test_block_is_published_at_end():
+    meters = MeterBank(4)
+    meters.begin()
+    meters.set_loop(7, 0.5, 0.25 * 64, 64, 0.25)
+    meters.end(0.5, 0.25 * 64, 64)
+    meters.begin()
+    meters.set_loop(7, 0.1, 0.0, 64, 0.5)
+    # Still mixing: readers see the whole previous block
+    assert meters.snapshot() == ((0.5, 0.5), {7: (0.5, 0.5, 0.25)})
+    meters.end(0.1, 0.0, 64)
+    assert meters.snapshot() == ((0.1, 0.0), {7: (0.1, 0.0, 0.5)})
+
+
+def test_read_during_a_publish_returns_the_last_good_copy():
+    meters = MeterBank(4)
+    meters.begin()
+    meters.set_loop(1, 0.5, 0.0, 64, 0.0)
+    meters.end(0.5, 0.0, 64)
+    good = meters.read()
+    meters.sequence[0] += 1  # A writer stalled halfway through a publish
+    meters.values[1, 1] = 0.9
+    assert np.array_equal(meters.read(retries=2, wait=0.0), good)
@@ -0,0 +1,98 @@
+"""MIDI clock fitting, transport sync and mapped toggles, on FakeBackend's virtual clock.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.midi import PPQN, ClockFilter, MidiController, decode
+
+RATE = 44100
+CHUNK = 1024
+
+
+def clock_times(bpm, seconds, jitter, start=0.0, seed=0):
+    """Exact and jittered tick times of a master clock"""
+    rng = np.random.default_rng(seed)
+    period = 60.0 / (bpm * PPQN)
+    exact = start + period * np.arange(int(seconds / period))
+    return exact, exact + rng.uniform(-jitter, jitter, len(exact))
+
+
+def test_decode():
+    assert decode([0x90, 36, 100]).type == 'note_on'
+    assert decode([0x90, 36, 0]).type == 'note_off'
+    assert decode([0xB0, 64, 127]).value == 127
+    assert decode([0xF2, 0x10, 0x01]).pos == 0x10 | 1 << 7
+    assert decode([0xF8]).type == 'clock'
+
+
+@pytest.mark.parametrize('bpm', [80.0, 123.4, 174.0])
+def test_clock_filter_fits_through_jitter(bpm, jitter=0.002):
+    exact, stamped = clock_times(bpm, 10.0, jitter)
+    clock = ClockFilter()
+    errors = []
+    for number, timestamp in enumerate(stamped):
+        clock.tick(timestamp)
+        if number >= 2 * PPQN:
+            errors.append(clock.time_of(number) - exact[number])
+    assert abs(clock.bpm - bpm) < 0.05
+    # Far tighter than the per-tick jitter
+    assert np.abs(errors).max() < jitter / 2
+
+
+def test_clock_filter_follows_tempo_jump():
+    _, stamped = clock_times(120.0, 4.0, 0.001)
+    clock = ClockFilter()
+    for timestamp in stamped:
+        clock.tick(timestamp)
+    _, stamped = clock_times(140.0, 4.0, 0.001, start=stamped[-1] + 60.0 / (140.0 * PPQN), seed=1)
+    for number, timestamp in enumerate(stamped):
+        clock.tick(timestamp)
+        if number == PPQN:
+            assert abs(clock.bpm - 140.0) < 0.5  # Refitted within a beat of the jump
+
+
+def test_transport_follows_clock():
+    bpm, start = 97.0, 0.37
+    backend = FakeBackend()
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None, backend=backend)
+    output = backend.open_output(None, RATE, 1, looper.format, CHUNK)
+    output.start()
+    looper.post_command('transport.quantize', value=2)  # Bars
+    midi = MidiController(looper, port=[])
+    _, stamped = clock_times(bpm, 8.0, 0.001, start=start)
+    events = [(start - 0.001, [0xFA])] + [(t, [0xF8]) for t in stamped]
+    for block in range(int(8.0 * RATE / CHUNK)):
+        while events and events[0][0] < block * CHUNK / RATE:
+            timestamp, data = events.pop(0)
+            midi.feed(data, timestamp)
+        output.write(looper.mix_loops())
+
+    transport = looper.transport
+    bar = 60.0 / bpm * transport.beats_per_bar
+    master_bar = start + bar * np.ceil((transport.position / RATE - start) / bar)
+    assert abs(transport.bpm - bpm) < 0.01
+    assert abs(transport.next_boundary('bar') - master_bar * RATE) < 16
+
+
+def test_toggles_follow_looper_state():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0], loop_compression=None,
+                         backend=FakeBackend())
+    midi = MidiController(looper, port=[])
+    midi.feed([0x90, 36, 100])  # Record
+    looper.mix_loops()
+    assert looper.loop_controls.is_recording
+    looper.post_command('record', value=0)  # Stopped elsewhere (GUI, OSC)
+    looper.mix_loops()
+    midi.feed([0x90, 36, 100])
+    looper.mix_loops()
+    assert looper.loop_controls.is_recording
+
+    looper.post_command('reverb.bypass', value=0)
+    looper.mix_loops()
+    midi.feed([0xB0, 22, 127])  # Reverb bypass, enabled elsewhere
+    looper.mix_loops()
+    assert looper.reverb_bypass
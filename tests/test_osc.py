@@ -0,0 +1,61 @@
+"""OSC parsing and per-block coalescing, over localhost UDP into an engine on FakeBackend.
+
+Run from the repository root:  python -m pytest tests
+"""
+import socket
+import time
+
+import pytest
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+from components.osc_server import OscServer, command_for, encode_bundle, encode_message, parse_packet
+
+RATE = 44100
+CHUNK = 1024
+
+
+@pytest.mark.parametrize('address, args, command', [
+    ('/record', [1], ('record', -1, 1.0)),
+    ('/looper/reverb/decay', [0.5], ('reverb.decay', -1, 0.5)),
+    ('/loop/2/mute', [1], ('mute', 2, 1.0)),
+    ('/select', [3], ('select', 3, 0.0)),
+    ('/reverb/input', [2], ('reverb.input', 2, 0.0)),
+    ('/mute', [2, 0], ('mute', 2, 0.0)),
+    ('/undo', [], ('undo', -1, 1.0)),
+    ('/no/such/address', [1], None),
+])
+def test_command_for(address, args, command):
+    assert command_for(address, args) == command
+
+
+def test_bundle_round_trip():
+    packet = encode_bundle(encode_message('/reverb/decay', 0.25), encode_message('/loop/1/mute', 1))
+    assert parse_packet(packet) == [('/reverb/decay', [0.25]), ('/loop/1/mute', [1])]
+
+
+def test_burst_coalesced_per_block():
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 2.0], loop_compression=None,
+                         backend=FakeBackend())
+    server = OscServer(looper, port=0)
+    server.interval = 0.5  # One flush for the whole burst
+    port = server.start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sweep = 200
+        for i in range(sweep):
+            sender.sendto(encode_message('/reverb/decay', (i + 1) / sweep), ('127.0.0.1', port))
+            if i == sweep // 2:
+                sender.sendto(encode_bundle(encode_message('/undo'), encode_message('/loop/1/mute', 1),
+                                            encode_message('/undo')), ('127.0.0.1', port))
+        deadline = time.time() + 5.0
+        while server.posted < 4 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        sender.close()
+        server.stop()
+
+    assert server.received == sweep + 3
+    # Both undos, in order around the mute, then the sweep's last value once
+    assert looper.commands.pop_all() == [('undo', -1, 1.0), ('mute', 1, 1.0), ('undo', -1, 1.0),
+                                         ('reverb.decay', -1, 1.0)]
@@ -0,0 +1,36 @@
+"""Multi-channel recording: armed input channels go to their own loops.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+
+from audiolooper import AudioLooper
+from components.audio_backend import FakeBackend
+
+RATE = 44100
+CHUNK = 1024
+
+
+def test_armed_channel_leaves_the_selected_loop_alone():
+    # Channel 0 plays 0.1 and channel 1 plays 0.2
+    backend = FakeBackend(input_signal=lambda start, frames: np.tile([0.1, 0.2], (frames, 1)))
+    looper = AudioLooper(RATE, CHUNK, initial_loop_lengths=[1.0, 1.0], input_channels=2,
+                         loop_compression=None, backend=backend)
+    output = backend.open_output(None, RATE, 1, looper.format, CHUNK)
+    output.start()
+    backend.open_input(None, RATE, 2, looper.format, CHUNK, looper.callback).start()
+    controls = looper.loop_controls
+    controls.loops[0][:] = 0.3 * np.random.default_rng(0).standard_normal(controls.loops[0].shape)
+    before = controls.loops[0].copy()
+
+    looper.post_command('select', 0)
+    looper.post_command('arm_input', 1, 1)
+    looper.post_command('record', value=1)
+    looper.post_command('overdub', value=1)
+    blocks = 10
+    for _ in range(blocks):
+        output.write(looper.mix_loops())
+    # Loop A (selected) is neither overdubbed nor rewritten; loop B got channel 1
+    assert np.array_equal(controls.loops[0], before)
+    recorded = controls.loops[1].reshape(-1)[CHUNK:blocks * CHUNK]  # Input trails by a block
+    assert np.allclose(recorded, 0.2)
@@ -0,0 +1,59 @@
+"""Copy-on-write undo pages: slice saves, the ring wrap, and takes larger than the budget.
+
+Run from the repository root:  python -m pytest tests
+"""
+import numpy as np
+
+from components.undo import UndoHistory
+from components.waveform_cache import PeakPyramid
+
+CHUNK = 64
+
+
+def loop_with(rows, value):
+    return np.full((rows, CHUNK), value, dtype=np.float32)
+
+
+def take(history, label, loop, rows, value):
+    """One take writing `value` over `rows` of loop 0, saving them first"""
+    history.begin(label)
+    history.save_rows(0, rows, loop)
+    loop[rows.start:rows.stop] = value
+    history.end()
+
+
+def test_overlapping_saves_restore_the_first_audio():
+    history = UndoHistory(CHUNK, 16 * CHUNK * 4)
+    loop = np.arange(10 * CHUNK, dtype=np.float32).reshape(10, CHUNK)
+    original = loop.copy()
+    overviews = {0: PeakPyramid(10, CHUNK)}
+    history.begin('record')
+    for rows in (range(2, 5), range(3, 7), range(0, 9)):  # Partly saved already
+        history.save_rows(0, rows, loop)
+        loop[rows.start:rows.stop] += 100
+    history.end()
+    assert history.undo_stack[-1].end - history.undo_stack[-1].first == 9
+    assert history.undo({0: loop}, overviews)
+    assert np.array_equal(loop, original)
+
+
+def test_saves_across_the_ring_wrap():
+    history = UndoHistory(CHUNK, 8 * CHUNK * 4)
+    loop = loop_with(6, 1.0)
+    overviews = {0: PeakPyramid(6, CHUNK)}
+    take(history, 'first', loop, range(0, 5), 2.0)
+    take(history, 'second', loop, range(1, 6), 3.0)  # Pages 5..9 wrap to slots 5, 6, 7, 0, 1
+    assert len(history.undo_stack) == 1  # The first take was evicted to make room
+    assert history.undo({0: loop}, overviews)
+    assert np.array_equal(loop[:, 0], [2.0, 2.0, 2.0, 2.0, 2.0, 1.0])
+
+
+def test_oversized_take_keeps_older_takes():
+    history = UndoHistory(CHUNK, 8 * CHUNK * 4)
+    loop = loop_with(20, 1.0)
+    overviews = {0: PeakPyramid(20, CHUNK)}
+    take(history, 'small', loop, range(0, 3), 2.0)
+    take(history, 'clear', loop, range(0, 20), 0.0)  # 20 rows, 8 pages
+    assert [t.label for t in history.undo_stack] == ['small']
+    assert history.undo({0: loop}, overviews)
+    assert np.array_equal(loop[:, 0], [1.0] * 3 + [0.0] * 17)